@@ -1,9 +1,32 @@
 import pandas as pd
-from pypinyin import pinyin, Style
+from pypinyin import pinyin, lazy_pinyin, Style
+from pypinyin.pinyin_dict import pinyin_dict
+from pypinyin.contrib.tone_convert import to_normal
 from collections import Counter
 import re
 
 
+# 英文字母按中文习惯念法对应的拼音音节（不带声调）
+LETTER_SYLLABLES = {
+    'a': ('ei',), 'b': ('bi',), 'c': ('xi',), 'd': ('di',), 'e': ('yi',), 'f': ('ai', 'fu'),
+    'g': ('ji',), 'h': ('ai', 'qi'), 'i': ('ai',), 'j': ('jie',), 'k': ('kai',), 'l': ('ai', 'le'),
+    'm': ('ai', 'mu'), 'n': ('en',), 'o': ('ou',), 'p': ('pi',), 'q': ('qiu',), 'r': ('a', 'er'),
+    's': ('ai', 'si'), 't': ('ti',), 'u': ('you',), 'v': ('wei',), 'w': ('da', 'bu', 'liu'),
+    'x': ('ai', 'ke', 'si'), 'y': ('wai',), 'z': ('zei',),
+    '0': ('ling',), '1': ('yi',), '2': ('er',), '3': ('san',), '4': ('si',),
+    '5': ('wu',), '6': ('liu',), '7': ('qi',), '8': ('ba',), '9': ('jiu',),
+}
+
+# 英文拼写按发音近似改写为拼音拼写的规则（按顺序替换）
+ENGLISH_SPELLING_RULES = [
+    ('tion', 'shen'), ('ph', 'f'), ('th', 's'), ('ck', 'k'), ('ee', 'i'), ('ea', 'i'),
+    ('oo', 'u'), ('ae', 'ai'), ('ay', 'ai'), ('ey', 'ei'), ('oy', 'ai'), ('ow', 'ao'),
+    ('v', 'w'), ('y', 'i'),
+]
+
+_pinyin_syllables = None
+
+
 def read_excel_range_by_columns(file_path, sheet_name, start_cell, end_cell):
     """
     读取Excel指定区域数据，按纵向（列）顺序存储到数组中
@@ -466,6 +489,268 @@ def determine_word_pronunciation_method2(words):
     return pronunciation_results, stats, classification
 
 
+# ==================== 第三类方案 ====================
+
+def determine_word_pronunciation_method3(words):
+    """
+    第三类方案：通用k音节级联，适用于任意长度的汉字词汇
+    依次尝试每个位置的单字，再尝试每对相邻两字，找到在集合中独一无二的最短读音单元；
+    都不独特时使用完整词。
+    单字集合包含：正常词汇所有位置的字读音 + 单字词汇的读音
+    双字集合包含：正常词汇所有相邻两字的读音组合
+    每个词只取一次拼音，计数器一次构建，总耗时与音节总数成线性关系
+    """
+    print("🔤 【第三类方案】正在获取所有词每个字的读音...")
+
+    classification = classify_words(words)
+    normal_words = classification['normal_chinese']
+    single_words = classification['single_chinese']
+
+    # 第一步：每个词只获取一次逐字拼音
+    word_info = []
+    for word in normal_words:
+        syllables = [get_char_pinyin(word, i) for i in range(len(word))]
+        if None in syllables:
+            continue
+        word_info.append({'word': word, 'syllables': syllables})
+
+    # 第二步：构建单字集合和相邻两字集合的计数器，并记录各位置的读音分布
+    syllable_counter = Counter()
+    pair_counter = Counter()
+    position_counters = []
+    for info in word_info:
+        syllables = info['syllables']
+        for i, syllable in enumerate(syllables):
+            syllable_counter[syllable] += 1
+            if i == len(position_counters):
+                position_counters.append(Counter())
+            position_counters[i][syllable] += 1
+        for i in range(len(syllables) - 1):
+            pair_counter[(syllables[i], syllables[i + 1])] += 1
+
+    for word in single_words:
+        single_pinyin = get_char_pinyin(word, 0)
+        if single_pinyin:
+            syllable_counter[single_pinyin] += 1
+
+    print(f"✅ 成功获取 {len(word_info)} 个正常词语的逐字读音")
+    print(f"📊 单字集合唯一读音数: {len(syllable_counter)}, 相邻两字集合唯一组合数: {len(pair_counter)}")
+
+    # 第三步：按 单字(各位置) → 相邻两字(各位置) → 完整词 的顺序级联
+    print("🎯 正在为每个词寻找最短的独特读音单元...")
+
+    pronunciation_results = []
+    for info in word_info:
+        word = info['word']
+        syllables = info['syllables']
+        pronunciation = word
+        method_used = "完整词"
+        reason = "所有单字和相邻两字读音都不独特"
+        unit_start = 0
+        unit_length = len(word)
+
+        for i, syllable in enumerate(syllables):
+            if syllable_counter[syllable] == 1:
+                pronunciation = word[i]
+                method_used = f"第{i + 1}个字"
+                reason = f"第{i + 1}个字读音在单字集合中独一无二"
+                unit_start, unit_length = i, 1
+                break
+        else:
+            # 双字词的相邻两字就是完整词，只有三字及以上的词才尝试
+            if len(word) > 2:
+                for i in range(len(syllables) - 1):
+                    if pair_counter[(syllables[i], syllables[i + 1])] == 1:
+                        pronunciation = word[i:i + 2]
+                        method_used = f"第{i + 1}-{i + 2}个字"
+                        reason = f"第{i + 1}-{i + 2}个字读音组合独一无二"
+                        unit_start, unit_length = i, 2
+                        break
+
+        pronunciation_results.append({
+            'word': word,
+            'syllables': syllables,
+            'pronunciation': pronunciation,
+            'method_used': method_used,
+            'reason': reason,
+            'unit_start': unit_start,
+            'unit_length': unit_length
+        })
+
+    # 统计信息
+    method_counter = Counter(result['method_used'] for result in pronunciation_results)
+    length_counter = Counter(len(result['word']) for result in pronunciation_results)
+    stats = {
+        'total_words': len(pronunciation_results),
+        'single_char_unit_count': sum(1 for result in pronunciation_results if result['unit_length'] == 1),
+        'pair_unit_count': sum(1 for result in pronunciation_results
+                               if result['unit_length'] == 2 and result['method_used'] != '完整词'),
+        'full_word_count': method_counter['完整词'],
+        'method_frequency': dict(method_counter),
+        'word_length_frequency': dict(length_counter),
+        'syllable_frequency': dict(syllable_counter),
+        'position_frequency': [dict(counter) for counter in position_counters]
+    }
+
+    return pronunciation_results, stats, classification
+
+
+# ==================== 跨文字读音冲突 ====================
+
+def get_pinyin_syllables():
+    """
+    获取所有合法的拼音音节（不带声调，仅含带元音的音节），首次调用时从pypinyin字典构建
+    """
+    global _pinyin_syllables
+    if _pinyin_syllables is None:
+        syllables = set()
+        for value in pinyin_dict.values():
+            for item in value.split(','):
+                syllable = to_normal(item)
+                if any(vowel in syllable for vowel in 'aeiouv'):
+                    syllables.add(syllable)
+        _pinyin_syllables = syllables
+    return _pinyin_syllables
+
+
+def segment_pinyin(text):
+    """
+    将小写字母串切分为最少数量的合法拼音音节
+
+    Args:
+        text: 小写字母串
+
+    Returns:
+        tuple: 音节元组，无法切分时返回None
+    """
+    syllables = get_pinyin_syllables()
+    # best[i]：text[:i]的最少音节切分
+    best = [None] * (len(text) + 1)
+    best[0] = ()
+    for end in range(1, len(text) + 1):
+        for start in range(max(0, end - 6), end):
+            if best[start] is not None and text[start:end] in syllables:
+                candidate = best[start] + (text[start:end],)
+                if best[end] is None or len(candidate) < len(best[end]):
+                    best[end] = candidate
+    return best[len(text)]
+
+
+def transliterate_ascii(token):
+    """
+    将英文/数字片段转写为拼音音节键
+
+    同时给出两种念法：按发音近似拼读（如 'AE' → ai），以及逐个字母念（如 'AE' → ei yi）
+
+    Args:
+        token: 英文/数字片段
+
+    Returns:
+        list: 音节元组列表（去重）
+    """
+    lowered = token.lower()
+    keys = []
+
+    spelled = lowered
+    for source, target in ENGLISH_SPELLING_RULES:
+        spelled = spelled.replace(source, target)
+    if spelled.isalpha():
+        phonetic = segment_pinyin(spelled)
+        if phonetic:
+            keys.append(phonetic)
+
+    if all(char in LETTER_SYLLABLES for char in lowered):
+        letters = tuple(syllable for char in lowered for syllable in LETTER_SYLLABLES[char])
+        if letters not in keys:
+            keys.append(letters)
+
+    return keys
+
+
+def get_syllable_keys(text):
+    """
+    获取任意词语（中文、英文或中英混合）的读音键，键为不带声调的音节元组
+
+    Args:
+        text: 词语或读音（汉字）
+
+    Returns:
+        list: 音节元组列表，中英混合时为各片段念法的组合
+    """
+    keys = [()]
+    for chinese_part, ascii_part, _ in re.findall(r'([\u4e00-\u9fff]+)|([A-Za-z0-9]+)|(.)', text):
+        if chinese_part:
+            part_keys = [tuple(lazy_pinyin(chinese_part, style=Style.NORMAL))]
+        elif ascii_part:
+            part_keys = transliterate_ascii(ascii_part)
+        else:
+            continue
+        if part_keys:
+            keys = [key + part_key for key in keys for part_key in part_keys]
+    return [key for key in keys if key]
+
+
+def find_cross_script_collisions(pronunciation_results, special_analysis):
+    """
+    构建跨文字读音索引，一次哈希遍历找出英文/混合词与中文读音之间的冲突
+
+    中文词汇使用方案选定的读音（汉字），英文和中英混合词汇使用转写后的音节键，
+    所有读音键放入同一个字典，同一个键下有多个词且至少一个是英文/混合词时即为冲突
+    （中文之间的冲突已由各方案处理，这里不重复报告）
+
+    Args:
+        pronunciation_results: 某一方案的读音结果（正常汉字词汇）
+        special_analysis: 特殊词汇分析结果
+
+    Returns:
+        list: 冲突列表，每项包含读音键及对应词语
+    """
+    print("🔗 正在构建跨文字读音索引...")
+
+    entries = []
+    for result in pronunciation_results:
+        entries.append((result['word'], result['pronunciation'], '中文'))
+    for item in special_analysis['single_chinese_analysis']:
+        entries.append((item['word'], item['pronunciation'], '中文'))
+    for item in special_analysis['english_words_analysis']:
+        entries.append((item['word'], item['pronunciation'], '英文'))
+    for item in special_analysis['mixed_words_analysis']:
+        entries.append((item['word'], item['pronunciation'], '中英混合'))
+
+    key_index = {}
+    for word, pronunciation, script in entries:
+        for key in get_syllable_keys(pronunciation):
+            key_index.setdefault(key, {})[word] = script
+
+    collisions = []
+    for key, word_scripts in key_index.items():
+        if len(word_scripts) > 1 and any(script != '中文' for script in word_scripts.values()):
+            collisions.append({
+                'key': ' '.join(key),
+                'words': [(word, script) for word, script in word_scripts.items()]
+            })
+
+    print(f"✅ 共索引 {len(key_index)} 个读音键，发现 {len(collisions)} 处英文/混合词读音冲突")
+    return collisions
+
+
+def print_cross_script_collisions(collisions):
+    """
+    打印跨文字读音冲突
+    """
+    print("\n" + "=" * 80)
+    print("【跨文字读音冲突】")
+    print("=" * 80)
+
+    if not collisions:
+        print("✅ 未发现英文/混合词与中文读音的冲突")
+        return
+
+    for i, collision in enumerate(collisions):
+        words = ', '.join(f"{word}({script})" for word, script in collision['words'])
+        print(f"   {i + 1:2d}. 读音 '{collision['key']}': {words}")
+
+
 # ==================== 结果展示函数 ====================
 
 def print_method1_results(pronunciation_results, stats):
@@ -543,6 +828,37 @@ def print_method2_results(pronunciation_results, stats):
                         f"   {i + 1:2d}. {result['word']:8s} → {result['pronunciation']} (首字:{result['first_union_count']}次, 第二个字:{result['second_union_count']}次)")
 
 
+def print_method3_results(pronunciation_results, stats):
+    """
+    打印第三类方案的分析结果
+    """
+    print("\n" + "=" * 80)
+    print("【第三类方案】词语读音分析结果")
+    print("=" * 80)
+
+    total_words = stats['total_words']
+    print("\n📊 基本统计:")
+    print(f"   总词数: {total_words}")
+    print("   词长分布: " + ", ".join(f"{length}字 {count}个"
+                                   for length, count in sorted(stats['word_length_frequency'].items())))
+    print(
+        f"   使用单字作为读音的词数: {stats['single_char_unit_count']} ({stats['single_char_unit_count'] / total_words * 100:.1f}%)")
+    print(
+        f"   使用相邻两字作为读音的词数: {stats['pair_unit_count']} ({stats['pair_unit_count'] / total_words * 100:.1f}%)")
+    print(
+        f"   使用完整词作为读音的词数: {stats['full_word_count']} ({stats['full_word_count'] / total_words * 100:.1f}%)")
+
+    print("\n🎯 各读音单元使用次数:")
+    for method, count in sorted(stats['method_frequency'].items(), key=lambda x: x[1], reverse=True):
+        print(f"   {method}: {count}")
+
+    long_examples = [result for result in pronunciation_results if len(result['word']) > 2]
+    if long_examples:
+        print("\n✨ 三字及以上词语示例 (前15个):")
+        for i, result in enumerate(long_examples[:15]):
+            print(f"   {i + 1:2d}. {result['word']:8s} → {result['pronunciation']} ({result['method_used']})")
+
+
 def print_special_words_analysis(special_analysis):
     """
     打印特殊词汇分析结果
@@ -822,11 +1138,25 @@ def main():
     print_method2_results(method2_results, method2_stats)
     method2_pronunciation_list = print_pronunciation_list(method2_results, "第二类方案")
 
+    # ==================== 运行第三类方案 ====================
+    print("\n" + "🟣" * 20 + " 第三类方案 " + "🟣" * 20)
+    method3_results, method3_stats, _ = determine_word_pronunciation_method3(words)
+
+    if method3_results:
+        print_method3_results(method3_results, method3_stats)
+        method3_pronunciation_list = print_pronunciation_list(method3_results, "第三类方案")
+    else:
+        method3_pronunciation_list = []
+
     # ==================== 特殊词汇分析 ====================
     print("\n" + "🟡" * 20 + " 特殊词汇分析 " + "🟡" * 20)
     special_analysis = analyze_special_words(classification)
     print_special_words_analysis(special_analysis)
 
+    # ==================== 跨文字读音冲突 ====================
+    cross_script_collisions = find_cross_script_collisions(method2_results, special_analysis)
+    print_cross_script_collisions(cross_script_collisions)
+
     # ==================== 对比分析 ====================
     differences = compare_methods(method1_results, method2_results)
 
@@ -842,9 +1172,13 @@ def main():
         'method2_pronunciations': method2_pronunciation_list,
         'method1_results': method1_results,
         'method2_results': method2_results,
+        'method3_pronunciations': method3_pronunciation_list,
+        'method3_results': method3_results,
         'method1_stats': method1_stats,
         'method2_stats': method2_stats,
+        'method3_stats': method3_stats,
         'special_analysis': special_analysis,
+        'cross_script_collisions': cross_script_collisions,
         'differences': differences
     }
 
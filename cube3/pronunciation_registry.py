@@ -0,0 +1,180 @@
+import sqlite3
+import sys
+from collections import Counter
+
+
+# 每批写入/查询的行数，控制单次事务占用的内存
+DEFAULT_BATCH_SIZE = 50000
+
+
+def open_registry(db_path):
+    """
+    打开（或创建）全局读音库
+
+    读音库为SQLite文件，按来源（工作簿/工作表）记录每个词语及其判重用的读音。
+    统计在磁盘上通过索引和GROUP BY完成，数据量超过内存时SQLite会自动使用临时文件，
+    因此可容纳所有历史词表（百万级词语）。
+
+    Args:
+        db_path: 读音库文件路径
+
+    Returns:
+        sqlite3.Connection: 数据库连接
+    """
+    conn = sqlite3.connect(db_path)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    # 排序/分组的中间结果落盘，缓存上限约64MB
+    conn.execute('PRAGMA temp_store=FILE')
+    conn.execute('PRAGMA cache_size=-65536')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS entries (
+            source TEXT NOT NULL,
+            word TEXT NOT NULL,
+            pronunciation TEXT NOT NULL,
+            PRIMARY KEY (source, word)
+        )
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_entries_pronunciation ON entries (pronunciation, word)')
+    conn.commit()
+    return conn
+
+
+def _batched(iterable, batch_size):
+    """
+    将可迭代对象按批切分，避免一次性载入全部数据
+    """
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def register_sheet(conn, source, entries, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    批量登记一个工作表的词语读音，同一来源重复登记时覆盖旧数据
+
+    Args:
+        conn: 读音库连接
+        source: 来源标识（如 'ci-test.xlsx:ci-test'）
+        entries: (词语, 读音) 的可迭代对象，可以是生成器
+        batch_size: 每批写入行数
+
+    Returns:
+        int: 登记的行数
+    """
+    total = 0
+    with conn:
+        conn.execute('DELETE FROM entries WHERE source = ?', (source,))
+        for batch in _batched(entries, batch_size):
+            conn.executemany(
+                'INSERT OR REPLACE INTO entries (source, word, pronunciation) VALUES (?, ?, ?)',
+                [(source, word, pronunciation) for word, pronunciation in batch]
+            )
+            total += len(batch)
+    return total
+
+
+def get_global_counter(conn, pronunciations, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    查询一批读音在全局读音库中的出现次数，返回值可直接替代本表内的Counter
+
+    次数按不同词语计：同一个词出现在多个工作表中只算一次，不视为冲突。
+
+    Args:
+        conn: 读音库连接
+        pronunciations: 需要查询的读音（可重复）
+        batch_size: 每批写入临时表的行数
+
+    Returns:
+        Counter: 读音 -> 全局不同词语数量
+    """
+    conn.execute('CREATE TEMP TABLE IF NOT EXISTS query_keys (pronunciation TEXT PRIMARY KEY)')
+    conn.execute('DELETE FROM query_keys')
+    for batch in _batched(set(pronunciations), batch_size):
+        conn.executemany('INSERT OR IGNORE INTO query_keys (pronunciation) VALUES (?)',
+                         [(p,) for p in batch])
+
+    counter = Counter()
+    rows = conn.execute('''
+        SELECT k.pronunciation, COUNT(DISTINCT e.word)
+        FROM query_keys k
+        JOIN entries e ON e.pronunciation = k.pronunciation
+        GROUP BY k.pronunciation
+    ''')
+    for pronunciation, count in rows:
+        counter[pronunciation] = count
+    conn.execute('DELETE FROM query_keys')
+    return counter
+
+
+def iter_global_collisions(conn, min_count=2):
+    """
+    流式遍历全局读音冲突（按读音分组，读音对应的不同词语数 >= min_count）
+
+    Args:
+        conn: 读音库连接
+        min_count: 视为冲突的最小词语数
+
+    Yields:
+        tuple: (读音, 不同词语数)
+    """
+    cursor = conn.execute('''
+        SELECT pronunciation, COUNT(DISTINCT word) AS cnt
+        FROM entries
+        GROUP BY pronunciation
+        HAVING cnt >= ?
+        ORDER BY cnt DESC, pronunciation
+    ''', (min_count,))
+    for row in cursor:
+        yield row
+
+
+def get_words_by_pronunciation(conn, pronunciation):
+    """
+    查询某个读音对应的所有词语及其来源
+
+    Returns:
+        list: [(词语, 来源), ...]
+    """
+    return conn.execute(
+        'SELECT word, source FROM entries WHERE pronunciation = ? ORDER BY word, source',
+        (pronunciation,)
+    ).fetchall()
+
+
+def print_registry_summary(conn, top_n=20):
+    """
+    打印读音库概况及冲突最多的读音
+    """
+    source_count, entry_count, pronunciation_count = conn.execute(
+        'SELECT COUNT(DISTINCT source), COUNT(*), COUNT(DISTINCT pronunciation) FROM entries'
+    ).fetchone()
+
+    print("\n" + "=" * 50)
+    print("🗄️  全局读音库概况")
+    print("=" * 50)
+    print(f"   • 来源工作表数：{source_count}")
+    print(f"   • 登记词语数：{entry_count}")
+    print(f"   • 不同读音数：{pronunciation_count}")
+
+    collision_count = 0
+    for pronunciation, count in iter_global_collisions(conn):
+        if collision_count < top_n:
+            words = ', '.join(sorted({word for word, _ in get_words_by_pronunciation(conn, pronunciation)}))
+            print(f"   ⚠️  读音 '{pronunciation}' 对应 {count} 个词语：{words}")
+        collision_count += 1
+    print(f"   • 存在冲突的读音数：{collision_count}")
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    # 用法：python pronunciation_registry.py pronunciation_registry.db
+    db_path = sys.argv[1] if len(sys.argv) > 1 else 'pronunciation_registry.db'
+    registry = open_registry(db_path)
+    print_registry_summary(registry)
+    registry.close()
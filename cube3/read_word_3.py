@@ -4,6 +4,8 @@ from collections import Counter
 import re
 import csv
 from openpyxl import load_workbook
+from pronunciation_registry import open_registry, register_sheet, get_global_counter
+from replacement_suggester import build_lexicon_index, suggest_for_collisions, print_suggestions
 
 
 def read_excel_range_by_columns(file_path, sheet_name, start_cell, end_cell):
@@ -43,14 +45,9 @@ def read_excel_range_by_columns(file_path, sheet_name, start_cell, end_cell):
         for item in result_array:
             if pd.notna(item):
                 item_str = str(item).strip()
-                # 检查是否为纯中文
+                # 检查是否为纯中文（字数不限，三字及以上的词按位置级联确定读音）
                 if re.match(r'^[\u4e00-\u9fff]+$', item_str):
-                    # 验证字数（必须是1个字或2个字）
-                    if len(item_str) == 1 or len(item_str) == 2:
-                        filtered_array.append(item_str)
-                    else:
-                        raise ValueError(f"❌ 发现不符合规则的纯中文词语：'{item_str}'（长度：{len(item_str)}字）\n"
-                                       f"   规则要求：纯中文词语必须是1个字或2个字")
+                    filtered_array.append(item_str)
 
         return filtered_array
 
@@ -61,7 +58,9 @@ def read_excel_range_by_columns(file_path, sheet_name, start_cell, end_cell):
 
 def analyze_cell_colors(file_path, sheet_name, start_cell, end_cell):
     """
-    分析Excel指定区域的单元格颜色分布
+    分析Excel指定区域的单元格颜色分布，并记录每个词语所在单元格的颜色
+
+    以只读模式按行流式遍历，单元格颜色按样式ID缓存，每种样式只解析一次
 
     Args:
         file_path: Excel文件路径
@@ -70,13 +69,13 @@ def analyze_cell_colors(file_path, sheet_name, start_cell, end_cell):
         end_cell: 结束单元格 (如 'Y25')
 
     Returns:
-        dict: 颜色分布统计
+        dict: 颜色分布统计及词语颜色映射
     """
     try:
         print("🎨 开始分析单元格颜色分布...")
 
-        # 使用openpyxl读取工作簿
-        workbook = load_workbook(file_path)
+        # 使用openpyxl只读模式读取工作簿
+        workbook = load_workbook(file_path, read_only=True)
         worksheet = workbook[sheet_name]
 
         # 解析起始和结束位置
@@ -86,41 +85,44 @@ def analyze_cell_colors(file_path, sheet_name, start_cell, end_cell):
         end_row = int(end_cell[1:])
 
         color_stats = {}
+        word_colors = {}  # 词语 -> 颜色名称
+        style_color_cache = {}  # 样式ID -> 颜色名称
         total_cells = 0
         cells_with_content = 0
 
         # 遍历指定区域的所有单元格
-        for row in range(start_row, end_row + 1):
-            for col in range(start_col, end_col + 1):
-                cell = worksheet.cell(row=row, column=col)
+        for row in worksheet.iter_rows(min_row=start_row, max_row=end_row,
+                                       min_col=start_col, max_col=end_col):
+            for cell in row:
                 total_cells += 1
 
                 # 检查单元格是否有内容
-                if cell.value is not None and str(cell.value).strip():
-                    cells_with_content += 1
-
-                    # 获取填充颜色
-                    fill = cell.fill
-                    if fill and fill.start_color and fill.start_color.rgb:
-                        color_rgb = fill.start_color.rgb
-                        if color_rgb and color_rgb != '00000000':  # 排除默认透明色
-                            color_name = get_color_name(color_rgb)
-                            color_stats[color_name] = color_stats.get(color_name, 0) + 1
-                        else:
-                            color_stats['无颜色/默认'] = color_stats.get('无颜色/默认', 0) + 1
-                    else:
-                        color_stats['无颜色/默认'] = color_stats.get('无颜色/默认', 0) + 1
+                if cell.value is None or not str(cell.value).strip():
+                    continue
+                cells_with_content += 1
+
+                # 获取填充颜色（同一样式只解析一次）
+                style_id = getattr(cell, '_style_id', 0)
+                color_name = style_color_cache.get(style_id)
+                if color_name is None:
+                    color_name = get_fill_color_name(cell.fill)
+                    style_color_cache[style_id] = color_name
+
+                color_stats[color_name] = color_stats.get(color_name, 0) + 1
+                word_colors.setdefault(str(cell.value).strip(), color_name)
 
         workbook.close()
 
         print(f"✅ 颜色分析完成！")
         print(f"   总单元格数：{total_cells}")
         print(f"   有内容单元格数：{cells_with_content}")
+        print(f"   不同样式数：{len(style_color_cache)}")
 
         return {
             'color_distribution': color_stats,
             'total_cells': total_cells,
-            'cells_with_content': cells_with_content
+            'cells_with_content': cells_with_content,
+            'word_colors': word_colors
         }
 
     except Exception as e:
@@ -128,10 +130,35 @@ def analyze_cell_colors(file_path, sheet_name, start_cell, end_cell):
         return {
             'color_distribution': {},
             'total_cells': 0,
-            'cells_with_content': 0
+            'cells_with_content': 0,
+            'word_colors': {}
         }
 
 
+def get_fill_color_name(fill):
+    """
+    将单元格填充转换为颜色名称，支持RGB、主题色和索引色
+
+    Args:
+        fill: openpyxl的填充对象
+
+    Returns:
+        str: 颜色名称
+    """
+    if not fill or not fill.fill_type or not fill.start_color:
+        return '无颜色/默认'
+
+    color = fill.start_color
+    if color.type == 'theme':
+        tint = f"({color.tint:+.0%})" if color.tint else ''
+        return f'主题色{color.theme}{tint}'
+    if color.type == 'indexed':
+        return f'索引色{color.indexed}'
+    if color.rgb and color.rgb != '00000000':  # 排除默认透明色
+        return get_color_name(color.rgb)
+    return '无颜色/默认'
+
+
 def get_color_name(rgb_color):
     """
     将RGB颜色值转换为颜色名称
@@ -210,6 +237,91 @@ def print_color_statistics(color_analysis):
     print("="*50)
 
 
+def compute_color_group_statistics(words, pronunciation_collection, detailed_results, word_colors):
+    """
+    按单元格颜色（词语类别）分组统计读音情况，一次遍历完成所有分组
+
+    Args:
+        words: 词语列表
+        pronunciation_collection: 与words一一对应的读音集合数组
+        detailed_results: 与words一一对应的详细结果
+        word_colors: 词语 -> 颜色名称
+
+    Returns:
+        dict: 颜色名称 -> 分组统计
+    """
+    group_stats = {}
+
+    for word, pronunciation, result in zip(words, pronunciation_collection, detailed_results):
+        color_name = word_colors.get(word, '未知颜色')
+        group = group_stats.get(color_name)
+        if group is None:
+            group = {
+                'word_count': 0,
+                'strategy': Counter(),
+                'tone': Counter(),
+                'pronunciation_words': {}
+            }
+            group_stats[color_name] = group
+
+        group['word_count'] += 1
+
+        # 读音策略
+        if len(word) == 1:
+            group['strategy']['单字（读自身）'] += 1
+        elif len(word) > 2:
+            group['strategy'][long_word_strategy(word, result['读音（汉字）'])] += 1
+        elif len(result['读音（汉字）']) == 1:
+            group['strategy']['双字（读首字）'] += 1
+        else:
+            group['strategy']['双字（读完整）'] += 1
+
+        # 首字声调（TONE3风格末尾为声调数字，无数字为轻声）
+        tone = pronunciation[-1] if pronunciation[-1].isdigit() else '轻声'
+        group['tone'][tone] += 1
+
+        group['pronunciation_words'].setdefault(pronunciation, []).append(word)
+
+    # 组内首字读音重复
+    for group in group_stats.values():
+        group['duplicates'] = {pronunciation: dup_words
+                               for pronunciation, dup_words in group.pop('pronunciation_words').items()
+                               if len(dup_words) > 1}
+
+    return group_stats
+
+
+def print_color_group_statistics(group_stats):
+    """
+    打印按颜色分组的读音统计
+    """
+    print("\n" + "="*50)
+    print("🎨 按颜色分组的读音统计")
+    print("="*50)
+
+    for color_name, group in sorted(group_stats.items(), key=lambda x: x[1]['word_count'], reverse=True):
+        word_count = group['word_count']
+        print(f"\n🌈 {color_name}：{word_count} 个词语")
+
+        print("   🎯 读音策略：")
+        for strategy, count in group['strategy'].most_common():
+            print(f"      • {strategy}：{count} 个 ({count/word_count*100:.1f}%)")
+
+        print("   🎵 首字声调：")
+        for tone in sorted(group['tone']):
+            count = group['tone'][tone]
+            tone_label = tone if tone == '轻声' else f'{tone}声'
+            print(f"      • {tone_label}：{count} 个 ({count/word_count*100:.1f}%)")
+
+        duplicates = group['duplicates']
+        duplicate_words = sum(len(dup_words) for dup_words in duplicates.values())
+        print(f"   🔄 组内首字读音重复：{len(duplicates)} 种读音，涉及 {duplicate_words} 个词语")
+        for pronunciation, dup_words in sorted(duplicates.items(), key=lambda x: len(x[1]), reverse=True)[:5]:
+            print(f"      • {pronunciation}：{', '.join(dup_words)}")
+
+    print("="*50)
+
+
 def check_single_char_pronunciation_duplicates(words):
     """
     检查所有单字的读音是否有重复
@@ -258,7 +370,7 @@ def check_single_char_pronunciation_duplicates(words):
 
 def build_pronunciation_collection(words):
     """
-    构建所有单字+双字第一个字的读音集合数组（保留重复值）
+    构建所有单字+多字词第一个字的读音集合数组（保留重复值），与words一一对应
 
     Args:
         words: 词语列表
@@ -275,8 +387,8 @@ def build_pronunciation_collection(words):
             # 单字：使用上下文推断的准确读音
             pronunciation = get_accurate_pronunciation_from_context(word, words)
             pronunciation_collection.append(pronunciation)
-        elif len(word) == 2:
-            # 双字：获取第一个字的上下文推断读音
+        else:
+            # 双字及更长的词：获取第一个字的上下文推断读音
             first_char = word[0]
             pronunciation = get_accurate_pronunciation_from_context(first_char, words)
             pronunciation_collection.append(pronunciation)
@@ -349,13 +461,86 @@ def determine_double_char_pronunciation(words, pronunciation_collection):
     return word_pronunciation_mapping
 
 
-def create_pronunciation_mapping_with_chars(words, pronunciation_collection):
+def get_first_char_pronunciations(words):
+    """
+    每个词首字的上下文推断读音（字 -> 读音）
+    双字词按首字预先分组，每个字只推断一次，总耗时与词数成线性关系
+    """
+    double_words_by_first_char = {}
+    for word in words:
+        if len(word) == 2:
+            double_words_by_first_char.setdefault(word[0], []).append(word)
+    first_char_pronunciations = {}
+    for word in words:
+        if word[0] not in first_char_pronunciations:
+            first_char_pronunciations[word[0]] = get_accurate_pronunciation_from_context(
+                word[0], double_words_by_first_char.get(word[0], []))
+    return first_char_pronunciations
+
+
+def get_word_syllables(word, first_char_pronunciations):
+    """多字词的逐字读音：首字用上下文推断（与读音集合一致），其余字按整词取拼音"""
+    word_pinyin = pinyin(word, style=Style.TONE3)
+    return [first_char_pronunciations[word[0]]] + [p[0] for p in word_pinyin[1:]]
+
+
+def build_long_word_counters(words, first_char_pronunciations):
+    """
+    为三字及以上的词构建按位置级联需要的计数器，每个词只取一次拼音，总耗时与音节总数成线性关系
+
+    Returns:
+        tuple: (词语 -> 逐字读音, 非首字位置读音计数, 相邻两字读音组合计数)
+               相邻两字计数同时包含双字词的读音，避免与读完整词的双字词重复；两者的逐字读音来源相同
+    """
+    long_word_syllables = {}
+    later_position_counter = Counter()
+    pair_counter = Counter()
+    for word in words:
+        if len(word) == 2:
+            pair_counter[tuple(get_word_syllables(word, first_char_pronunciations))] += 1
+        elif len(word) > 2 and word not in long_word_syllables:
+            syllables = get_word_syllables(word, first_char_pronunciations)
+            long_word_syllables[word] = syllables
+            later_position_counter.update(syllables[1:])
+            for i in range(len(syllables) - 1):
+                pair_counter[(syllables[i], syllables[i + 1])] += 1
+    return long_word_syllables, later_position_counter, pair_counter
+
+
+def determine_long_word_unit(word, syllables, pronunciation_counter, later_position_counter, pair_counter):
+    """
+    三字及以上的词：依次尝试每个位置的单字，再尝试每对相邻两字，找到独一无二的最短读音单元，都不独特时读完整词
+    单字是否独特按 读音集合（单字+各词首字）+ 长词非首字位置 的合计次数判断
+
+    Returns:
+        tuple: (读音（汉字）, 读音（拼音）)
+    """
+    for i, syllable in enumerate(syllables):
+        if pronunciation_counter[syllable] + later_position_counter[syllable] == 1:
+            return word[i], syllable
+    for i in range(len(syllables) - 1):
+        if pair_counter[(syllables[i], syllables[i + 1])] == 1:
+            return word[i:i + 2], syllables[i] + syllables[i + 1]
+    return word, ''.join(syllables)
+
+
+def long_word_strategy(word, pronunciation_char):
+    if len(pronunciation_char) == 1:
+        return '长词（读单字）'
+    if len(pronunciation_char) == 2:
+        return '长词（读相邻两字）'
+    return '长词（读完整）'
+
+
+def create_pronunciation_mapping_with_chars(words, pronunciation_collection, pronunciation_counter=None):
     """
     创建词语到读音的映射，读音用汉字表示
 
     Args:
         words: 词语列表
         pronunciation_collection: 读音集合数组（包含重复值）
+        pronunciation_counter: 读音出现次数统计，为None时按本表的读音集合统计；
+                               传入全局读音库的统计结果即可跨工作表判重
 
     Returns:
         tuple: (word_pronunciation_mapping, detailed_results)
@@ -363,7 +548,8 @@ def create_pronunciation_mapping_with_chars(words, pronunciation_collection):
     print("🎯 确定词语读音规则...")
 
     # 统计读音出现次数
-    pronunciation_counter = Counter(pronunciation_collection)
+    if pronunciation_counter is None:
+        pronunciation_counter = Counter(pronunciation_collection)
 
     # 创建词语到读音的映射和详细结果
     word_pronunciation_mapping = {}
@@ -373,25 +559,25 @@ def create_pronunciation_mapping_with_chars(words, pronunciation_collection):
     single_char_count = 0
     double_char_read_first = 0
     double_char_read_full = 0
+    long_word_strategies = Counter()
+    # 每个词的首字读音只推断一次，按首字读音建立索引，用于查找首字音重复的词汇
+    first_char_pronunciations = get_first_char_pronunciations(words)
+    words_by_first_syllable = {}
+    for w in words:
+        words_by_first_syllable.setdefault(first_char_pronunciations[w[0]], []).append(w)
+    long_word_syllables, later_position_counter, pair_counter = build_long_word_counters(
+        words, first_char_pronunciations)
 
     for word in words:
         if len(word) == 1:
             # 单字：读音就是单字本身
             pronunciation_char = word
             # 使用上下文推断的准确读音
-            pronunciation_pinyin = get_accurate_pronunciation_from_context(word, words)
+            pronunciation_pinyin = first_char_pronunciations[word]
             first_char_count = pronunciation_counter[pronunciation_pinyin]
 
             # 找到与该单字读音相同的所有词汇
-            same_pronunciation_words = []
-            for w in words:
-                if len(w) == 1:
-                    if get_accurate_pronunciation_from_context(w, words) == pronunciation_pinyin:
-                        same_pronunciation_words.append(w)
-                elif len(w) == 2:
-                    first_char_pinyin = get_accurate_pronunciation_from_context(w[0], words)
-                    if first_char_pinyin == pronunciation_pinyin:
-                        same_pronunciation_words.append(w)
+            same_pronunciation_words = words_by_first_syllable[pronunciation_pinyin]
 
             word_pronunciation_mapping[word] = pronunciation_char
 
@@ -413,19 +599,11 @@ def create_pronunciation_mapping_with_chars(words, pronunciation_collection):
         elif len(word) == 2:
             # 双字：根据规则确定读音
             first_char = word[0]
-            first_char_pronunciation = get_accurate_pronunciation_from_context(first_char, words)
+            first_char_pronunciation = first_char_pronunciations[first_char]
             first_char_count = pronunciation_counter[first_char_pronunciation]
 
             # 找到与该双字首字读音相同的所有词汇
-            same_pronunciation_words = []
-            for w in words:
-                if len(w) == 1:
-                    if get_accurate_pronunciation_from_context(w, words) == first_char_pronunciation:
-                        same_pronunciation_words.append(w)
-                elif len(w) == 2:
-                    first_char_pinyin = get_accurate_pronunciation_from_context(w[0], words)
-                    if first_char_pinyin == first_char_pronunciation:
-                        same_pronunciation_words.append(w)
+            same_pronunciation_words = words_by_first_syllable[first_char_pronunciation]
 
             # 检查首字读音是否独一无二
             if pronunciation_counter[first_char_pronunciation] == 1:
@@ -455,6 +633,29 @@ def create_pronunciation_mapping_with_chars(words, pronunciation_collection):
                 '首字音重复词汇列表': same_pronunciation_display
             })
 
+        else:
+            # 三字及以上：按位置级联找最短的独特读音单元
+            syllables = long_word_syllables[word]
+            first_char_count = pronunciation_counter[syllables[0]]
+            same_pronunciation_words = words_by_first_syllable[syllables[0]]
+            pronunciation_char, pronunciation_pinyin = determine_long_word_unit(
+                word, syllables, pronunciation_counter, later_position_counter, pair_counter)
+            word_pronunciation_mapping[word] = pronunciation_char
+            long_word_strategies[long_word_strategy(word, pronunciation_char)] += 1
+
+            if len(same_pronunciation_words) == 1 and same_pronunciation_words[0] == word:
+                same_pronunciation_display = ''
+            else:
+                same_pronunciation_display = ', '.join(same_pronunciation_words)
+
+            detailed_results.append({
+                '原始词': word,
+                '读音（汉字）': pronunciation_char,
+                '读音（拼音）': pronunciation_pinyin,
+                '首字音重复数量': first_char_count,
+                '首字音重复词汇列表': same_pronunciation_display
+            })
+
     # 检查最终读音是否有重复
     final_pronunciations = list(word_pronunciation_mapping.values())
     final_pronunciation_counter = Counter(final_pronunciations)
@@ -472,7 +673,8 @@ def create_pronunciation_mapping_with_chars(words, pronunciation_collection):
     return word_pronunciation_mapping, detailed_results, {
         'single_char_count': single_char_count,
         'double_char_read_first': double_char_read_first,
-        'double_char_read_full': double_char_read_full
+        'double_char_read_full': double_char_read_full,
+        'long_word_strategies': dict(long_word_strategies)
     }
 
 
@@ -562,13 +764,13 @@ def check_polyphonic_characters(words):
     """
     print("🔍 检查多音字情况...")
 
-    # 收集所有需要检查的字符（单字 + 双字的首字）
+    # 收集所有需要检查的字符（单字 + 多字词的首字）
     chars_to_check = set()
 
     for word in words:
         if len(word) == 1:
             chars_to_check.add(word)
-        elif len(word) == 2:
+        else:
             chars_to_check.add(word[0])
 
     polyphonic_info = {}
@@ -598,6 +800,64 @@ def check_polyphonic_characters(words):
     return polyphonic_info
 
 
+def get_registry_counter(registry_path, source, words, pronunciation_collection):
+    """
+    将本表词语登记到全局读音库，并返回本表读音的全局出现次数
+
+    Args:
+        registry_path: 全局读音库路径
+        source: 来源标识（工作簿:工作表）
+        words: 词语列表
+        pronunciation_collection: 与words一一对应的读音集合数组
+
+    Returns:
+        Counter: 读音 -> 全局不同词语数量
+    """
+    print(f"🗄️  登记到全局读音库：{registry_path}")
+    registry = open_registry(registry_path)
+    try:
+        registered = register_sheet(registry, source, zip(words, pronunciation_collection))
+        counter = get_global_counter(registry, pronunciation_collection)
+    finally:
+        registry.close()
+
+    local_counter = Counter(p for _, p in set(zip(words, pronunciation_collection)))
+    cross_sheet = sum(1 for p in local_counter if counter[p] > local_counter[p])
+    print(f"✅ 已登记 {registered} 个词语，其中 {cross_sheet} 个读音与其他工作表冲突")
+    return counter
+
+
+def suggest_collision_replacements(words, word_pronunciation_mapping, pronunciation_collection,
+                                   pronunciation_counter=None, extra_word_files=()):
+    """
+    为需要读完整词语（首字读音冲突）的双字词推荐替换词
+
+    Args:
+        words: 词语列表
+        word_pronunciation_mapping: 词语到读音（汉字）的映射
+        pronunciation_collection: 读音集合数组
+        pronunciation_counter: 读音计数，为None时按本表统计
+        extra_word_files: 额外词库文件列表
+
+    Returns:
+        dict: 词语 -> 推荐列表
+    """
+    print("\n💡 为首字读音冲突的词语查找替换词...")
+    if pronunciation_counter is None:
+        pronunciation_counter = Counter(pronunciation_collection)
+
+    collisions = [(word, [pinyin(char, style=Style.TONE3)[0][0] for char in word])
+                  for word, pronunciation in word_pronunciation_mapping.items()
+                  if len(word) == 2 and pronunciation == word]
+
+    lexicon = build_lexicon_index(style=Style.TONE3, lengths=(2,), extra_word_files=extra_word_files)
+    print(f"📚 词库收录 {len(lexicon.words)} 个双字词")
+
+    suggestions = suggest_for_collisions(lexicon, collisions, pronunciation_counter, words)
+    print_suggestions(suggestions)
+    return suggestions
+
+
 def print_processing_logic():
     """
     打印联想词处理逻辑说明
@@ -608,12 +868,13 @@ def print_processing_logic():
     print("目标：为每个词语分配唯一的读音，确保无重复")
     print()
     print("处理步骤：")
-    print("1️⃣  数据预处理：仅保留纯中文1-2字词语")
+    print("1️⃣  数据预处理：仅保留纯中文词语")
     print("2️⃣  单字读音检查：确保所有单字读音无重复")
     print("3️⃣  读音集合构建：收集所有单字+双字首字的读音")
     print("4️⃣  双字读音规则：")
     print("    • 如果双字首字读音独一无二 → 读首字")
     print("    • 如果双字首字读音有重复 → 读完整词语")
+    print("    • 三字及以上：依次尝试每个位置的单字、每对相邻两字，读最先独一无二的单元，都不独特时读完整词语")
     print("5️⃣  最终验证：确保所有词语的读音无重复")
     print("6️⃣  结果输出：生成CSV文件包含详细映射信息")
     print("="*60)
@@ -636,10 +897,13 @@ def print_statistics(words, stats, detailed_results):
     total_words = len(words)
     single_chars = [w for w in words if len(w) == 1]
     double_chars = [w for w in words if len(w) == 2]
+    long_words = [w for w in words if len(w) > 2]
 
     print(f"📝 词语总数：{total_words} ({total_words/TOTAL_ASSOCIATION_WORDS*100:.1f}%)")
     print(f"   • 单字：{len(single_chars)} 个 ({len(single_chars)/TOTAL_ASSOCIATION_WORDS*100:.1f}%)")
     print(f"   • 双字：{len(double_chars)} 个 ({len(double_chars)/TOTAL_ASSOCIATION_WORDS*100:.1f}%)")
+    if long_words:
+        print(f"   • 三字及以上：{len(long_words)} 个 ({len(long_words)/TOTAL_ASSOCIATION_WORDS*100:.1f}%)")
     print()
 
     # 读音策略统计
@@ -647,6 +911,8 @@ def print_statistics(words, stats, detailed_results):
     print(f"   • 单字（读自身）：{stats['single_char_count']} 个 ({stats['single_char_count']/TOTAL_ASSOCIATION_WORDS*100:.1f}%)")
     print(f"   • 双字（读首字）：{stats['double_char_read_first']} 个 ({stats['double_char_read_first']/TOTAL_ASSOCIATION_WORDS*100:.1f}%)")
     print(f"   • 双字（读完整）：{stats['double_char_read_full']} 个 ({stats['double_char_read_full']/TOTAL_ASSOCIATION_WORDS*100:.1f}%)")
+    for strategy, count in sorted(stats['long_word_strategies'].items()):
+        print(f"   • {strategy}：{count} 个 ({count/TOTAL_ASSOCIATION_WORDS*100:.1f}%)")
     print()
 
     # 读音长度统计
@@ -717,6 +983,9 @@ def main():
     # 文件路径和参数设置
     file_path = 'ci-test.xlsx'  # 请修改为你的文件路径
     sheet_name = 'ci-test'
+    registry_path = None  # 全局读音库路径（如 'pronunciation_registry.db'），为None时仅在本表内判重
+    suggest_replacements = False  # 是否为首字读音冲突的词语推荐替换词
+    lexicon_files = []  # 额外的替换词词库文件（每行一个词）
 
     print("🚀 开始读取Excel文件...")
 
@@ -727,7 +996,7 @@ def main():
         print("❌ 没有读取到数据，请检查文件路径和工作表名称")
         return
 
-    print(f"✅ 成功读取到 {len(words)} 个有效词语（仅保留纯中文1-2字词语）")
+    print(f"✅ 成功读取到 {len(words)} 个有效词语（仅保留纯中文词语）")
 
     # 分析单元格颜色分布
     color_analysis = analyze_cell_colors(file_path, sheet_name, 'B2', 'Y25')
@@ -743,15 +1012,32 @@ def main():
     # 步骤2：构建所有单字+双字第一个字的读音集合数组（保留重复值）
     pronunciation_collection = build_pronunciation_collection(words)
 
+    # 可选：登记到全局读音库，并用全局统计替代本表统计
+    pronunciation_counter = None
+    if registry_path:
+        pronunciation_counter = get_registry_counter(registry_path, f'{file_path}:{sheet_name}',
+                                                     words, pronunciation_collection)
+
     # 步骤3：确定双字的读音规则（用汉字表示读音）
-    word_pronunciation_mapping, detailed_results, stats = create_pronunciation_mapping_with_chars(words, pronunciation_collection)
+    word_pronunciation_mapping, detailed_results, stats = create_pronunciation_mapping_with_chars(
+        words, pronunciation_collection, pronunciation_counter)
 
     # 步骤4：保存结果到CSV文件
     save_results_to_csv(detailed_results)
 
+    # 可选：为首字读音冲突的词语推荐替换词
+    if suggest_replacements:
+        suggest_collision_replacements(words, word_pronunciation_mapping, pronunciation_collection,
+                                       pronunciation_counter, lexicon_files)
+
     # 步骤5：打印统计信息
     print_statistics(words, stats, detailed_results)
 
+    # 步骤6：按颜色（词语类别）分组统计
+    group_stats = compute_color_group_statistics(words, pronunciation_collection, detailed_results,
+                                                 color_analysis['word_colors'])
+    print_color_group_statistics(group_stats)
+
 
 if __name__ == "__main__":
     main()
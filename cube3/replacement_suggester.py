@@ -0,0 +1,219 @@
+import sys
+from collections import defaultdict
+from pypinyin import lazy_pinyin, Style
+from pypinyin.contrib.tone_convert import to_tone2, to_tone3
+from pypinyin.phrases_dict import phrases_dict
+
+
+# 每个候选来源最多扫描的词数，保证单次查询耗时与词库大小无关
+MAX_SCAN_PER_SOURCE = 300
+
+
+def is_pure_chinese(word):
+    """
+    判断是否为纯中文词语
+    """
+    return bool(word) and all('\u4e00' <= char <= '\u9fff' for char in word)
+
+
+class LexiconIndex:
+    """
+    替换词词库索引
+
+    词语按ID存放在并列数组中，并建立以下索引：
+      • (字, 位置) -> 词语ID：用于查找共享语素（语义相近）的词
+      • 首字读音 -> 词语ID、第二字读音 -> 词语ID：用于同音/近音判断
+    """
+
+    def __init__(self, style=Style.TONE3, lengths=(2,)):
+        """
+        Args:
+            style: 读音键的拼音风格，cube3使用TONE3，cube2使用TONE2
+            lengths: 收录的词语长度
+        """
+        self.style = style
+        self.lengths = set(lengths)
+        self.words = []
+        self.first_keys = []
+        self.second_keys = []
+        self.word_ids = {}
+        self.by_char_pos = defaultdict(list)
+        self.by_first_key = defaultdict(list)
+        self.by_second_key = defaultdict(list)
+
+    def _convert(self, tone_pinyin):
+        if self.style == Style.TONE2:
+            return to_tone2(tone_pinyin)
+        return to_tone3(tone_pinyin)
+
+    def add(self, word, keys):
+        """
+        添加一个词语
+
+        Args:
+            word: 词语
+            keys: 该词每个字的读音键
+        """
+        if word in self.word_ids or len(word) not in self.lengths or len(keys) != len(word):
+            return
+        word_id = len(self.words)
+        self.word_ids[word] = word_id
+        self.words.append(word)
+        self.first_keys.append(keys[0])
+        self.second_keys.append(keys[1] if len(keys) > 1 else None)
+        for pos, char in enumerate(word):
+            self.by_char_pos[(char, pos)].append(word_id)
+        self.by_first_key[keys[0]].append(word_id)
+        if len(keys) > 1:
+            self.by_second_key[keys[1]].append(word_id)
+
+    def load_pypinyin_phrases(self):
+        """
+        载入pypinyin自带的词组读音词典（读音已标注，直接转换风格，无需重新推断）
+        """
+        for phrase, phrase_pinyin in phrases_dict.items():
+            if len(phrase) in self.lengths and is_pure_chinese(phrase):
+                self.add(phrase, [self._convert(item[0]) for item in phrase_pinyin])
+        return self
+
+    def load_word_file(self, file_path):
+        """
+        载入自定义词库文件（每行一个词，制表符后的内容忽略）
+        """
+        with open(file_path, encoding='utf-8') as f:
+            for line in f:
+                word = line.split('\t')[0].strip()
+                if len(word) in self.lengths and is_pure_chinese(word) and word not in self.word_ids:
+                    self.add(word, lazy_pinyin(word, style=self.style))
+        return self
+
+
+def build_lexicon_index(style=Style.TONE3, lengths=(2,), extra_word_files=()):
+    """
+    构建替换词词库索引
+
+    Args:
+        style: 读音键的拼音风格
+        lengths: 收录的词语长度
+        extra_word_files: 额外词库文件列表
+
+    Returns:
+        LexiconIndex: 词库索引
+    """
+    index = LexiconIndex(style=style, lengths=lengths).load_pypinyin_phrases()
+    for file_path in extra_word_files:
+        index.load_word_file(file_path)
+    return index
+
+
+def suggest_replacements(index, word, word_keys, pronunciation_counter, existing_words=(),
+                         claimed_keys=None, top_k=5):
+    """
+    为首字读音冲突的词语推荐替换词
+
+    候选词的首字读音必须未被占用（这样替换后可以只读首字），
+    按与原词的语义相近程度排序：
+      • 与原词末字相同且位置相同（如 蛋糕 → 年糕）
+      • 包含原词的其他字
+      • 末字与原词末字同音
+    同分时优先第二字读音也未被占用的词。
+
+    Args:
+        index: 词库索引
+        word: 原词
+        word_keys: 原词每个字的读音键
+        pronunciation_counter: 当前读音集合的计数（Counter或全局读音库统计）
+        existing_words: 表内已有词语，不会被推荐
+        claimed_keys: 已被其他推荐占用的首字读音集合，为None时不做跨词去重
+        top_k: 最多返回的推荐数
+
+    Returns:
+        list: [(替换词, 首字读音, 得分), ...]
+    """
+    scores = {}
+
+    def consider(word_ids, score):
+        for word_id in word_ids[:MAX_SCAN_PER_SOURCE]:
+            first_key = index.first_keys[word_id]
+            if pronunciation_counter[first_key] > 0:
+                continue
+            if claimed_keys is not None and first_key in claimed_keys:
+                continue
+            if scores.get(word_id, 0) < score:
+                scores[word_id] = score
+
+    last_pos = len(word) - 1
+    consider(index.by_char_pos.get((word[last_pos], last_pos), []), 3)
+    for pos, char in enumerate(word):
+        for other_pos in range(max(index.lengths)):
+            if (pos, other_pos) != (last_pos, last_pos):
+                consider(index.by_char_pos.get((char, other_pos), []), 2)
+    if len(word_keys) > 1:
+        consider(index.by_second_key.get(word_keys[-1], []), 1)
+
+    ranked = []
+    for word_id, score in scores.items():
+        candidate = index.words[word_id]
+        if candidate == word or candidate in existing_words:
+            continue
+        second_key = index.second_keys[word_id]
+        second_free = second_key is None or pronunciation_counter[second_key] == 0
+        ranked.append((candidate, index.first_keys[word_id], score + (0.5 if second_free else 0)))
+
+    ranked.sort(key=lambda x: (-x[2], x[0]))
+    return ranked[:top_k]
+
+
+def suggest_for_collisions(index, collisions, pronunciation_counter, existing_words, top_k=5):
+    """
+    为一批冲突词语推荐替换词，首选推荐的首字读音不会互相冲突
+
+    Args:
+        index: 词库索引
+        collisions: [(词语, 读音键列表), ...]
+        pronunciation_counter: 当前读音集合的计数
+        existing_words: 表内已有词语
+        top_k: 每个词最多返回的推荐数
+
+    Returns:
+        dict: 词语 -> 推荐列表
+    """
+    existing_words = set(existing_words)
+    claimed_keys = set()
+    suggestions = {}
+    for word, word_keys in collisions:
+        ranked = suggest_replacements(index, word, word_keys, pronunciation_counter,
+                                      existing_words, claimed_keys, top_k)
+        if ranked:
+            claimed_keys.add(ranked[0][1])
+        suggestions[word] = ranked
+    return suggestions
+
+
+def print_suggestions(suggestions, limit=50):
+    """
+    打印替换建议
+    """
+    print("\n" + "=" * 50)
+    print("💡 首字读音冲突词语的替换建议")
+    print("=" * 50)
+    with_suggestion = [(word, ranked) for word, ranked in suggestions.items() if ranked]
+    print(f"   共 {len(suggestions)} 个冲突词语，其中 {len(with_suggestion)} 个找到替换词")
+    for word, ranked in with_suggestion[:limit]:
+        alternatives = ', '.join(f"{candidate}({key})" for candidate, key, _ in ranked)
+        print(f"   • {word} → {alternatives}")
+    if len(with_suggestion) > limit:
+        print(f"   ... 还有{len(with_suggestion) - limit}个")
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    # 用法：python replacement_suggester.py 蛋糕 [自定义词库.txt ...]
+    from collections import Counter
+
+    target = sys.argv[1] if len(sys.argv) > 1 else '蛋糕'
+    lexicon = build_lexicon_index(extra_word_files=sys.argv[2:])
+    print(f"📚 词库收录 {len(lexicon.words)} 个词语")
+    target_keys = lazy_pinyin(target, style=Style.TONE3)
+    print_suggestions({target: suggest_replacements(lexicon, target, target_keys,
+                                                    Counter({target_keys[0]: 2}))})
@@ -0,0 +1,274 @@
+# 脚本调用示例：
+# backfill_planner.py backfill.txt --concurrency 8                        按8个并发模拟回刷，输出计划
+# backfill_planner.py backfill.txt --sweep 1 32 --cap etl=4 --slowdown 0.03  比较1~32个并发的总耗时，取最短的
+# backfill_planner.py backfill.txt --sweep 1 32 --sql-dir etl_sql/ -o backfill.sql --run-date 20241001
+#
+# 历史分区回刷：每张表每个分区一个 INSERT OVERWRITE 任务，在本地按依赖关系、并发窗口和资源组上限模拟调度，
+# 提交之前先确定用多少并发总耗时最短
+#
+# 任务文件每行（空白分隔，后三列可省略，中间省略的列写 -）：
+#   表名  第一个分区  最后一个分区  依赖的表(逗号分隔)  单分区耗时(秒)  资源组
+#   dw.dwd_bike_order      $$today{-30d}  $$yesterday  -                  600  etl
+#   dw.dws_bike_order_day  $$today{-30d}  $$yesterday  dw.dwd_bike_order  300  etl
+#   dw.dws_bike_order_acc  p20240901      p20240930    dw.dws_bike_order_day,dw.dws_bike_order_acc
+# - 分区可以是 p20240101 / 20240101 / 日期宏（见 date_macro.py）
+# - 依赖同一次回刷中的另一张表时，等待那张表的同一分区完成；不在本次回刷中的表视为数据已就绪
+# - 依赖自己表示累计表，每个分区等待前一天的分区完成
+#
+# 模拟：依赖满足的任务按“到所有任务结束的最长剩余耗时”从大到小优先启动，同时运行的任务不超过并发数，
+# 同一资源组不超过--cap；--slowdown 模拟集群争用，任务启动时每多一个正在运行的任务，耗时增加该比例；
+# --jitter 让每个任务的耗时随机浮动，同一个--seed下不同并发数使用同一组耗时，结果可比
+#
+# --sql-dir 目录下每张表一个 <表名>.sql，按调度习惯写（分区为 $$yesterday），
+# 回刷分区D时以D的后一天为运行日期展开日期宏，-o 按计划的开始时间顺序输出所有语句
+
+import argparse
+import datetime
+import heapq
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'sql generators'))
+from date_macro import get_expander, parse_run_date
+
+DEFAULT_DURATION = 600
+DEFAULT_CONCURRENCY = 8
+DEFAULT_GROUP = 'default'
+
+
+class BackfillJob:
+    """一个分区的回刷任务"""
+
+    def __init__(self, table_name, date, duration, group):
+        self.table_name = table_name
+        self.date = date
+        self.duration = duration
+        self.group = group
+        self.depends = []
+        self.dependents = []
+        # 从该任务开始到所有后续任务结束的最长耗时（不含争用），用作调度优先级
+        self.priority = 0.0
+
+
+def read_specs(lines, run_date=None, default_duration=DEFAULT_DURATION):
+    """读取任务文件，返回[(表名, [日期, ...], [依赖的表, ...], 单分区耗时, 资源组), ...]"""
+    expander = get_expander(run_date)
+    specs = []
+    for number, line in enumerate(lines, 1):
+        stripped = line.split('#')[0].strip()
+        if not stripped:
+            continue
+        parts = stripped.split()
+        if len(parts) < 3:
+            raise ValueError('第%d行格式有误: %s' % (number, line.rstrip()))
+        parts += ['-'] * (6 - len(parts))
+        table_name, start, end, depends, duration, group = parts[:6]
+        specs.append((table_name,
+                      expander.date_range(start, end),
+                      [] if depends == '-' else [name for name in depends.split(',') if name],
+                      default_duration if duration == '-' else float(duration),
+                      DEFAULT_GROUP if group == '-' else group))
+    return specs
+
+
+def build_jobs(specs, jitter=0.0, seed=None):
+    """
+    展开为每个分区一个任务并连接依赖，返回按拓扑顺序排列的任务列表
+    依赖成环时抛出ValueError
+    """
+    rng = random.Random(seed)
+    jobs = []
+    by_key = {}
+    for table_name, dates, _, duration, group in specs:
+        for date in dates:
+            key = (table_name, date.toordinal())
+            if key in by_key:
+                continue
+            factor = 1 + rng.uniform(-jitter, jitter) if jitter else 1
+            job = by_key[key] = BackfillJob(table_name, date, duration * factor, group)
+            jobs.append(job)
+    for table_name, dates, depends, _, _ in specs:
+        for date in dates:
+            job = by_key[(table_name, date.toordinal())]
+            for depend_name in depends:
+                ordinal = date.toordinal() - 1 if depend_name == table_name else date.toordinal()
+                upstream = by_key.get((depend_name, ordinal))
+                if upstream is not None and upstream not in job.depends:
+                    job.depends.append(upstream)
+                    upstream.dependents.append(job)
+    ordered = topological_order(jobs)
+    for job in reversed(ordered):
+        job.priority = job.duration + max((d.priority for d in job.dependents), default=0.0)
+    return ordered
+
+
+def topological_order(jobs):
+    remaining = {id(job): len(job.depends) for job in jobs}
+    ordered = [job for job in jobs if not job.depends]
+    for job in ordered:
+        for dependent in job.dependents:
+            remaining[id(dependent)] -= 1
+            if remaining[id(dependent)] == 0:
+                ordered.append(dependent)
+    if len(ordered) != len(jobs):
+        cycle = sorted({job.table_name for job in jobs if remaining[id(job)]})
+        raise ValueError('依赖成环: %s' % ', '.join(cycle))
+    return ordered
+
+
+def simulate(jobs, concurrency, caps=None, slowdown=0.0):
+    """
+    事件驱动模拟一次回刷，返回(总耗时, [(开始, 结束, 并发槽位, 任务), ...] 按开始时间排列)
+    每个资源组一个就绪堆，启动任务时在未达上限的资源组中取优先级最高的
+    """
+    caps = caps or {}
+    index = {id(job): i for i, job in enumerate(jobs)}
+    waiting = [len(job.depends) for job in jobs]
+    ready = {}
+    group_running = {}
+    for i, job in enumerate(jobs):
+        if not job.depends:
+            heapq.heappush(ready.setdefault(job.group, []), (-job.priority, job.date, i))
+    running = []
+    free_slots = list(range(1, concurrency + 1))
+    schedule = []
+    now = 0.0
+    while True:
+        while len(running) < concurrency:
+            best = None
+            for group, heap in ready.items():
+                if heap and group_running.get(group, 0) < caps.get(group, concurrency) \
+                        and (best is None or heap[0] < ready[best][0]):
+                    best = group
+            if best is None:
+                break
+            i = heapq.heappop(ready[best])[2]
+            job = jobs[i]
+            finish = now + job.duration * (1 + slowdown * len(running))
+            slot = heapq.heappop(free_slots)
+            heapq.heappush(running, (finish, i, slot))
+            group_running[best] = group_running.get(best, 0) + 1
+            schedule.append((now, finish, slot, job))
+        if not running:
+            break
+        now, i, slot = heapq.heappop(running)
+        heapq.heappush(free_slots, slot)
+        group_running[jobs[i].group] -= 1
+        for dependent in jobs[i].dependents:
+            j = index[id(dependent)]
+            waiting[j] -= 1
+            if waiting[j] == 0:
+                heapq.heappush(ready.setdefault(dependent.group, []), (-dependent.priority, dependent.date, j))
+    if len(schedule) != len(jobs):
+        raise ValueError('有%d个任务无法启动，检查--cap是否为0' % (len(jobs) - len(schedule)))
+    return now, schedule
+
+
+def sweep_concurrency(jobs, low, high, caps=None, slowdown=0.0):
+    """模拟low~high每个并发数，返回([(并发数, 总耗时), ...], 总耗时最短的并发数)，耗时相同时取较小的并发数"""
+    results = [(concurrency, simulate(jobs, concurrency, caps, slowdown)[0]) for concurrency in range(low, high + 1)]
+    best = min(results, key=lambda result: (round(result[1], 6), result[0]))[0]
+    return results, best
+
+
+def format_seconds(seconds):
+    minutes, seconds = divmod(int(round(seconds)), 60)
+    hours, minutes = divmod(minutes, 60)
+    return '%d:%02d:%02d' % (hours, minutes, seconds)
+
+
+def parse_caps(values):
+    """etl=4 -> {'etl': 4}"""
+    caps = {}
+    for value in values or []:
+        group, _, cap = value.partition('=')
+        caps[group] = int(cap)
+    return caps
+
+
+def load_templates(sql_dir, table_names):
+    """读取每张表的ETL模板，返回({表名: 模板}, 缺少模板的表)"""
+    templates = {}
+    missing = []
+    for table_name in sorted(table_names):
+        path = os.path.join(sql_dir, table_name + '.sql')
+        if not os.path.exists(path):
+            missing.append(table_name)
+            continue
+        with open(path, encoding='utf-8') as f:
+            templates[table_name] = f.read().strip().rstrip(';')
+    return templates, missing
+
+
+def gen_backfill_script(schedule, templates):
+    """按计划的开始时间输出语句，分区D按运行日期D+1展开日期宏"""
+    lines = []
+    for start, finish, slot, job in schedule:
+        run_date = job.date + datetime.timedelta(days=1)
+        lines.append('-- 槽位%d %s~%s %s %s' % (slot, format_seconds(start), format_seconds(finish), job.table_name,
+                                              job.date.strftime('%Y-%m-%d')))
+        lines.append(get_expander(run_date).expand(templates[job.table_name]) + ';')
+    return lines
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='规划并模拟历史分区回刷')
+    parser.add_argument('spec', help='回刷任务文件，-表示标准输入')
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY, help='同时运行的任务数')
+    parser.add_argument('--sweep', nargs=2, type=int, metavar=('LOW', 'HIGH'), help='比较该范围内的并发数，取总耗时最短的')
+    parser.add_argument('--cap', action='append', help='资源组并发上限，如 etl=4，可重复')
+    parser.add_argument('--default-duration', type=float, default=DEFAULT_DURATION, help='未写耗时的表每个分区的耗时（秒）')
+    parser.add_argument('--slowdown', type=float, default=0.0, help='每多一个正在运行的任务，新任务耗时增加的比例')
+    parser.add_argument('--jitter', type=float, default=0.0, help='任务耗时随机浮动的比例，如0.2')
+    parser.add_argument('--seed', type=int, default=0, help='耗时随机浮动的种子')
+    parser.add_argument('--run-date', help='展开任务文件中日期宏使用的运行日期，缺省为今天')
+    parser.add_argument('--sql-dir', help='ETL模板目录，每张表一个<表名>.sql')
+    parser.add_argument('-o', '--output', help='按计划顺序输出回刷语句的文件，需要--sql-dir')
+    parser.add_argument('--show-schedule', action='store_true', help='列出每个任务的计划开始和结束时间')
+    args = parser.parse_args()
+    if args.output and not args.sql_dir:
+        parser.error('-o 需要同时指定 --sql-dir')
+
+    run_date_arg = parse_run_date(args.run_date)
+    if args.spec == '-':
+        backfill_specs = read_specs(sys.stdin, run_date_arg, args.default_duration)
+    else:
+        with open(args.spec, encoding='utf-8') as f:
+            backfill_specs = read_specs(f, run_date_arg, args.default_duration)
+    resource_caps = parse_caps(args.cap)
+    try:
+        backfill_jobs = build_jobs(backfill_specs, args.jitter, args.seed)
+    except ValueError as e:
+        sys.stderr.write('%s\n' % e)
+        sys.exit(1)
+    critical_path = max((job.priority for job in backfill_jobs), default=0.0)
+    print('-- %d张表，%d个任务，串行%s，关键路径%s' % (len({job.table_name for job in backfill_jobs}),
+                                                len(backfill_jobs),
+                                                format_seconds(sum(job.duration for job in backfill_jobs)),
+                                                format_seconds(critical_path)))
+
+    chosen = args.concurrency
+    if args.sweep:
+        sweep_results, chosen = sweep_concurrency(backfill_jobs, args.sweep[0], args.sweep[1], resource_caps,
+                                                  args.slowdown)
+        best_seconds = dict(sweep_results)[chosen]
+        print('\t'.join(['并发数', '总耗时', '相对最优']))
+        for concurrency, seconds in sweep_results:
+            print('%d\t%s\t%+.1f%%%s' % (concurrency, format_seconds(seconds),
+                                         (seconds / best_seconds - 1) * 100 if best_seconds else 0,
+                                         '\t<- 最优' if concurrency == chosen else ''))
+    wall_seconds, backfill_schedule = simulate(backfill_jobs, chosen, resource_caps, args.slowdown)
+    print('-- 并发%d，预计总耗时%s' % (chosen, format_seconds(wall_seconds)))
+    if args.show_schedule:
+        for job_start, job_finish, job_slot, backfill_job in backfill_schedule:
+            print('%d\t%s\t%s\t%s\t%s' % (job_slot, format_seconds(job_start), format_seconds(job_finish),
+                                          backfill_job.table_name, backfill_job.date.strftime('%Y-%m-%d')))
+    if args.output:
+        etl_templates, missing_templates = load_templates(args.sql_dir, {job.table_name for job in backfill_jobs})
+        if missing_templates:
+            sys.stderr.write('缺少ETL模板: %s\n' % ', '.join(missing_templates))
+            sys.exit(1)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(gen_backfill_script(backfill_schedule, etl_templates)) + '\n')
+        sys.stderr.write('已输出%d条语句到%s\n' % (len(backfill_schedule), args.output))
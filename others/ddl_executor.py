@@ -0,0 +1,324 @@
+# 脚本调用示例：
+# ddl_executor.py drop_scripts/ --host doris-fe --port 9030 --user bikedw --database bikedw --journal drop.journal
+# ddl_executor.py drop.sql view.sql --host 127.0.0.1 --concurrency 16 --retries 5
+# ddl_executor.py drop_scripts/ --dry-run --dry-run-failure-rate 0.1 --journal /tmp/test.journal  本地模拟执行
+#
+# 并发执行 gen_drop_partition.py / gen_view.py / retention_planner.py 等生成的脚本，代替在网页控制台逐条粘贴：
+# - 同一张表的语句按脚本中的顺序串行执行，不同表之间并行，总并发数不超过--concurrency
+# - 每个工作线程从连接池取连接，连接出错时丢弃重建
+# - 失败的语句按指数退避重试，语法错误等不可恢复的错误不重试；一条语句最终失败后，同一张表后续的语句不再执行
+# - --journal记录已完成的语句，中断后用同样的参数重新运行会跳过已完成的语句
+# 需要安装pymysql（Doris FE兼容MySQL协议）；--dry-run不连接数据库，按设定的耗时和失败率模拟执行
+
+import argparse
+import hashlib
+import os
+import queue
+import random
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import pymysql
+except ImportError:
+    pymysql = None
+
+DEFAULT_CONCURRENCY = 8
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF_SECONDS = 1.0
+MAX_BACKOFF_SECONDS = 60.0
+SQL_EXTENSIONS = ('.sql', '.hql')
+
+# 语句涉及的表/视图，同一个对象的语句串行执行
+TARGET_PATTERN = re.compile(
+    r'^\s*(?:alter\s+(?:view|table)|drop\s+(?:view|table)(?:\s+if\s+exists)?|'
+    r'create\s+(?:or\s+replace\s+view|(?:external\s+)?(?:view|table|materialized\s+view)(?:\s+if\s+not\s+exists)?)|'
+    r'insert\s+(?:into|overwrite)(?:\s+table)?|truncate\s+table)\s+([`\w.$]+)',
+    re.IGNORECASE)
+# 这些错误重试也不会成功
+PERMANENT_ERROR_PATTERN = re.compile(r'syntax|unknown (?:table|column|database)|does not exist|not exist|denied',
+                                     re.IGNORECASE)
+
+
+def split_statements(text):
+    """按分号切分语句，忽略引号和注释中的分号，去掉只有注释的语句和生成脚本的提示行"""
+    text = '\n'.join(line for line in text.split('\n') if not line.startswith('=========='))
+    statements = []
+    current = []
+    quote = None
+    i = 0
+    while i < len(text):
+        char = text[i]
+        if quote:
+            if char == '\\':
+                current.append(text[i:i + 2])
+                i += 2
+                continue
+            if char == quote:
+                quote = None
+        elif char in '\'"`':
+            quote = char
+        elif text.startswith('--', i):
+            end = text.find('\n', i)
+            i = len(text) if end == -1 else end
+            continue
+        elif char == ';':
+            statements.append(''.join(current).strip())
+            current = []
+            i += 1
+            continue
+        current.append(char)
+        i += 1
+    statements.append(''.join(current).strip())
+    return [statement for statement in statements if statement]
+
+
+def statement_target(statement):
+    match = TARGET_PATTERN.match(statement)
+    return match.group(1).replace('`', '').lower() if match else None
+
+
+def iter_script_files(paths):
+    for path in paths:
+        if os.path.isdir(path):
+            for name in sorted(os.listdir(path)):
+                if name.lower().endswith(SQL_EXTENSIONS):
+                    yield os.path.join(path, name)
+        else:
+            yield path
+
+
+def load_lanes(paths):
+    """
+    读取所有脚本，按目标对象分组，返回(语句总数, [[(语句id, 语句), ...], ...])
+    语句id为语句内容和它在同一内容中出现次数的摘要，脚本重新生成后仍能对上日志
+    """
+    lanes = {}
+    occurrences = {}
+    total = 0
+    for file_path in iter_script_files(paths):
+        with open(file_path, encoding='utf-8') as f:
+            statements = split_statements(f.read())
+        for statement in statements:
+            occurrence = occurrences.get(statement, 0)
+            occurrences[statement] = occurrence + 1
+            statement_id = hashlib.sha1(('%d\n%s' % (occurrence, statement)).encode('utf-8')).hexdigest()
+            target = statement_target(statement)
+            # 识别不出对象的语句单独一组
+            key = target if target else '#%d' % total
+            lanes.setdefault(key, []).append((statement_id, statement))
+            total += 1
+    return total, list(lanes.values())
+
+
+class Journal:
+    """追加写的进度日志：每行 状态<TAB>语句id<TAB>时间<TAB>错误信息"""
+
+    def __init__(self, path):
+        self.path = path
+        self.done = set()
+        self.lock = threading.Lock()
+        self.file = None
+        if path:
+            if os.path.exists(path):
+                with open(path, encoding='utf-8') as f:
+                    for line in f:
+                        parts = line.rstrip('\n').split('\t')
+                        if len(parts) >= 2 and parts[0] == 'done':
+                            self.done.add(parts[1])
+            self.file = open(path, 'a', encoding='utf-8')
+
+    def record(self, status, statement_id, note=''):
+        if not self.file:
+            return
+        with self.lock:
+            self.file.write('%s\t%s\t%s\t%s\n' % (status, statement_id, time.strftime('%Y-%m-%d %H:%M:%S'),
+                                                 note.replace('\n', ' ')))
+            self.file.flush()
+            os.fsync(self.file.fileno())
+
+    def close(self):
+        if self.file:
+            self.file.close()
+
+
+class DryRunConnection:
+    """本地模拟连接，用于在不连数据库的情况下验证并发、重试和日志"""
+
+    def __init__(self, latency, failure_rate):
+        self.latency = latency
+        self.failure_rate = failure_rate
+
+    def execute(self, statement):
+        time.sleep(self.latency)
+        if random.random() < self.failure_rate:
+            raise RuntimeError('模拟执行失败（锁等待超时）')
+
+    def close(self):
+        pass
+
+
+class MySQLConnection:
+    def __init__(self, host, port, user, password, database):
+        if pymysql is None:
+            raise RuntimeError('需要先安装pymysql：pip install pymysql')
+        self.connection = pymysql.connect(host=host, port=port, user=user, password=password,
+                                          database=database, autocommit=True, charset='utf8mb4')
+
+    def execute(self, statement):
+        with self.connection.cursor() as cursor:
+            cursor.execute(statement)
+
+    def close(self):
+        try:
+            self.connection.close()
+        except Exception:
+            pass
+
+
+class ConnectionPool:
+    """最多size个连接，按需创建；出错的连接由调用方discard后重建"""
+
+    def __init__(self, factory, size):
+        self.factory = factory
+        self.idle = queue.LifoQueue()
+        self.slots = threading.BoundedSemaphore(size)
+
+    def acquire(self):
+        self.slots.acquire()
+        try:
+            return self.idle.get_nowait()
+        except queue.Empty:
+            pass
+        try:
+            return self.factory()
+        except Exception:
+            self.slots.release()
+            raise
+
+    def release(self, connection):
+        self.idle.put(connection)
+        self.slots.release()
+
+    def discard(self, connection):
+        connection.close()
+        self.slots.release()
+
+    def close(self):
+        while not self.idle.empty():
+            self.idle.get_nowait().close()
+
+
+def is_permanent_error(error):
+    if pymysql is not None and isinstance(error, pymysql.err.ProgrammingError):
+        return True
+    return bool(PERMANENT_ERROR_PATTERN.search(str(error)))
+
+
+def execute_with_retry(pool, statement, retries, backoff):
+    """执行一条语句，返回None或最后一次的错误信息"""
+    for attempt in range(retries + 1):
+        try:
+            connection = pool.acquire()
+        except Exception as e:
+            error = e
+        else:
+            try:
+                connection.execute(statement)
+                pool.release(connection)
+                return None
+            except Exception as e:
+                error = e
+                pool.discard(connection)
+        if is_permanent_error(error) or attempt == retries:
+            return str(error)
+        # 指数退避加随机抖动，避免同时失败的语句同时重试
+        time.sleep(min(MAX_BACKOFF_SECONDS, backoff * 2 ** attempt) * (0.5 + random.random() / 2))
+    return None
+
+
+class Progress:
+    def __init__(self, total, skipped):
+        self.total = total
+        self.counts = {'done': skipped, 'failed': 0, 'blocked': 0}
+        self.lock = threading.Lock()
+        self.last_report = 0
+
+    def add(self, status):
+        with self.lock:
+            self.counts[status] += 1
+            now = time.time()
+            if now - self.last_report >= 1 or sum(self.counts.values()) == self.total:
+                self.last_report = now
+                sys.stderr.write('\r完成%(done)d 失败%(failed)d 未执行%(blocked)d' % self.counts
+                                 + ' / 共%d条' % self.total)
+                sys.stderr.flush()
+
+
+def run_lane(lane, pool, journal, progress, retries, backoff):
+    """同一对象的语句串行执行，失败后剩余语句不再执行"""
+    for i, (statement_id, statement) in enumerate(lane):
+        if statement_id in journal.done:
+            continue
+        error = execute_with_retry(pool, statement, retries, backoff)
+        if error is None:
+            journal.record('done', statement_id)
+            progress.add('done')
+            continue
+        journal.record('failed', statement_id, error)
+        progress.add('failed')
+        blocked = [s for s in lane[i + 1:] if s[0] not in journal.done]
+        for _ in blocked:
+            progress.add('blocked')
+        return statement, error, len(blocked)
+    return None
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='并发执行生成的DDL脚本')
+    parser.add_argument('inputs', nargs='+', help='SQL脚本文件或目录')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=9030)
+    parser.add_argument('--user', default='root')
+    parser.add_argument('--password', default=os.environ.get('MYSQL_PWD', ''), help='默认取环境变量MYSQL_PWD')
+    parser.add_argument('--database')
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY, help='最大并发数（连接数）')
+    parser.add_argument('--retries', type=int, default=DEFAULT_RETRIES, help='每条语句最多重试次数')
+    parser.add_argument('--backoff', type=float, default=DEFAULT_BACKOFF_SECONDS, help='第一次重试前等待的秒数')
+    parser.add_argument('--journal', help='进度日志文件，重新运行时跳过已完成的语句')
+    parser.add_argument('--dry-run', action='store_true', help='不连接数据库，模拟执行')
+    parser.add_argument('--dry-run-latency', type=float, default=0.05, help='模拟每条语句的耗时（秒）')
+    parser.add_argument('--dry-run-failure-rate', type=float, default=0.0, help='模拟执行失败的概率')
+    args = parser.parse_args()
+
+    if not args.dry_run and pymysql is None:
+        sys.stderr.write('需要先安装pymysql：pip install pymysql\n')
+        sys.exit(1)
+    total, lanes = load_lanes(args.inputs)
+    journal = Journal(args.journal)
+    already_done = sum(1 for lane in lanes for statement_id, _ in lane if statement_id in journal.done)
+    if args.dry_run:
+        pool = ConnectionPool(lambda: DryRunConnection(args.dry_run_latency, args.dry_run_failure_rate),
+                              args.concurrency)
+    else:
+        pool = ConnectionPool(lambda: MySQLConnection(args.host, args.port, args.user, args.password,
+                                                      args.database), args.concurrency)
+    sys.stderr.write('%d条语句，%d个对象，日志中已完成%d条\n' % (total, len(lanes), already_done))
+    progress = Progress(total, already_done)
+    started = time.time()
+    # 语句多的对象先开始，减少最后只剩一张大表在串行执行的时间
+    lanes.sort(key=len, reverse=True)
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        futures = [executor.submit(run_lane, lane, pool, journal, progress, args.retries, args.backoff)
+                   for lane in lanes]
+        failures = [future.result() for future in futures]
+    pool.close()
+    journal.close()
+    sys.stderr.write('\n耗时%.1f秒\n' % (time.time() - started))
+    failures = [failure for failure in failures if failure]
+    for statement, error, blocked_count in failures:
+        print('失败: %s\n  %s\n  同一对象后续%d条语句未执行' % (statement.split('\n')[0][:120], error, blocked_count))
+    sys.exit(1 if failures else 0)
@@ -1,46 +1,223 @@
 #!/usr/bin/env python
+# 脚本调用示例：
+# cat orders.tsv | python fix_json.py > fixed.tsv                  逐行处理（Hive TRANSFORM 也按这种方式调用）
+# cat orders.tsv | python fix_json.py --workers 8 > fixed.tsv      多进程处理大文件，输出顺序与输入相同
+#
+# cat orders.tsv | python fix_json.py --rules fix_json_rules.txt    按规则文件提升多组字段
+#
+# 输入每行：order_id<TAB>json，把 meta_data_info.meta_data_keyword 中的字段提升到 job_data_info.meta_data_keyword
+# 规则文件每行：来源路径 目标路径 策略 字段（逗号或空白分隔，* 单独写在规则行上表示来源中的所有字段），以空白开头的行续写字段，
+# 策略 overwrite 用来源的非空值覆盖，fill-empty 只填充目标中缺少或为空的字段；所有规则启动时编译一次，每行一次遍历
+# 没有字段需要提升、或目标中已经是相同值的行原样输出（不改变键顺序和转义），只有真正更新的行才重新序列化
+# 多进程模式按--chunk-size字节读取标准输入，在行边界切块后交给进程池处理，
+# 同时在处理中的块不超过 进程数*2，按提交顺序写回，内存占用与输入大小无关
 
+import argparse
 import sys
 import json
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 
+DEFAULT_CHUNK_SIZE = 4 * 1024 * 1024
 
-def replace_json_value(order_json):
-    key_list = [
-        "streetFenceName", "encourageAutonomy", "feedbackReasonOrigin", "channel",
-        "businessId", "ruleRequirementConfig", "curRejectReason", "source",
-        "gridFenceId", "workFenceId", "feedbackReasonRecord", "placeCategory",
-        "streetFenceId", "gridFenceName", "healthyStatus", "creatorSymbol",
-        "workFenceName", "initialSource", "newInterface", "relateOrderRequirementTypeDesc",
-        "orderGroupRegionId", "relateOrderRequirementType", "pageCode", "isCommonCreate",
-        "isMoleculeOrder", "jobId", "ogComplaint", "jobDetailId", "identifyBikeState",
-        "circleOrder", "orderGroupContainRegionIds", "dispatchOrderSource", "t0Created",
-        "orderServiceOnline", "strategyScene", "recommendNumber"
-    ]
+OVERWRITE = 'overwrite'
+FILL_EMPTY = 'fill-empty'
 
+# 未指定--rules时使用的内置规则
+KEY_LIST = [
+    "streetFenceName", "encourageAutonomy", "feedbackReasonOrigin", "channel",
+    "businessId", "ruleRequirementConfig", "curRejectReason", "source",
+    "gridFenceId", "workFenceId", "feedbackReasonRecord", "placeCategory",
+    "streetFenceId", "gridFenceName", "healthyStatus", "creatorSymbol",
+    "workFenceName", "initialSource", "newInterface", "relateOrderRequirementTypeDesc",
+    "orderGroupRegionId", "relateOrderRequirementType", "pageCode", "isCommonCreate",
+    "isMoleculeOrder", "jobId", "ogComplaint", "jobDetailId", "identifyBikeState",
+    "circleOrder", "orderGroupContainRegionIds", "dispatchOrderSource", "t0Created",
+    "orderServiceOnline", "strategyScene", "recommendNumber"
+]
+DEFAULT_RULES = [("meta_data_info.meta_data_keyword", "job_data_info.meta_data_keyword", OVERWRITE, KEY_LIST)]
+
+
+def read_rules(lines):
+    """
+    读取规则文件，返回[(来源路径, 目标路径, 策略, 字段列表或None), ...]，None表示来源中的所有字段
+    以空白开头的行是上一条规则字段列表的续行；*只能单独写在规则行上
+    """
+    rules = []
+    numbers = []
+    for number, line in enumerate(lines, 1):
+        stripped = line.split('#')[0].strip()
+        if not stripped:
+            continue
+        if line[0] in ' \t':
+            if not rules or rules[-1][3] is None:
+                raise ValueError('规则第%d行续行前没有字段列表: %s' % (number, stripped))
+            keys = stripped.replace(',', ' ').split()
+            if '*' in keys:
+                raise ValueError('规则第%d行续行中不能使用*: %s' % (number, stripped))
+            rules[-1][3].extend(keys)
+            continue
+        parts = stripped.split(None, 3)
+        if len(parts) < 3:
+            raise ValueError('规则第%d行格式有误: %s' % (number, stripped))
+        source, target, policy = parts[:3]
+        if policy not in (OVERWRITE, FILL_EMPTY):
+            raise ValueError('规则第%d行策略应为%s或%s: %s' % (number, OVERWRITE, FILL_EMPTY, policy))
+        keys = parts[3].replace(',', ' ').split() if len(parts) > 3 else []
+        if '*' in keys and keys != ['*']:
+            raise ValueError('规则第%d行*不能和其他字段混用: %s' % (number, stripped))
+        rules.append((source, target, policy, None if keys == ['*'] else keys))
+        numbers.append(number)
+    for number, (_, _, _, keys) in zip(numbers, rules):
+        if keys == []:
+            raise ValueError('规则第%d行没有字段列表，所有字段请写*' % number)
+    return rules
+
+
+class CompiledRules:
+    """
+    按来源路径分组的规则，路径拆成元组、字段列表去重转为元组，启动时编译一次
+    groups: [(来源路径, [(目标路径, 是否覆盖, 字段元组或None), ...]), ...]，同一来源每行只查找一次
+    """
+
+    def __init__(self, rules):
+        groups = {}
+        for source, target, policy, keys in rules:
+            groups.setdefault(tuple(source.split('.')), []).append(
+                (tuple(target.split('.')), policy == OVERWRITE, None if keys is None else tuple(dict.fromkeys(keys))))
+        self.groups = list(groups.items())
+
+
+def lookup_path(json_map, path):
+    """按路径取对象，路径上缺少或不是对象时返回None"""
+    node = json_map
+    for key in path:
+        if not isinstance(node, dict):
+            return None
+        node = node.get(key)
+    return node if isinstance(node, dict) else None
+
+
+def same_value(a, b):
+    if type(a) is not type(b):
+        return False
+    if isinstance(a, (dict, list)):
+        return json.dumps(a) == json.dumps(b)
+    return a == b
+
+
+def plan_updates(json_map, compiled):
+    """
+    所有规则一次遍历，返回{目标路径: {字段: 值}}，只包含会改变内容的字段
+    overwrite：来源非空时写入；fill-empty：来源非空且目标缺少或为空时写入；多条规则写同一字段时按规则顺序
+    """
+    updates = {}
+    for source_path, targets in compiled.groups:
+        source = lookup_path(json_map, source_path)
+        if not source:
+            continue
+        for target_path, overwrite, keys in targets:
+            pending = updates.get(target_path, {})
+            target = lookup_path(json_map, target_path) or {}
+            for key in source if keys is None else keys:
+                value = source.get(key)
+                if not value:
+                    continue
+                current = pending[key] if key in pending else target.get(key)
+                if key in pending or key in target:
+                    if same_value(current, value) or not overwrite and current:
+                        continue
+                pending[key] = value
+            if pending:
+                updates[target_path] = pending
+    return updates
+
+
+def apply_updates(json_map, updates):
+    for target_path, pending in updates.items():
+        node = json_map
+        for key in target_path:
+            node = node.setdefault(key, {})
+            if not isinstance(node, dict):
+                raise ValueError('%s 不是对象' % '.'.join(target_path))
+        node.update(pending)
+
+
+def replace_json_value(order_json, compiled=None):
     json_map = json.loads(order_json)
-    replace_map = {}
-
-    if ("meta_data_info" in json_map and
-            "meta_data_keyword" in json_map["meta_data_info"]):
-        second_map = json_map["meta_data_info"]["meta_data_keyword"]
-        for key in key_list:
-            if key in second_map and second_map[key]:
-                replace_map[key] = second_map[key]
-
-    if replace_map:
-        if "job_data_info" not in json_map:
-            json_map["job_data_info"] = {}
-        if "meta_data_keyword" not in json_map["job_data_info"]:
-            json_map["job_data_info"]["meta_data_keyword"] = {}
-        json_map["job_data_info"]["meta_data_keyword"].update(replace_map)
+    updates = plan_updates(json_map, compiled or COMPILED_DEFAULT_RULES) if isinstance(json_map, dict) else None
+
+    # 大部分行没有需要提升的字段或目标中已经是相同的值，原样返回，不重新序列化（不改变键顺序和转义）
+    if not updates:
+        return order_json
 
+    apply_updates(json_map, updates)
     return json.dumps(json_map, ensure_ascii=False)
 
 
-for line in sys.stdin:
+COMPILED_DEFAULT_RULES = CompiledRules(DEFAULT_RULES)
+
+
+def fix_line(line, compiled=None):
     order_id = line.strip().split("\t")[0]
     order_json = line.strip().split("\t")[1]
-    updated_json = replace_json_value(order_json)
-    print(order_id + "\t" + updated_json)
+    return order_id + "\t" + replace_json_value(order_json, compiled)
+
+
+def fix_chunk(chunk, compiled=None):
+    """处理若干完整的行（bytes），返回处理后的bytes"""
+    lines = chunk.decode('utf-8').split('\n')
+    if not lines[-1]:
+        lines.pop()
+    return ''.join(fix_line(line, compiled) + '\n' for line in lines).encode('utf-8')
+
+
+def iter_chunks(stream, chunk_size=DEFAULT_CHUNK_SIZE):
+    """按字节读取，每块在最后一个换行符处截断，剩余部分并入下一块"""
+    remainder = b''
+    while True:
+        data = stream.read(chunk_size)
+        if not data:
+            break
+        data = remainder + data
+        end = data.rfind(b'\n') + 1
+        if end == 0:
+            remainder = data
+            continue
+        remainder = data[end:]
+        yield data[:end]
+    if remainder:
+        yield remainder
+
+
+def run_parallel(stream, out, workers, chunk_size=DEFAULT_CHUNK_SIZE, compiled=None):
+    """多进程处理，最多workers*2个块在处理中，按输入顺序输出"""
+    pending = deque()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for chunk in iter_chunks(stream, chunk_size):
+            if len(pending) >= workers * 2:
+                out.write(pending.popleft().result())
+            pending.append(executor.submit(fix_chunk, chunk, compiled))
+        while pending:
+            out.write(pending.popleft().result())
+    out.flush()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='把meta_data_keyword中的字段提升到job_data_info')
+    parser.add_argument('--rules', help='字段提升规则文件，缺省使用内置规则（见 fix_json_rules.txt）')
+    parser.add_argument('--workers', type=int, default=1, help='进程数，大于1时按块并行处理')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help='多进程模式每块的字节数')
+    args = parser.parse_args()
+
+    compiled_rules = COMPILED_DEFAULT_RULES
+    if args.rules:
+        with open(args.rules, encoding='utf-8') as f:
+            compiled_rules = CompiledRules(read_rules(f))
+    if args.workers > 1:
+        run_parallel(sys.stdin.buffer, sys.stdout.buffer, args.workers, args.chunk_size, compiled_rules)
+    else:
+        for line in sys.stdin:
+            print(fix_line(line, compiled_rules))
 
 # 455355013	{"meta_data_info":{"meta_data_keyword":{"gridFenceName":"和平B1","workFenceId":"56752068","streetFenceName":"南市街道","streetFenceId":"37752197","gridFenceId":"129783897","newInterface":"true","relateOrderRequirementTypeDesc":"特殊保障&日常要求","encourageAutonomy":"13","orderGroupRegionId":"022","channel":"find_bike","businessId":"2024092415291335630765_1_t0_independent_work","ruleRequirementConfig":"any","source":"findbike_launchApply_add_point","relateOrderRequirementType":"regularRequirement","isCommonCreate":"true","isMoleculeOrder":"true","jobId":"126328802","ogComplaint":"false","placeCategory":"system_recommendation","jobDetailId":"258879997","identifyBikeState":"3","circleOrder":"false","healthyStatus":"[\"1\",\"4\"]","orderGroupContainRegionIds":"[\"022\"]","creatorSymbol":"system_recommend_to_t0","workFenceName":"经营-商圈-印保利广场右下角-B1南市街-晚高峰","dispatchOrderSource":"findbike_launchApply_add_point","initialSource":"t0_independent_work"},"meta_data":{"newInterface":"true","encourageAutonomy":"13","businessId":"2024092415291335630765_1_t0_independent_work","channel":"find_bike","source":"findbike_launchApply_add_point","relateOrderRequirementType":"regularRequirement","isMoleculeOrder":"true","ogComplaint":"false","identifyBikeState":"3","circleOrder":"false","healthyStatus":"[\"1\",\"4\"]","creatorSymbol":"system_recommend_to_t0","dispatchOrderSource":"findbike_launchApply_add_point"}},"job_data_info":{"meta_data_keyword":{"newInterface":"true","relateOrderRequirementTypeDesc":"特殊保障&日常要求","encourageAutonomy":"13","orderGroupRegionId":"022","channel":"find_bike","businessId":"2024092415291335630765_1_t0_independent_work","ruleRequirementConfig":"any","source":"findbike_launchApply_add_point","relateOrderRequirementType":"regularRequirement","isCommonCreate":"true","isMoleculeOrder":"true","jobId":"126328802","workFenceId":"56752068","ogComplaint":"false","placeCategory":"system_recommendation","jobDetailId":"258879997","identifyBikeState":"3","circleOrder":"false","healthyStatus":"[\"1\",\"4\"]","orderGroupContainRegionIds":"[\"022\"]","creatorSymbol":"system_recommend_to_t0","workFenceName":"经营-商圈-印保利广场右下角-B1南市街-晚高峰","dispatchOrderSource":"findbike_launchApply_add_point","initialSource":"t0_independent_work","roadScopeFenceName":"","streetFenceName":"南市街道","streetFenceId":"37752197","gridFenceName":"和平B1","roadScopeFenceId":"","gridFenceId":"129783897","feedbackReasonOrigin":"[{\"reasons\":[{\"topic\":{\"code\":\"T100\",\"type\":\"TOPIC\",\"choices\":[{\"code\":\"106\",\"type\":\"CHOICE\",\"value\":\"交通拥堵无法到达\"}]},\"photos\":{},\"text\":{}}]}]","curRejectReason":"交通拥堵无法到达","feedbackReasonRecord":"[{\"reason\":[{\"code\":\"106\",\"value\":\"交通拥堵无法到达\"}],\"photo\":[]}]","pageCode":"UNLOAD#REFUSE_ORDER"},"meta_data":{"newInterface":"true","encourageAutonomy":"13","businessId":"2024092415291335630765_1_t0_independent_work","channel":"find_bike","source":"findbike_launchApply_add_point","relateOrderRequirementType":"regularRequirement","isMoleculeOrder":"true","ogComplaint":"false","identifyBikeState":"3","circleOrder":"false","healthyStatus":"[\"1\",\"4\"]","creatorSymbol":"system_recommend_to_t0","dispatchOrderSource":"findbike_launchApply_add_point","feedbackReasonOrigin":"[{\"reasons\":[{\"topic\":{\"code\":\"T100\",\"type\":\"TOPIC\",\"choices\":[{\"code\":\"106\",\"type\":\"CHOICE\",\"value\":\"交通拥堵无法到达\"}]},\"photos\":{},\"text\":{}}]}]","curRejectReason":"交通拥堵无法到达","pageCode":"UNLOAD#REFUSE_ORDER","workFenceId":"56752068","feedbackReasonRecord":"[{\"reason\":[{\"code\":\"106\",\"value\":\"交通拥堵无法到达\"}],\"photo\":[]}]","workFenceName":"经营-商圈-印保利广场右下角-B1南市街-晚高峰"}}}
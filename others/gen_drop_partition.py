@@ -1,26 +1,168 @@
 # 脚本调用示例：
 # gen_drop_partition.py topic_bike_repair_dispatch_detail_inc p20210721 p20210910
 # -参数1：表名 -参数2：要删除的第一个分区 -参数3：要删除的最后一个分区
+#
+# 批量模式：多张表、多个日期范围，相邻分区合并到一条语句中
+# gen_drop_partition.py --jobs drop_jobs.txt
+# gen_drop_partition.py --jobs drop_jobs.txt --dialect hive --max-per-statement 100
+# -任务文件每行：表名 第一个分区 最后一个分区（空白分隔），同一张表可以有多行
+# -分区也可以写成日期宏（见 date_macro.py），如：bike_order_inc $$today{-400d} $$today{-366d}，配合--run-date使用
+# -输出按表轮流排列，相邻语句不落在同一张表上，减少同一张表元数据锁的排队
+#
+# 按分区清单过滤：只删除真实存在的分区，并提示范围内日序列的缺口（格式见 partition_inventory.py）
+# gen_drop_partition.py topic_bike_repair_dispatch_detail_inc p20210721 p20210910 --inventory show_partitions/
+# gen_drop_partition.py --jobs drop_jobs.txt --inventory show_partitions.txt
+#
+# 报告模式：不输出语句，按分区统计文件汇总每张表、每月能释放的存储（见 reclaim_report.py）
+# gen_drop_partition.py --jobs drop_jobs.txt --inventory show_partitions/ --report partition_stats.tsv
 
+import argparse
+import os
 import sys
 import datetime
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'sql generators'))
+from date_macro import get_expander, parse_run_date
+from partition_inventory import format_runs, load_inventory
+from reclaim_report import write_report
+
+DEFAULT_MAX_PER_STATEMENT = 50
+DEFAULT_HIVE_PARTITION_COLUMN = 'pt_dt'
+DEFAULT_HIVE_DATE_FORMAT = '%Y-%m-%d'
+
 
 def get_output_str(table_name1, date):
     return 'alter table `%s` drop partition `p%s`;' % (table_name1, date.strftime('%Y%m%d'))
 
 
-if __name__ == '__main__':
-    args = sys.argv[1:]
+def read_jobs(lines, run_date=None):
+    """
+    读取任务文件，返回{表名: 排好序的日期列表}，同一张表的多个范围合并去重
+    分区可以是 p20210721 / 20210721 或日期宏，日期宏按run_date展开
+    """
+    expander = get_expander(run_date)
+    jobs = {}
+    for line in lines:
+        stripped = line.strip()
+        if not stripped or stripped.startswith('#'):
+            continue
+        table_name, start, end = stripped.split()[:3]
+        jobs.setdefault(table_name, set()).update(expander.date_range(start, end))
+    return {table_name: sorted(dates) for table_name, dates in jobs.items()}
+
+
+def gen_doris_drop(table_name, dates):
+    return 'alter table `%s` %s;' % (table_name, ', '.join(
+        'drop partition `p%s`' % date.strftime('%Y%m%d') for date in dates))
+
+
+def gen_hive_drop(table_name, dates, partition_column, date_format):
+    return 'alter table %s drop if exists %s;' % (table_name, ', '.join(
+        'partition (%s=\'%s\')' % (partition_column, date.strftime(date_format)) for date in dates))
+
+
+def chunk_dates(dates, max_per_statement):
+    return [dates[i:i + max_per_statement] for i in range(0, len(dates), max_per_statement)]
+
+
+def gen_batch_statements(jobs, dialect='doris', max_per_statement=DEFAULT_MAX_PER_STATEMENT,
+                         partition_column=DEFAULT_HIVE_PARTITION_COLUMN, date_format=DEFAULT_HIVE_DATE_FORMAT):
+    """
+    每张表的分区按max_per_statement切成多条语句，再按表轮流输出：
+    第1轮每张表各一条，第2轮每张表各一条……
+    """
+    per_table = []
+    for table_name in sorted(jobs):
+        statements = []
+        for dates in chunk_dates(jobs[table_name], max_per_statement):
+            if dialect == 'hive':
+                statements.append(gen_hive_drop(table_name, dates, partition_column, date_format))
+            else:
+                statements.append(gen_doris_drop(table_name, dates))
+        per_table.append(statements)
+    output = []
+    for round_index in range(max([len(statements) for statements in per_table] + [0])):
+        for statements in per_table:
+            if round_index < len(statements):
+                output.append(statements[round_index])
+    return output
+
+
+def filter_existing(jobs, inventory):
+    """
+    只保留清单中存在的分区，返回(过滤后的任务, {表名: 范围内缺失的日期区间})
+    清单中没有的表整张跳过
+    """
+    filtered = {}
+    missing = {}
+    for table_name, dates in jobs.items():
+        ordinals = [date.toordinal() for date in dates]
+        existing = [date for date, ordinal in zip(dates, ordinals) if inventory.exists(table_name, ordinal)]
+        if existing:
+            filtered[table_name] = existing
+        if len(existing) < len(dates):
+            missing[table_name] = [run for run in inventory.missing(table_name, ordinals[0], ordinals[-1])
+                                   if any(run[0] <= ordinal <= run[1] for ordinal in ordinals)]
+    return filtered, missing
+
+
+def run_single(args):
     table_name = args[0]
-    startdate = datetime.datetime.strptime(args[1][1:], '%Y%m%d')
-    enddate = datetime.datetime.strptime(args[2][1:], '%Y%m%d')
-    now = datetime.datetime.now()
-    if startdate > enddate or startdate > now or enddate > now:
+    expander = get_expander()
+    startdate = expander.to_date(args[1])
+    enddate = expander.to_date(args[2])
+    today = datetime.date.today()
+    if startdate > enddate or startdate > today or enddate > today:
         print('参数有误')
         sys.exit(0)
     print('========== 复制以下输出至[https://data.sankuai.com/wanxiang#/olap/data/bikedw/sql]执行 ==========')
-    print(get_output_str(table_name, startdate))
-    while startdate != enddate:
-        startdate = startdate + datetime.timedelta(days=1)
-        print(get_output_str(table_name, startdate))
+    for date in expander.date_range(args[1], args[2]):
+        print(get_output_str(table_name, date))
+
+
+if __name__ == '__main__':
+    if len(sys.argv) == 4 and not sys.argv[1].startswith('-'):
+        run_single(sys.argv[1:])
+        sys.exit(0)
+    parser = argparse.ArgumentParser(description='批量生成删除分区语句')
+    parser.add_argument('job', nargs='*', help='单表任务：表名 第一个分区 最后一个分区')
+    parser.add_argument('--jobs', help='任务文件，每行：表名 第一个分区 最后一个分区；-表示标准输入')
+    parser.add_argument('--inventory', action='append', help='SHOW PARTITIONS输出文件或目录，只删除存在的分区，可重复')
+    parser.add_argument('--dialect', choices=('doris', 'hive'), default='doris')
+    parser.add_argument('--max-per-statement', type=int, default=DEFAULT_MAX_PER_STATEMENT,
+                        help='每条语句最多删除的分区数')
+    parser.add_argument('--partition-column', default=DEFAULT_HIVE_PARTITION_COLUMN, help='Hive分区字段')
+    parser.add_argument('--date-format', default=DEFAULT_HIVE_DATE_FORMAT, help='Hive分区值的日期格式')
+    parser.add_argument('--run-date', help='展开任务中日期宏使用的运行日期，缺省为今天')
+    parser.add_argument('--report', help='分区统计文件，只输出释放存储的报告')
+    parser.add_argument('--by-month', action='store_true', help='报告中同时按月汇总')
+    parsed = parser.parse_args()
+    if bool(parsed.job) == bool(parsed.jobs) or (parsed.job and len(parsed.job) != 3):
+        parser.error('需要指定 表名 第一个分区 最后一个分区，或 --jobs 任务文件')
+
+    run_date = parse_run_date(parsed.run_date)
+    if parsed.job:
+        drop_jobs = read_jobs([' '.join(parsed.job)], run_date)
+    elif parsed.jobs == '-':
+        drop_jobs = read_jobs(sys.stdin, run_date)
+    else:
+        with open(parsed.jobs, encoding='utf-8') as f:
+            drop_jobs = read_jobs(f, run_date)
+    today = datetime.date.today()
+    for name, job_dates in drop_jobs.items():
+        if job_dates and job_dates[-1] > today:
+            print('参数有误：%s 包含未来的分区' % name)
+            sys.exit(0)
+    if parsed.inventory:
+        drop_jobs, missing_runs = filter_existing(drop_jobs, load_inventory(parsed.inventory))
+        for name in sorted(missing_runs):
+            sys.stderr.write('%s: 以下分区不存在，已跳过: %s\n' % (name, format_runs(missing_runs[name])))
+    if parsed.report:
+        write_report(parsed.report, drop_jobs, show_months=parsed.by_month)
+        sys.exit(0)
+    batch_statements = gen_batch_statements(drop_jobs, parsed.dialect, parsed.max_per_statement,
+                                            parsed.partition_column, parsed.date_format)
+    sys.stderr.write('%d张表，%d个分区，%d条语句\n' % (len(drop_jobs), sum(len(d) for d in drop_jobs.values()),
+                                                 len(batch_statements)))
+    print('========== 复制以下输出至[https://data.sankuai.com/wanxiang#/olap/data/bikedw/sql]执行 ==========')
+    print('\n'.join(batch_statements))
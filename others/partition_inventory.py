@@ -0,0 +1,195 @@
+# 脚本调用示例：
+# partition_inventory.py show_partitions/                       列出每张表的分区数、起止日期和缺口
+# partition_inventory.py dump.txt --table t --range p20210701 p20210731
+#
+# 解析SHOW PARTITIONS的输出，整理为每张表排好序的日期序数数组，存在/缺失/缺口/重叠都用二分查找回答
+# 支持的输入格式（同一文件中可以有多张表，表块之间用空行分隔，表块第一行为表名；
+# 单表文件没有写表名时使用文件名）：
+# 1. Hive：每行一个分区，如 pt_dt=2021-07-21 或 dt=20210721/hour=01（同一天的子分区合并）
+# 2. Doris：带PartitionName表头的制表符分隔或 | 分隔的表格，取PartitionName，非日分区取Range下界
+# 3. 分区清单：带 table_name、partition 表头的制表符分隔文本（retention_planner.py 的输入格式）
+
+import argparse
+import bisect
+import datetime
+import os
+import re
+
+DATE_PATTERN = re.compile(r'(\d{4})-?(\d{2})-?(\d{2})')
+RANGE_KEY_PATTERN = re.compile(r'keys:\s*\[(\d{4}-\d{2}-\d{2})')
+
+
+def parse_date_ordinal(text):
+    """从分区名或分区值中取日期序数，找不到日期时返回None"""
+    match = DATE_PATTERN.search(text)
+    if not match:
+        return None
+    try:
+        return datetime.date(int(match.group(1)), int(match.group(2)), int(match.group(3))).toordinal()
+    except ValueError:
+        return None
+
+
+def split_cells(line):
+    if '\t' in line:
+        return [cell.strip() for cell in line.split('\t')]
+    return [cell.strip() for cell in line.strip().strip('|').split('|')]
+
+
+class PartitionInventory:
+    """每张表一个排好序、无重复的日期序数列表"""
+
+    def __init__(self):
+        self.tables = {}
+
+    def add(self, table_name, ordinals):
+        merged = set(self.tables.get(table_name, ()))
+        merged.update(ordinals)
+        self.tables[table_name] = sorted(merged)
+
+    def ordinals(self, table_name):
+        return self.tables.get(table_name, [])
+
+    def exists(self, table_name, ordinal):
+        ordinals = self.ordinals(table_name)
+        i = bisect.bisect_left(ordinals, ordinal)
+        return i < len(ordinals) and ordinals[i] == ordinal
+
+    def in_range(self, table_name, start, end):
+        """[start, end]内已存在的分区"""
+        ordinals = self.ordinals(table_name)
+        return ordinals[bisect.bisect_left(ordinals, start):bisect.bisect_right(ordinals, end)]
+
+    def overlaps(self, table_name, start, end):
+        """[start, end]内是否至少有一个分区"""
+        ordinals = self.ordinals(table_name)
+        i = bisect.bisect_left(ordinals, start)
+        return i < len(ordinals) and ordinals[i] <= end
+
+    def missing(self, table_name, start, end):
+        """[start, end]内不存在的日期，按连续区间返回[(起, 止), ...]"""
+        runs = []
+        expected = start
+        for ordinal in self.in_range(table_name, start, end):
+            if ordinal > expected:
+                runs.append((expected, ordinal - 1))
+            expected = ordinal + 1
+        if expected <= end:
+            runs.append((expected, end))
+        return runs
+
+    def gaps(self, table_name):
+        """首尾分区之间日序列的缺口"""
+        ordinals = self.ordinals(table_name)
+        if not ordinals:
+            return []
+        return self.missing(table_name, ordinals[0], ordinals[-1])
+
+
+def parse_show_partitions(lines, default_table_name=None):
+    """解析一个文件的内容，返回{表名: 日期序数集合}"""
+    tables = {}
+    table_name = default_table_name
+    name_index = None
+    range_index = None
+    first = True
+    for line in lines:
+        stripped = line.strip()
+        if first and stripped:
+            first = False
+            header = split_cells(line)
+            if 'table_name' in header and 'partition' in header:
+                return parse_inventory_rows(lines, header)
+        if not stripped:
+            if table_name in tables:
+                table_name = default_table_name
+                name_index = None
+            continue
+        if stripped.startswith('+') or stripped.startswith('--'):
+            continue
+        if 'PartitionName' in stripped:
+            header = split_cells(line)
+            name_index = header.index('PartitionName')
+            range_index = header.index('Range') if 'Range' in header else None
+            continue
+        if name_index is not None:
+            cells = split_cells(line)
+            ordinal = parse_date_ordinal(cells[name_index]) if len(cells) > name_index else None
+            if (ordinal is None or not re.search(r'\d{8}', cells[name_index])) and range_index is not None \
+                    and len(cells) > range_index:
+                range_match = RANGE_KEY_PATTERN.search(cells[range_index])
+                ordinal = parse_date_ordinal(range_match.group(1)) if range_match else ordinal
+            if ordinal is not None:
+                tables.setdefault(table_name, set()).add(ordinal)
+            continue
+        if '=' in stripped:
+            ordinal = parse_date_ordinal(stripped.split('/')[0].split('=', 1)[1])
+            if ordinal is not None:
+                tables.setdefault(table_name, set()).add(ordinal)
+            continue
+        table_name = stripped
+    return tables
+
+
+def parse_inventory_rows(lines, header):
+    """已读过表头的分区清单，继续读剩下的行"""
+    table_column = header.index('table_name')
+    partition_column = header.index('partition')
+    tables = {}
+    for line in lines:
+        cells = line.rstrip('\r\n').split('\t')
+        if len(cells) <= max(table_column, partition_column):
+            continue
+        ordinal = parse_date_ordinal(cells[partition_column])
+        if ordinal is not None:
+            tables.setdefault(cells[table_column], set()).add(ordinal)
+    return tables
+
+
+def load_inventory(paths):
+    """读取文件或目录（目录下每个文件），返回PartitionInventory"""
+    inventory = PartitionInventory()
+    for path in paths:
+        if os.path.isdir(path):
+            files = [os.path.join(path, name) for name in sorted(os.listdir(path)) if not name.startswith('.')]
+        else:
+            files = [path]
+        for file_path in files:
+            default_name = os.path.splitext(os.path.basename(file_path))[0]
+            with open(file_path, encoding='utf-8') as f:
+                for table_name, ordinals in parse_show_partitions(f, default_name).items():
+                    inventory.add(table_name, ordinals)
+    return inventory
+
+
+def format_ordinal(ordinal):
+    return datetime.date.fromordinal(ordinal).strftime('%Y-%m-%d')
+
+
+def format_runs(runs):
+    return ', '.join(format_ordinal(s) if s == e else '%s~%s' % (format_ordinal(s), format_ordinal(e))
+                     for s, e in runs)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='解析SHOW PARTITIONS输出，检查分区缺口')
+    parser.add_argument('inputs', nargs='+', help='SHOW PARTITIONS输出文件或目录')
+    parser.add_argument('--table', help='只看一张表')
+    parser.add_argument('--range', nargs=2, metavar=('FIRST', 'LAST'), help='检查该范围内缺失的分区')
+    args = parser.parse_args()
+
+    partition_inventory = load_inventory(args.inputs)
+    table_names = [args.table] if args.table else sorted(partition_inventory.tables)
+    for name in table_names:
+        table_ordinals = partition_inventory.ordinals(name)
+        if not table_ordinals:
+            print('%s\t没有分区' % name)
+            continue
+        if args.range:
+            first, last = parse_date_ordinal(args.range[0]), parse_date_ordinal(args.range[1])
+            print('%s\t范围内%d个分区\t缺失: %s' % (name, len(partition_inventory.in_range(name, first, last)),
+                                              format_runs(partition_inventory.missing(name, first, last)) or '无'))
+        else:
+            print('%s\t%d个分区\t%s~%s\t缺口: %s' % (name, len(table_ordinals), format_ordinal(table_ordinals[0]),
+                                                 format_ordinal(table_ordinals[-1]),
+                                                 format_runs(partition_inventory.gaps(name)) or '无'))
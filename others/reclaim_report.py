@@ -0,0 +1,116 @@
+# 脚本调用示例：
+# reclaim_report.py partition_stats.tsv --jobs drop_jobs.txt
+# reclaim_report.py partition_stats.tsv --jobs drop_jobs.txt --by-month --top 20
+# 也可以在生成删除语句时直接输出：gen_drop_partition.py --jobs drop_jobs.txt --report partition_stats.tsv
+#                                 retention_planner.py retention.txt partitions.tsv --report partition_stats.tsv
+#
+# 统计删除计划能释放的存储：分区统计文件与 gen_doris_table.py 的格式相同（制表符分隔，带表头）：
+#   table_name  partition  row_count  data_size
+# 统计文件逐行流式读取，只累加删除计划中的分区，内存占用与删除计划的大小有关，与统计文件行数无关
+
+import argparse
+import csv
+import datetime
+import sys
+
+from partition_inventory import parse_date_ordinal
+
+SIZE_UNITS = ('B', 'KB', 'MB', 'GB', 'TB', 'PB')
+
+
+def format_bytes(size):
+    size = float(size)
+    for unit in SIZE_UNITS:
+        if abs(size) < 1024 or unit == SIZE_UNITS[-1]:
+            return '%.2f%s' % (size, unit)
+        size /= 1024
+
+
+def to_drop_set(jobs):
+    """{表名: [日期, ...]} -> {表名: 日期序数集合}"""
+    return {table_name: {date.toordinal() for date in dates} for table_name, dates in jobs.items()}
+
+
+def aggregate_reclaim(stats_lines, drop_set):
+    """
+    流式汇总删除计划中分区的行数和大小
+    返回(按表{表名: [分区数, 行数, 字节数]}, 按月{(表名, 'YYYY-MM'): [分区数, 行数, 字节数]}, 读取行数)
+    """
+    by_table = {}
+    by_month = {}
+    ordinals_by_name = {}
+    reader = csv.reader(stats_lines, delimiter='\t')
+    header = next(reader)
+    table_column = header.index('table_name')
+    partition_column = header.index('partition')
+    rows_column = header.index('row_count')
+    size_column = header.index('data_size')
+    row_count = 0
+    for row in reader:
+        row_count += 1
+        planned = drop_set.get(row[table_column])
+        if not planned:
+            continue
+        partition = row[partition_column]
+        ordinal = ordinals_by_name.get(partition)
+        if ordinal is None:
+            ordinal = ordinals_by_name[partition] = parse_date_ordinal(partition)
+        if ordinal not in planned:
+            continue
+        rows = int(row[rows_column] or 0)
+        size = int(row[size_column] or 0)
+        for totals in (by_table.setdefault(row[table_column], [0, 0, 0]),
+                       by_month.setdefault((row[table_column], datetime.date.fromordinal(ordinal).strftime('%Y-%m')),
+                                           [0, 0, 0])):
+            totals[0] += 1
+            totals[1] += rows
+            totals[2] += size
+    return by_table, by_month, row_count
+
+
+def format_report(by_table, by_month, drop_set, top=None, show_months=False):
+    """按释放字节数从大到小排列，返回输出行列表"""
+    ranked = sorted(by_table.items(), key=lambda item: -item[1][2])
+    total_bytes = sum(totals[2] for totals in by_table.values())
+    lines = ['-- 预计释放%s，%d行，%d张表' % (format_bytes(total_bytes), sum(t[1] for t in by_table.values()),
+                                        len(by_table)),
+             '\t'.join(['排名', '表名', '有统计的分区数', '计划删除分区数', '行数', '释放空间', '占比'])]
+    for rank, (table_name, (partitions, rows, size)) in enumerate(ranked[:top] if top else ranked, 1):
+        lines.append('%d\t%s\t%d\t%d\t%d\t%s\t%.1f%%' % (rank, table_name, partitions, len(drop_set[table_name]),
+                                                      rows, format_bytes(size),
+                                                      size * 100.0 / total_bytes if total_bytes else 0))
+        if show_months:
+            for (_, month), (month_partitions, month_rows, month_size) in sorted(
+                    (key, value) for key, value in by_month.items() if key[0] == table_name):
+                lines.append('\t  %s\t%d\t\t%d\t%s' % (month, month_partitions, month_rows, format_bytes(month_size)))
+    # 计划删除但统计文件中没有的表
+    unknown = sorted(set(drop_set) - set(by_table))
+    if unknown:
+        lines.append('-- 统计文件中没有以下表的分区: %s' % ', '.join(unknown))
+    return lines
+
+
+def write_report(stats_path, jobs, top=None, show_months=False, out=sys.stdout):
+    drop_set = to_drop_set(jobs)
+    with open(stats_path, encoding='utf-8', newline='') as f:
+        by_table, by_month, row_count = aggregate_reclaim(f, drop_set)
+    out.write('\n'.join(format_report(by_table, by_month, drop_set, top, show_months)) + '\n')
+    return row_count
+
+
+if __name__ == '__main__':
+    from gen_drop_partition import read_jobs
+
+    parser = argparse.ArgumentParser(description='统计删除分区能释放的存储')
+    parser.add_argument('stats', help='分区统计文件')
+    parser.add_argument('--jobs', required=True, help='删除任务文件（gen_drop_partition.py --jobs的格式），-表示标准输入')
+    parser.add_argument('--top', type=int, help='只列出释放空间最多的前N张表')
+    parser.add_argument('--by-month', action='store_true', help='同时按月汇总')
+    args = parser.parse_args()
+
+    if args.jobs == '-':
+        drop_jobs = read_jobs(sys.stdin)
+    else:
+        with open(args.jobs, encoding='utf-8') as f:
+            drop_jobs = read_jobs(f)
+    write_report(args.stats, drop_jobs, args.top, args.by_month)
@@ -0,0 +1,196 @@
+# 脚本调用示例：
+# retention_planner.py retention.txt partitions.tsv                    计划输出到标准输出
+# retention_planner.py retention.txt partitions.tsv -o drop_scripts/   每条规则（表组）输出一个脚本
+# retention_planner.py retention.txt partitions.tsv --today 20241001 --dialect hive
+# retention_planner.py retention.txt partitions.tsv --report partition_stats.tsv   只输出释放存储的报告
+#
+# 保留策略文件每行：表名或通配符 保留时长，从上到下第一条匹配的规则生效，#开头为注释：
+#   mart_bikedw.app_spock_fault_link  400d
+#   ods.ods_*                          6m
+#   dim.*                              forever
+# 保留时长支持 N天(d) / N月(m) / forever，保留 [今天-N, 今天] 内的分区，更早的全部删除
+#
+# 分区清单为制表符分隔、带表头的文本，至少包含 table_name、partition 两列
+# （与 gen_doris_table.py 的分区统计文件格式相同，可以直接复用）
+#
+# 日期统一转为整数序数：每条规则只计算一次截止序数，每张表的分区排序后用二分查找定位，
+# 删除集合就是截止位置之前的切片，不需要逐天循环
+
+import argparse
+import bisect
+import csv
+import datetime
+import fnmatch
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'sql generators'))
+from date_macro import parse_run_date, shift_date
+from gen_drop_partition import DEFAULT_MAX_PER_STATEMENT, gen_batch_statements
+from reclaim_report import write_report
+
+POLICY_PATTERN = re.compile(r'^(\d+)([dm])$')
+DAILY_PARTITION_PATTERN = re.compile(r'^p?(\d{8})$')
+
+
+def read_policies(lines):
+    """读取保留策略，返回[(通配符, 单位, 数量), ...]，单位为 'd'/'m'/None(永久保留)"""
+    policies = []
+    for number, line in enumerate(lines, 1):
+        stripped = line.split('#')[0].strip()
+        if not stripped:
+            continue
+        parts = stripped.split()
+        if len(parts) != 2:
+            raise ValueError('保留策略第%d行格式有误: %s' % (number, line.strip()))
+        pattern, keep = parts[0], parts[1].lower()
+        if keep == 'forever':
+            policies.append((pattern, None, 0))
+            continue
+        match = POLICY_PATTERN.match(keep)
+        if not match:
+            raise ValueError('保留策略第%d行保留时长有误: %s' % (number, parts[1]))
+        policies.append((pattern, match.group(2), int(match.group(1))))
+    return policies
+
+
+def parse_partition_ordinal(partition):
+    """p20240101 / 20240101 / 2024-01-01 -> 日期序数，不是日分区（如p202401、p_his）时返回None"""
+    match = DAILY_PARTITION_PATTERN.match(partition.strip().replace('-', ''))
+    if not match:
+        return None
+    text = match.group(1)
+    try:
+        return datetime.date(int(text[:4]), int(text[4:6]), int(text[6:8])).toordinal()
+    except ValueError:
+        return None
+
+
+def read_inventory(lines, skipped=None):
+    """
+    读取分区清单，返回{表名: 去重并排好序的日期序数列表}；各表的分区名大量重复，解析结果按分区名缓存
+    不是日分区的分区不参与计划，传入skipped时记录到{表名: [分区名, ...]}
+    """
+    inventory = {}
+    ordinals_by_name = {}
+    reader = csv.reader(lines, delimiter='\t')
+    header = next(reader)
+    table_column = header.index('table_name')
+    partition_column = header.index('partition')
+    for row in reader:
+        partition = row[partition_column]
+        if partition in ordinals_by_name:
+            ordinal = ordinals_by_name[partition]
+        else:
+            ordinal = ordinals_by_name[partition] = parse_partition_ordinal(partition)
+        if ordinal is None:
+            if skipped is not None:
+                skipped.setdefault(row[table_column], []).append(partition)
+            continue
+        inventory.setdefault(row[table_column], []).append(ordinal)
+    # 清单可能重复列出同一分区，去重后再排序，避免生成重复的删除子句
+    return {table_name: sorted(set(ordinals)) for table_name, ordinals in inventory.items()}
+
+
+def cutoff_ordinal(today, unit, amount):
+    """保留期的第一天；按月保留时目标月没有这一天取月末（同date_macro.shift_months）"""
+    return shift_date(today, -amount, unit).toordinal()
+
+
+def match_policy(table_name, policies):
+    for index, (pattern, _, _) in enumerate(policies):
+        if fnmatch.fnmatchcase(table_name, pattern):
+            return index
+    return None
+
+
+def plan_retention(policies, inventory, today):
+    """
+    返回(计划, 未匹配的表)，计划为{规则下标: {表名: 要删除的日期序数列表}}
+    没有需要删除的分区的表不出现在计划中
+    """
+    cutoffs = [None if unit is None else cutoff_ordinal(today, unit, amount) for _, unit, amount in policies]
+    plan = {}
+    unmatched = []
+    for table_name, ordinals in inventory.items():
+        index = match_policy(table_name, policies)
+        if index is None:
+            unmatched.append(table_name)
+            continue
+        if cutoffs[index] is None:
+            continue
+        position = bisect.bisect_left(ordinals, cutoffs[index])
+        if position:
+            plan.setdefault(index, {})[table_name] = ordinals[:position]
+    return plan, sorted(unmatched)
+
+
+def to_jobs(tables):
+    """转为 gen_drop_partition.gen_batch_statements 需要的 {表名: [日期, ...]}"""
+    return {table_name: [datetime.date.fromordinal(ordinal) for ordinal in ordinals]
+            for table_name, ordinals in tables.items()}
+
+
+def script_name(pattern):
+    return re.sub(r'[^\w.]+', '_', pattern).strip('._') or 'all'
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='按保留策略计算所有表要删除的分区')
+    parser.add_argument('policy', help='保留策略文件')
+    parser.add_argument('inventory', help='分区清单文件，-表示标准输入')
+    parser.add_argument('-o', '--out-dir', help='每条规则输出一个脚本到该目录，缺省时合并输出到标准输出')
+    parser.add_argument('--today', help='计算基准日期，格式20240101，默认今天')
+    parser.add_argument('--dialect', choices=('doris', 'hive'), default='doris')
+    parser.add_argument('--max-per-statement', type=int, default=DEFAULT_MAX_PER_STATEMENT,
+                        help='每条语句最多删除的分区数')
+    parser.add_argument('--report', help='分区统计文件，只输出释放存储的报告（分区清单本身带统计列时可以是同一个文件）')
+    parser.add_argument('--by-month', action='store_true', help='报告中同时按月汇总')
+    args = parser.parse_args()
+
+    started = time.time()
+    today = parse_run_date(args.today)
+    with open(args.policy, encoding='utf-8') as f:
+        retention_policies = read_policies(f)
+    skipped_partitions = {}
+    if args.inventory == '-':
+        partition_inventory = read_inventory(sys.stdin, skipped_partitions)
+    else:
+        with open(args.inventory, encoding='utf-8', newline='') as f:
+            partition_inventory = read_inventory(f, skipped_partitions)
+    for name in sorted(skipped_partitions):
+        partitions = skipped_partitions[name]
+        sys.stderr.write('%s: %d个分区不是日分区，不参与计划: %s%s\n' % (
+            name, len(partitions), ', '.join(partitions[:5]), ' ...' if len(partitions) > 5 else ''))
+    retention_plan, unmatched_tables = plan_retention(retention_policies, partition_inventory, today)
+
+    if args.report:
+        planned_jobs = {}
+        for tables in retention_plan.values():
+            planned_jobs.update(to_jobs(tables))
+        write_report(args.report, planned_jobs, show_months=args.by_month)
+        sys.exit(0)
+    if args.out_dir:
+        os.makedirs(args.out_dir, exist_ok=True)
+    combined = []
+    for policy_index in sorted(retention_plan):
+        pattern, unit, amount = retention_policies[policy_index]
+        tables = retention_plan[policy_index]
+        statements = gen_batch_statements(to_jobs(tables), args.dialect, args.max_per_statement)
+        header = '-- 规则 %s 保留%d%s: %d张表, %d个分区' % (pattern, amount, '天' if unit == 'd' else '个月',
+                                                    len(tables), sum(len(o) for o in tables.values()))
+        if args.out_dir:
+            path = os.path.join(args.out_dir, '%02d_%s.sql' % (policy_index + 1, script_name(pattern)))
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write('\n'.join([header] + statements) + '\n')
+        else:
+            combined += [header] + statements + ['']
+    if not args.out_dir:
+        sys.stdout.write('\n'.join(combined))
+    for table_name in unmatched_tables:
+        sys.stderr.write('%s: 没有匹配的保留策略，跳过\n' % table_name)
+    sys.stderr.write('%d张表，%d张需要删除分区，共%d个分区，耗时%.3f秒\n' % (
+        len(partition_inventory), sum(len(t) for t in retention_plan.values()),
+        sum(len(o) for t in retention_plan.values() for o in t.values()), time.time() - started))
@@ -0,0 +1,120 @@
+# 脚本调用示例：
+# date_macro.py "pt_dt >= '$$today{-100d}'" --run-date 20241001          展开文本中的宏
+# date_macro.py --range '$$today{-7d}' '$$yesterday' --run-date 20241001  列出范围内的分区
+#
+# 调度系统日期宏的展开，供各个SQL生成脚本共用，离线生成的SQL可以直接写成日期常量，便于分区裁剪：
+#   $$today / $$yesterday            运行日期 / 运行日期前一天
+#   $$today{-100d} / $$yesterday{+1d} 带偏移，单位 d(天) w(周) m(月) y(年)，月/年偏移遇到月末时取目标月最后一天
+# 运行日期缺省为今天；同一运行日期下，每个宏只计算一次
+# 其他目录（others/）中的脚本通过把本目录加入sys.path来引用
+
+import argparse
+import datetime
+import functools
+import re
+
+DEFAULT_DATE_FORMAT = '%Y-%m-%d'
+PARTITION_NAME_FORMAT = 'p%Y%m%d'
+MACRO_PATTERN = re.compile(r'\$\$(today|yesterday)(?:\{([+-]?\d+)([dwmy])\})?')
+LITERAL_PATTERN = re.compile(r'^p?(\d{4})-?(\d{2})-?(\d{2})$')
+
+
+def shift_months(date, months):
+    month_index = date.year * 12 + date.month - 1 + months
+    year, month = divmod(month_index, 12)
+    month += 1
+    next_month = datetime.date(year + (month == 12), month % 12 + 1, 1)
+    return datetime.date(year, month, min(date.day, (next_month - datetime.timedelta(days=1)).day))
+
+
+def shift_date(date, amount, unit):
+    if unit == 'd':
+        return date + datetime.timedelta(days=amount)
+    if unit == 'w':
+        return date + datetime.timedelta(days=7 * amount)
+    if unit == 'm':
+        return shift_months(date, amount)
+    return shift_months(date, 12 * amount)
+
+
+class DateMacroExpander:
+    """一个运行日期下的宏展开，解析过的宏按(名称, 偏移, 单位)缓存"""
+
+    def __init__(self, run_date, date_format=DEFAULT_DATE_FORMAT):
+        self.run_date = run_date
+        self.date_format = date_format
+        self.cache = {}
+
+    def resolve(self, name, amount=0, unit='d'):
+        key = (name, amount, unit)
+        date = self.cache.get(key)
+        if date is None:
+            base = self.run_date - datetime.timedelta(days=1) if name == 'yesterday' else self.run_date
+            date = self.cache[key] = shift_date(base, amount, unit)
+        return date
+
+    def _replace(self, match):
+        date = self.resolve(match.group(1), int(match.group(2) or 0), match.group(3) or 'd')
+        return date.strftime(self.date_format)
+
+    def expand(self, text):
+        """把文本中的所有宏替换为日期常量"""
+        if '$$' not in text:
+            return text
+        return MACRO_PATTERN.sub(self._replace, text)
+
+    def to_date(self, text):
+        """单个宏或日期常量（p20240101 / 20240101 / 2024-01-01）转为日期"""
+        text = text.strip()
+        match = MACRO_PATTERN.fullmatch(text)
+        if match:
+            return self.resolve(match.group(1), int(match.group(2) or 0), match.group(3) or 'd')
+        match = LITERAL_PATTERN.match(text)
+        if not match:
+            raise ValueError('无法识别的日期: %s' % text)
+        return datetime.date(int(match.group(1)), int(match.group(2)), int(match.group(3)))
+
+    def date_range(self, start, end):
+        """[start, end]内的每一天，start/end可以是宏或日期常量"""
+        first = self.to_date(start).toordinal()
+        last = self.to_date(end).toordinal()
+        return [datetime.date.fromordinal(ordinal) for ordinal in range(first, last + 1)]
+
+    def partition_names(self, start, end, name_format=PARTITION_NAME_FORMAT):
+        return [date.strftime(name_format) for date in self.date_range(start, end)]
+
+    def in_predicate(self, column, start, end):
+        """column in ('2024-01-01', ...)，用于需要列出每个分区的场景"""
+        return '%s in (%s)' % (column, ', '.join("'%s'" % date.strftime(self.date_format)
+                                                 for date in self.date_range(start, end)))
+
+
+def parse_run_date(text=None):
+    """运行日期参数，支持 20240101 / 2024-01-01，缺省为今天"""
+    if not text:
+        return datetime.date.today()
+    return DateMacroExpander(datetime.date.today()).to_date(text)
+
+
+@functools.lru_cache(maxsize=None)
+def get_expander(run_date=None, date_format=DEFAULT_DATE_FORMAT):
+    return DateMacroExpander(run_date or datetime.date.today(), date_format)
+
+
+def expand(text, run_date=None, date_format=DEFAULT_DATE_FORMAT):
+    return get_expander(run_date, date_format).expand(text)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='展开$$today/$$yesterday日期宏')
+    parser.add_argument('text', nargs='?', help='要展开的文本')
+    parser.add_argument('--run-date', help='运行日期，缺省为今天')
+    parser.add_argument('--date-format', default=DEFAULT_DATE_FORMAT)
+    parser.add_argument('--range', nargs=2, metavar=('START', 'END'), help='列出范围内的分区名')
+    args = parser.parse_args()
+
+    expander = get_expander(parse_run_date(args.run_date), args.date_format)
+    if args.range:
+        print('\n'.join(expander.partition_names(*args.range)))
+    if args.text:
+        print(expander.expand(args.text))
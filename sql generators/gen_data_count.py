@@ -0,0 +1,214 @@
+# 脚本调用示例：
+# gen_data_count.py gen tables.txt > data_count.sql           按表清单生成合并后的数据量查询
+# gen_data_count.py gen --catalog catalog.db --table 'ods_*'  从本地表结构目录取表，自动识别分区字段
+# gen_data_count.py load data_count.db result.tsv             把查询结果导入本地SQLite
+# gen_data_count.py trend data_count.db                       列出最新分区数据量异常波动的表
+# gen_data_count.py gen tables.txt --run-date 20241001        日期宏展开为常量（date_macro.py），可以直接离线执行
+#
+# 替代chrome插件genSQL.js中逐表执行的dataCount模板：
+# 同一分区字段、同一时间窗口的表合并为一条UNION ALL查询，每条查询最多--batch-size张表，
+# 结果统一为 table_name, partition_value, row_count 三列，导出后可直接 load 到本地做趋势检查
+#
+# 表清单每行一张表，空白分隔，分区字段和天数可省略（使用--partition-column/--days）：
+#   mart_bikedw.app_spock_fault_link  pt_dt  100
+#   ods.ods_resource_approval  dt
+
+import argparse
+import csv
+import datetime
+import sqlite3
+import sys
+
+from date_macro import expand, parse_run_date
+
+DEFAULT_PARTITION_COLUMN = 'pt_dt'
+DEFAULT_DAYS = 100
+DEFAULT_BATCH_SIZE = 50
+# 识别分区字段时依次尝试
+PARTITION_COLUMN_CANDIDATES = ('pt_dt', 'dt')
+
+# trend：最新分区与之前若干个分区的均值比较
+DEFAULT_TREND_WINDOW = 7
+DEFAULT_TREND_THRESHOLD = 0.5
+
+
+def read_table_list(lines, partition_column, days, seen=None):
+    """
+    读取表清单，返回[(表名, 分区字段, 天数), ...]，重复的表只保留第一次出现
+    读多个清单时传入同一个seen集合，跨文件去重
+    """
+    tables = []
+    if seen is None:
+        seen = set()
+    for line in lines:
+        stripped = line.strip()
+        if not stripped or stripped.startswith('--') or stripped.startswith('#'):
+            continue
+        parts = stripped.split()
+        table_name = parts[0]
+        if table_name in seen:
+            continue
+        seen.add(table_name)
+        tables.append((table_name,
+                       parts[1] if len(parts) > 1 else partition_column,
+                       int(parts[2]) if len(parts) > 2 else days))
+    return tables
+
+
+def load_catalog_tables(db_path, patterns, days):
+    """从本地表结构目录读取表，分区字段取第一个匹配的候选字段，找不到的表跳过"""
+    from gen_view import load_catalog_blocks
+    tables = []
+    for table_name, fields in load_catalog_blocks(db_path, patterns):
+        names = {field[0] for field in fields}
+        partition_column = next((c for c in PARTITION_COLUMN_CANDIDATES if c in names), None)
+        if not partition_column:
+            sys.stderr.write('%s: 找不到分区字段，跳过\n' % table_name)
+            continue
+        tables.append((table_name, partition_column, days))
+    return tables
+
+
+def plan_batches(tables, batch_size):
+    """按(分区字段, 天数)分组，组内按表名排序后每batch_size张表一批"""
+    groups = {}
+    for table_name, partition_column, days in tables:
+        groups.setdefault((partition_column, days), []).append(table_name)
+    batches = []
+    for (partition_column, days), table_names in sorted(groups.items()):
+        table_names.sort()
+        for i in range(0, len(table_names), batch_size):
+            batches.append((partition_column, days, table_names[i:i + batch_size]))
+    return batches
+
+
+def gen_batch_sql(partition_column, days, table_names):
+    """一批表的数据量查询，分区值统一转为字符串以便不同表的结果合并"""
+    parts = []
+    for table_name in table_names:
+        parts.append('select \'%s\' as table_name, cast(t.%s as string) as partition_value, count(1) as row_count\n'
+                     'from %s t\n'
+                     'where t.%s >= \'$$today{-%dd}\'\n'
+                     'group by t.%s'
+                     % (table_name, partition_column, table_name, partition_column, days, partition_column))
+    return '\nunion all\n'.join(parts) + '\n;'
+
+
+def open_result_db(db_path):
+    conn = sqlite3.connect(db_path)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS data_count (
+            table_name TEXT NOT NULL,
+            partition_value TEXT NOT NULL,
+            row_count INTEGER NOT NULL,
+            loaded_at TEXT NOT NULL,
+            PRIMARY KEY (table_name, partition_value)
+        )
+    ''')
+    conn.commit()
+    return conn
+
+
+def load_results(conn, lines):
+    """
+    导入查询结果（制表符分隔，带表头 table_name/partition_value/row_count）
+    同一表同一分区重复导入时覆盖，返回导入行数
+    """
+    loaded_at = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    rows = [(row['table_name'], row['partition_value'], int(row['row_count']), loaded_at)
+            for row in csv.DictReader(lines, delimiter='\t')]
+    with conn:
+        conn.executemany('INSERT OR REPLACE INTO data_count (table_name, partition_value, row_count, loaded_at) '
+                         'VALUES (?, ?, ?, ?)', rows)
+    return len(rows)
+
+
+def find_trend_anomalies(conn, window, threshold):
+    """
+    每张表最新分区的数据量与之前window个分区均值比较，相对偏差超过threshold的返回
+    返回[(表名, 最新分区, 最新数据量, 均值, 偏差), ...]，按偏差绝对值从大到小
+    """
+    history = {}
+    for table_name, partition_value, row_count in conn.execute(
+            'SELECT table_name, partition_value, row_count FROM data_count '
+            'ORDER BY table_name, partition_value DESC'):
+        counts = history.setdefault(table_name, [])
+        if len(counts) <= window:
+            counts.append((partition_value, row_count))
+    anomalies = []
+    for table_name, counts in history.items():
+        if len(counts) < 2:
+            continue
+        latest_partition, latest_count = counts[0]
+        average = sum(count for _, count in counts[1:]) / float(len(counts) - 1)
+        if average == 0:
+            deviation = 0.0 if latest_count == 0 else float('inf')
+        else:
+            deviation = (latest_count - average) / average
+        if abs(deviation) > threshold:
+            anomalies.append((table_name, latest_partition, latest_count, average, deviation))
+    anomalies.sort(key=lambda a: -abs(a[4]))
+    return anomalies
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='批量生成数据量查询并做趋势检查')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    gen_parser = subparsers.add_parser('gen', help='生成合并后的数据量查询')
+    gen_parser.add_argument('inputs', nargs='*', help='表清单文件，缺省时读标准输入')
+    gen_parser.add_argument('--catalog', help='从本地表结构目录取表')
+    gen_parser.add_argument('--table', action='append', help='配合--catalog使用的表名通配符，可重复')
+    gen_parser.add_argument('--partition-column', default=DEFAULT_PARTITION_COLUMN, help='表清单中未写分区字段时使用')
+    gen_parser.add_argument('--days', type=int, default=DEFAULT_DAYS, help='统计最近多少天的分区')
+    gen_parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help='每条查询最多包含多少张表')
+    gen_parser.add_argument('--run-date', help='指定运行日期时把$$today等日期宏展开为日期常量')
+    load_parser = subparsers.add_parser('load', help='导入查询结果')
+    load_parser.add_argument('db')
+    load_parser.add_argument('inputs', nargs='*', help='查询结果文件，缺省时读标准输入')
+    trend_parser = subparsers.add_parser('trend', help='列出最新分区数据量异常波动的表')
+    trend_parser.add_argument('db')
+    trend_parser.add_argument('--window', type=int, default=DEFAULT_TREND_WINDOW, help='与之前多少个分区比较')
+    trend_parser.add_argument('--threshold', type=float, default=DEFAULT_TREND_THRESHOLD, help='相对偏差阈值')
+    args = parser.parse_args()
+
+    if args.command == 'gen':
+        if args.catalog:
+            tables = load_catalog_tables(args.catalog, args.table or ['*'], args.days)
+        elif args.inputs:
+            tables = []
+            seen_tables = set()
+            for path in args.inputs:
+                with open(path, encoding='utf-8') as f:
+                    tables += read_table_list(f, args.partition_column, args.days, seen_tables)
+        else:
+            tables = read_table_list(sys.stdin, args.partition_column, args.days)
+        batches = plan_batches(tables, args.batch_size)
+        output = []
+        for i, (partition_column, days, table_names) in enumerate(batches):
+            output.append('-- 数据量 %d/%d: %d张表, %s最近%d天' % (i + 1, len(batches), len(table_names),
+                                                             partition_column, days))
+            batch_sql = gen_batch_sql(partition_column, days, table_names)
+            if args.run_date:
+                batch_sql = expand(batch_sql, parse_run_date(args.run_date))
+            output.append(batch_sql)
+            output.append('')
+        sys.stderr.write('%d张表合并为%d条查询\n' % (len(tables), len(batches)))
+        sys.stdout.write('\n'.join(output))
+    else:
+        conn = open_result_db(args.db)
+        if args.command == 'load':
+            count = 0
+            if args.inputs:
+                for path in args.inputs:
+                    with open(path, encoding='utf-8', newline='') as f:
+                        count += load_results(conn, f)
+            else:
+                count = load_results(conn, sys.stdin)
+            print('已导入%d行' % count)
+        else:
+            for table_name, partition_value, row_count, average, deviation in find_trend_anomalies(
+                    conn, args.window, args.threshold):
+                print('%s\t%s\t%d\t均值%.0f\t%+.1f%%' % (table_name, partition_value, row_count, average,
+                                                       deviation * 100))
+        conn.close()
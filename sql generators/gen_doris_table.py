@@ -0,0 +1,226 @@
+# 脚本调用示例：
+# gen_doris_table.py --stats partition_stats.tsv schemas/
+# gen_doris_table.py --stats partition_stats.tsv --catalog catalog.db --table 'ods_*' -o out/
+#
+# 表结构输入与 gen_view.py 批量模式相同（文件/目录/标准输入，或 --catalog 本地表结构目录）
+# 分区统计文件为制表符分隔、带表头的文本，每行一个已有分区，可由SHOW PARTITIONS/SHOW DATA导出整理：
+#   table_name  partition  row_count  data_size
+# partition支持 p20240101 / 20240101 / 2024-01-01，data_size为字节数
+#
+# 按日均数据量推荐分区粒度（日/周/月），再按每个分区的数据量计算分桶数，
+# 使单个tablet落在目标区间内（默认1GB~10GB），避免产生大量小tablet拖慢FE
+
+import argparse
+import csv
+import datetime
+import math
+import os
+import sys
+
+from gen_view import load_batch_blocks, load_catalog_blocks
+
+GB = 1024 ** 3
+DEFAULT_MIN_TABLET_BYTES = 1 * GB
+DEFAULT_MAX_TABLET_BYTES = 10 * GB
+DEFAULT_MAX_BUCKETS = 128
+
+# Hive/魔数中的类型到Doris类型
+TYPE_MAPPING = {
+    'string': 'STRING',
+    'bigint': 'BIGINT',
+    'int': 'INT',
+    'integer': 'INT',
+    'smallint': 'SMALLINT',
+    'tinyint': 'TINYINT',
+    'double': 'DOUBLE',
+    'float': 'FLOAT',
+    'boolean': 'BOOLEAN',
+    'timestamp': 'DATETIME',
+    'date': 'DATE',
+}
+# key列不能是STRING
+KEY_STRING_TYPE = 'VARCHAR(255)'
+
+
+def parse_partition_date(partition):
+    text = partition.strip().lstrip('p').replace('-', '')
+    return datetime.datetime.strptime(text[:8], '%Y%m%d').date()
+
+
+def load_partition_stats(stats_path):
+    """读取分区统计，返回{表名: [(日期, 行数, 字节数), ...]}，按日期排序"""
+    stats = {}
+    with open(stats_path, encoding='utf-8', newline='') as f:
+        for row in csv.DictReader(f, delimiter='\t'):
+            stats.setdefault(row['table_name'], []).append(
+                (parse_partition_date(row['partition']), int(row['row_count'] or 0), int(row['data_size'] or 0)))
+    for partitions in stats.values():
+        partitions.sort()
+    return stats
+
+
+def period_start(date, granularity):
+    if granularity == 'WEEK':
+        return date - datetime.timedelta(days=date.weekday())
+    if granularity == 'MONTH':
+        return date.replace(day=1)
+    return date
+
+
+def period_end(start, granularity):
+    if granularity == 'WEEK':
+        return start + datetime.timedelta(days=7)
+    if granularity == 'MONTH':
+        return (start.replace(day=28) + datetime.timedelta(days=4)).replace(day=1)
+    return start + datetime.timedelta(days=1)
+
+
+def partition_name(start, granularity):
+    """与Doris动态分区的命名规则一致"""
+    if granularity == 'WEEK':
+        year, week, _ = start.isocalendar()
+        return 'p%d_%02d' % (year, week)
+    if granularity == 'MONTH':
+        return start.strftime('p%Y%m')
+    return start.strftime('p%Y%m%d')
+
+
+def recommend_granularity(partitions, min_tablet_bytes):
+    """日均数据量不足一个最小tablet时逐级放大到周、月"""
+    if not partitions:
+        return 'DAY'
+    days = (partitions[-1][0] - partitions[0][0]).days + 1
+    daily_bytes = sum(size for _, _, size in partitions) / days
+    if daily_bytes >= min_tablet_bytes:
+        return 'DAY'
+    if daily_bytes * 7 >= min_tablet_bytes:
+        return 'WEEK'
+    return 'MONTH'
+
+
+def recommend_buckets(partition_bytes, max_tablet_bytes, max_buckets):
+    """单个tablet不超过目标上限的最少分桶数"""
+    return max(1, min(max_buckets, int(math.ceil(partition_bytes / float(max_tablet_bytes)))))
+
+
+def plan_partitions(partitions, granularity, max_tablet_bytes, max_buckets):
+    """把已有的日分区按粒度合并，返回[(分区名, 起, 止, 行数, 字节数, 分桶数), ...]"""
+    periods = {}
+    for date, rows, size in partitions:
+        start = period_start(date, granularity)
+        total_rows, total_size = periods.get(start, (0, 0))
+        periods[start] = (total_rows + rows, total_size + size)
+    plan = []
+    for start in sorted(periods):
+        rows, size = periods[start]
+        plan.append((partition_name(start, granularity), start, period_end(start, granularity), rows, size,
+                     recommend_buckets(size, max_tablet_bytes, max_buckets)))
+    return plan
+
+
+def doris_type(hive_type, is_key):
+    base = hive_type.strip().lower()
+    mapped = TYPE_MAPPING.get(base.split('(')[0], hive_type.upper() or 'STRING')
+    if is_key and mapped == 'STRING':
+        return KEY_STRING_TYPE
+    return mapped
+
+
+def gen_doris_table_sql(table_name, fields, partition_column, bucket_column, plan, granularity, default_buckets):
+    """生成建表、历史分区和开启动态分区的SQL，返回输出行列表"""
+    # Doris要求key列排在最前面，分区列必须是key列
+    key_columns = [partition_column] + ([bucket_column] if bucket_column != partition_column else [])
+    field_map = {field[0]: field for field in fields}
+    ordered = [field_map[name] for name in key_columns] + [f for f in fields if f[0] not in key_columns]
+    max_field_name_length = max(len(f[0]) for f in ordered)
+
+    lines = ['CREATE TABLE IF NOT EXISTS `%s`' % table_name, '(']
+    for i, (name, comment, hive_type) in enumerate(ordered):
+        if name == partition_column:
+            column_type = 'DATE'
+        else:
+            column_type = doris_type(hive_type, name in key_columns)
+        lines.append('    %s`%s`%s %s COMMENT \'%s\'' % (' ' if i == 0 else ',', name,
+                                                        ' ' * (max_field_name_length - len(name)),
+                                                        column_type, comment))
+    lines += [
+        ') ENGINE=OLAP',
+        'DUPLICATE KEY(%s)' % ', '.join('`%s`' % c for c in key_columns),
+        'COMMENT \'\'',
+        'PARTITION BY RANGE(`%s`) ()' % partition_column,
+        'DISTRIBUTED BY HASH(`%s`) BUCKETS %d' % (bucket_column, default_buckets),
+        'PROPERTIES (',
+        '    "replication_num" = "3",',
+        '    "dynamic_partition.enable" = "false",',
+        '    "dynamic_partition.time_unit" = "%s",' % granularity,
+        '    "dynamic_partition.end" = "3",',
+        '    "dynamic_partition.prefix" = "p",',
+        '    "dynamic_partition.buckets" = "%d"' % default_buckets,
+        ');',
+    ]
+    for name, start, end, rows, size, buckets in plan:
+        lines.append('ALTER TABLE `%s` ADD PARTITION %s VALUES [(\'%s\'), (\'%s\')) '
+                     'DISTRIBUTED BY HASH(`%s`) BUCKETS %d; -- %d行, %.2fGB'
+                     % (table_name, name, start, end, bucket_column, buckets, rows, size / float(GB)))
+    # 历史分区建完后再开启动态分区（开启后不允许手动加分区）
+    lines.append('ALTER TABLE `%s` SET ("dynamic_partition.enable" = "true");' % table_name)
+    return lines
+
+
+def pick_column(preferred, names):
+    for name in preferred:
+        if name and name in names:
+            return name
+    return None
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='生成带分区和分桶建议的Doris建表语句')
+    parser.add_argument('inputs', nargs='*', help='表结构文件或目录，缺省时读标准输入')
+    parser.add_argument('--stats', required=True, help='分区统计文件')
+    parser.add_argument('--catalog', help='从本地表结构目录读取表结构')
+    parser.add_argument('--table', action='append', help='配合--catalog使用的表名通配符，可重复')
+    parser.add_argument('-o', '--out-dir', help='每张表输出一个SQL文件到该目录，缺省时合并输出到标准输出')
+    parser.add_argument('--partition-column', help='分区字段，缺省时依次尝试dt、pt_dt')
+    parser.add_argument('--bucket-column', help='分桶字段，缺省时依次尝试id、第一个非分区字段')
+    parser.add_argument('--min-tablet-gb', type=float, default=DEFAULT_MIN_TABLET_BYTES / GB, help='tablet目标下限(GB)')
+    parser.add_argument('--max-tablet-gb', type=float, default=DEFAULT_MAX_TABLET_BYTES / GB, help='tablet目标上限(GB)')
+    parser.add_argument('--max-buckets', type=int, default=DEFAULT_MAX_BUCKETS, help='单个分区分桶数上限')
+    args = parser.parse_args()
+
+    if args.catalog:
+        blocks = load_catalog_blocks(args.catalog, args.table or ['*'])
+    else:
+        blocks = load_batch_blocks(args.inputs)
+    partition_stats = load_partition_stats(args.stats)
+    min_tablet_bytes = args.min_tablet_gb * GB
+    max_tablet_bytes = args.max_tablet_gb * GB
+
+    if args.out_dir:
+        os.makedirs(args.out_dir, exist_ok=True)
+    combined = []
+    for table_name, fields in blocks:
+        names = [field[0] for field in fields]
+        partition_column = pick_column([args.partition_column, 'dt', 'pt_dt'], names)
+        if not partition_column:
+            sys.stderr.write('%s: 找不到分区字段，跳过\n' % table_name)
+            continue
+        bucket_column = pick_column([args.bucket_column, 'id'] + [n for n in names if n != partition_column],
+                                    names)
+        partitions = partition_stats.get(table_name, [])
+        granularity = recommend_granularity(partitions, min_tablet_bytes)
+        plan = plan_partitions(partitions, granularity, max_tablet_bytes, args.max_buckets)
+        # 新分区按最近3个分区的最大分桶数，留出增长空间
+        default_buckets = max([p[5] for p in plan[-3:]] + [1])
+        sql_lines = gen_doris_table_sql(table_name, fields, partition_column, bucket_column or partition_column,
+                                        plan, granularity, default_buckets)
+        tablet_count = sum(p[5] for p in plan)
+        summary = '-- %s: 分区粒度%s, %d个分区, 共%d个tablet(单副本), 新分区分桶数%d' % (
+            table_name, granularity, len(plan), tablet_count, default_buckets)
+        if args.out_dir:
+            with open(os.path.join(args.out_dir, table_name + '.sql'), 'w', encoding='utf-8') as f:
+                f.write('\n'.join([summary] + sql_lines) + '\n')
+        else:
+            combined += [summary] + sql_lines + ['']
+    if not args.out_dir:
+        sys.stdout.write('\n'.join(combined))
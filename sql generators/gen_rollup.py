@@ -0,0 +1,306 @@
+# 脚本调用示例：
+# gen_rollup.py query_log.tsv                          按查询日志推荐物化视图
+# gen_rollup.py query_log.tsv --stats column_stats.tsv -k 5 --rollup
+#
+# 查询日志：带表头的制表符分隔文件，需有query列，可选duration列（毫秒，作为查询权重）；
+#          没有表头时每行视为一条SQL，权重为1
+# 字段统计：与 type_advisor.py 相同的统计文件，用distinct_count和row_count估算物化视图的行数
+#
+# 只统计单表聚合查询（含JOIN的查询跳过）。每条查询的 group by 列和 where 过滤列作为维度，
+# sum/min/max/count 作为指标；维度和指标分别编码为位掩码，按(表, 维度掩码, 指标掩码)计数。
+# 不同的查询模式数量超过上限时按Space-Saving算法淘汰低频模式，内存占用有上界。
+# 最后贪心选出覆盖查询权重最多的k个组合：维度和指标都是某个物化视图子集的查询可以命中它
+
+import argparse
+import csv
+import functools
+import heapq
+import itertools
+import re
+import sys
+
+from type_advisor import load_column_stats
+
+DEFAULT_MAX_PATTERNS = 10000
+DEFAULT_MAX_CANDIDATES = 500
+AGGREGATE_PATTERN = re.compile(r'\b(sum|min|max|count)\s*\(\s*(distinct\s+)?([\w.`*]+)\s*\)', re.IGNORECASE)
+FILTER_PATTERN = re.compile(r'([\w.`]+)\s*(?:=|<>|!=|>=|<=|>|<|\bin\b|\bbetween\b|\blike\b)', re.IGNORECASE)
+CLAUSE_END = r'(?=\bhaving\b|\border\s+by\b|\blimit\b|\bunion\b|$)'
+WHERE_END = r'(?=\bgroup\s+by\b|\bhaving\b|\border\s+by\b|\blimit\b|\bunion\b|$)'
+SQL_KEYWORDS = {'and', 'or', 'not', 'null', 'is', 'case', 'when', 'then', 'else', 'end'}
+
+
+class SpaceSavingCounter:
+    """
+    容量固定的频率计数（Space-Saving），满了以后新元素替换当前最小计数的元素
+    最小计数用惰性最小堆维护：计数增加时压入新条目，旧条目留在堆里，弹出时与当前计数不符的丢弃；
+    堆中过期条目过多时按当前计数重建，淘汰的均摊代价为O(log k)
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.counts = {}
+        self.heap = []
+        self.sequence = itertools.count()
+
+    def add(self, key, weight=1):
+        if key in self.counts or len(self.counts) < self.capacity:
+            count = self.counts[key] = self.counts.get(key, 0) + weight
+        else:
+            count = self.counts[key] = self.counts.pop(self.pop_min()) + weight
+        heapq.heappush(self.heap, (count, next(self.sequence), key))
+        if len(self.heap) > 2 * self.capacity + 64:
+            self.heap = [(count, next(self.sequence), key) for key, count in self.counts.items()]
+            heapq.heapify(self.heap)
+
+    def pop_min(self):
+        """返回当前计数最小的元素（不从counts中删除）"""
+        while True:
+            count, _, key = heapq.heappop(self.heap)
+            if self.counts.get(key) == count:
+                return key
+
+    def items(self):
+        return self.counts.items()
+
+
+class ColumnInterner:
+    """每张表的列名/指标到位序号的映射"""
+
+    def __init__(self):
+        self.ids = {}
+        self.names = []
+
+    def bit(self, name):
+        if name not in self.ids:
+            self.ids[name] = len(self.names)
+            self.names.append(name)
+        return 1 << self.ids[name]
+
+    def decode(self, mask):
+        return [name for i, name in enumerate(self.names) if mask >> i & 1]
+
+
+def strip_literals(sql):
+    """去掉注释和字符串常量，合并空白"""
+    sql = re.sub(r'--[^\n]*', ' ', sql)
+    sql = re.sub(r'/\*.*?\*/', ' ', sql, flags=re.DOTALL)
+    sql = re.sub(r"'(?:[^'\\]|\\.)*'", "''", sql)
+    return ' '.join(sql.split())
+
+
+def split_top_level(text):
+    parts = []
+    depth = 0
+    current = []
+    for char in text:
+        if char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+        elif char == ',' and depth == 0:
+            parts.append(''.join(current).strip())
+            current = []
+            continue
+        current.append(char)
+    if ''.join(current).strip():
+        parts.append(''.join(current).strip())
+    return parts
+
+
+def column_name(expr):
+    """去掉表别名和反引号"""
+    return expr.replace('`', '').split('.')[-1].strip()
+
+
+def parse_query(sql):
+    """
+    解析一条单表聚合查询，返回(表名, 维度列集合, 指标集合)，不支持的查询返回None
+    指标为(函数, 列)元组，如('sum', 'amount')
+    """
+    return parse_normalized_query(strip_literals(sql))
+
+
+@functools.lru_cache(maxsize=100000)
+def parse_normalized_query(sql):
+    """去掉常量后的查询文本在看板中大量重复，解析结果按文本缓存"""
+    lowered = sql.lower()
+    if not lowered.startswith('select') or re.search(r'\bjoin\b', lowered):
+        return None
+    match = re.match(r'select\s+(.*?)\s+from\s+([\w.`]+)(.*)$', sql, re.IGNORECASE)
+    if not match:
+        return None
+    select_items = split_top_level(match.group(1))
+    table_name = match.group(2).replace('`', '')
+    rest = match.group(3)
+
+    dimensions = set()
+    group_match = re.search(r'\bgroup\s+by\s+(.*?)' + CLAUSE_END, rest, re.IGNORECASE)
+    if group_match:
+        for item in split_top_level(group_match.group(1)):
+            if item.isdigit() and 0 < int(item) <= len(select_items):
+                # group by 1 指向select中的第1项，去掉别名
+                item = re.split(r'\s+as\s+|\s+', select_items[int(item) - 1], flags=re.IGNORECASE)[0]
+            if re.match(r'^[\w.`]+$', item):
+                dimensions.add(column_name(item))
+
+    where_match = re.search(r'\bwhere\s+(.*?)' + WHERE_END, rest, re.IGNORECASE)
+    if where_match:
+        for expr in FILTER_PATTERN.findall(where_match.group(1)):
+            name = column_name(expr)
+            if name.lower() not in SQL_KEYWORDS and not name.isdigit():
+                dimensions.add(name)
+
+    aggregates = set()
+    for func, distinct, expr in AGGREGATE_PATTERN.findall(match.group(1)):
+        func = func.lower()
+        if distinct:
+            # 精确去重无法由sum/min/max/count汇总，需要bitmap，不纳入推荐
+            return None
+        aggregates.add((func, '*' if expr == '*' or expr.isdigit() else column_name(expr)))
+    if not aggregates and not group_match:
+        return None
+    return table_name, frozenset(dimensions), frozenset(aggregates)
+
+
+def read_query_log(log_path):
+    """逐条返回(SQL, 权重)"""
+    with open(log_path, encoding='utf-8', newline='') as f:
+        first_line = f.readline()
+        header = first_line.rstrip('\r\n').split('\t')
+        if 'query' in header:
+            for row in csv.DictReader(f, fieldnames=header, delimiter='\t'):
+                weight = row.get('duration') or row.get('cost') or 1
+                yield row['query'], float(weight)
+        else:
+            f.seek(0)
+            for line in f:
+                if line.strip():
+                    yield line, 1.0
+
+
+def count_patterns(queries, max_patterns=DEFAULT_MAX_PATTERNS):
+    """统计查询模式，返回(计数器, {表名: 维度编码器}, {表名: 指标编码器}, 已解析条数, 跳过条数)"""
+    counter = SpaceSavingCounter(max_patterns)
+    dimension_interners = {}
+    aggregate_interners = {}
+    parsed = skipped = 0
+    for sql, weight in queries:
+        result = parse_query(sql)
+        if not result:
+            skipped += 1
+            continue
+        parsed += 1
+        table_name, dimensions, aggregates = result
+        dimension_interner = dimension_interners.setdefault(table_name, ColumnInterner())
+        aggregate_interner = aggregate_interners.setdefault(table_name, ColumnInterner())
+        dimension_mask = 0
+        for name in dimensions:
+            dimension_mask |= dimension_interner.bit(name)
+        aggregate_mask = 0
+        for aggregate in aggregates:
+            aggregate_mask |= aggregate_interner.bit(aggregate)
+        counter.add((table_name, dimension_mask, aggregate_mask), weight)
+    return counter, dimension_interners, aggregate_interners, parsed, skipped
+
+
+def select_rollups(counter, top_k, max_candidates=DEFAULT_MAX_CANDIDATES):
+    """
+    贪心选出覆盖剩余查询权重最多的k个模式，返回[(表名, 维度掩码, 指标掩码, 覆盖权重, 覆盖模式数), ...]
+    候选只取权重最高的max_candidates个模式，覆盖计算只在同一张表的模式之间进行
+    """
+    patterns = sorted(counter.items(), key=lambda x: -x[1])
+    candidates = [key for key, _ in patterns[:max_candidates]]
+    remaining = {}
+    for (table_name, dimension_mask, aggregate_mask), weight in patterns:
+        remaining.setdefault(table_name, {})[(dimension_mask, aggregate_mask)] = weight
+
+    chosen = []
+    while len(chosen) < top_k:
+        best = None
+        for table_name, dimension_mask, aggregate_mask in candidates:
+            covered_weight = 0
+            covered_count = 0
+            for (other_dimensions, other_aggregates), weight in remaining.get(table_name, {}).items():
+                if other_dimensions & ~dimension_mask == 0 and other_aggregates & ~aggregate_mask == 0:
+                    covered_weight += weight
+                    covered_count += 1
+            if best is None or covered_weight > best[3]:
+                best = (table_name, dimension_mask, aggregate_mask, covered_weight, covered_count)
+        if not best or best[3] <= 0:
+            break
+        chosen.append(best)
+        remaining[best[0]] = {key: weight for key, weight in remaining[best[0]].items()
+                              if not (key[0] & ~best[1] == 0 and key[1] & ~best[2] == 0)}
+    return chosen
+
+
+def estimate_reduction(table_name, dimensions, stats):
+    """按各维度不同值数量的乘积估算物化视图行数，返回(估算行数, 原表行数)，缺少统计时返回None"""
+    row_count = None
+    estimated = 1
+    for name in dimensions:
+        stat = stats.get((table_name, name))
+        if not stat or stat['distinct_count'] is None or not stat['row_count']:
+            return None
+        row_count = stat['row_count']
+        estimated *= stat['distinct_count']
+    if row_count is None:
+        return None
+    return min(estimated, row_count), row_count
+
+
+def format_aggregate(func, column):
+    if func == 'count':
+        return 'count(%s)' % ('1' if column == '*' else '`%s`' % column)
+    return '%s(`%s`)' % (func, column)
+
+
+def gen_rollup_sql(index, table_name, dimensions, aggregates, as_rollup):
+    short_name = table_name.split('.')[-1]
+    if as_rollup:
+        columns = list(dimensions) + [column for _, column in aggregates if column != '*' and column not in dimensions]
+        return ['ALTER TABLE `%s` ADD ROLLUP r_%s_%d (%s);'
+                % (table_name, short_name, index, ', '.join('`%s`' % c for c in columns))]
+    lines = ['CREATE MATERIALIZED VIEW mv_%s_%d AS' % (short_name, index), 'select']
+    items = ['`%s`' % d for d in dimensions] + [format_aggregate(func, column) for func, column in aggregates]
+    for i, item in enumerate(items):
+        lines.append('    %s%s' % (' ' if i == 0 else ',', item))
+    lines.append('from `%s`' % table_name)
+    if dimensions:
+        lines.append('group by %s' % ', '.join('`%s`' % d for d in dimensions))
+    lines[-1] += ';'
+    return lines
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='根据查询日志推荐Doris物化视图/Rollup')
+    parser.add_argument('log', help='查询日志文件')
+    parser.add_argument('--stats', help='字段统计文件，用于估算行数减少比例')
+    parser.add_argument('-k', '--top-k', type=int, default=10, help='推荐数量')
+    parser.add_argument('--max-patterns', type=int, default=DEFAULT_MAX_PATTERNS, help='最多保留的查询模式数')
+    parser.add_argument('--rollup', action='store_true', help='输出ALTER TABLE ADD ROLLUP而不是物化视图')
+    args = parser.parse_args()
+
+    column_stats = load_column_stats(args.stats) if args.stats else {}
+    pattern_counter, dimension_interners, aggregate_interners, parsed_count, skipped_count = count_patterns(
+        read_query_log(args.log), args.max_patterns)
+    total_weight = sum(weight for _, weight in pattern_counter.items()) or 1
+    sys.stderr.write('解析%d条查询，跳过%d条，%d种查询模式\n' % (parsed_count, skipped_count, len(pattern_counter.counts)))
+
+    output = []
+    for i, (table, dimension_mask, aggregate_mask, weight, count) in enumerate(
+            select_rollups(pattern_counter, args.top_k), 1):
+        rollup_dimensions = sorted(dimension_interners[table].decode(dimension_mask))
+        rollup_aggregates = sorted(aggregate_interners[table].decode(aggregate_mask))
+        reduction = estimate_reduction(table, rollup_dimensions, column_stats)
+        if reduction:
+            reduction_text = '预计%d行(原表%d行，减少%.1f%%)' % (
+                reduction[0], reduction[1], 100.0 * (1 - float(reduction[0]) / reduction[1]))
+        else:
+            reduction_text = '行数减少比例未知(缺少字段统计)'
+        output.append('-- #%d %s: 覆盖%d种查询模式，占查询权重%.1f%%，%s' % (
+            i, table, count, 100.0 * weight / total_weight, reduction_text))
+        output += gen_rollup_sql(i, table, rollup_dimensions, rollup_aggregates, args.rollup)
+        output.append('')
+    sys.stdout.write('\n'.join(output))
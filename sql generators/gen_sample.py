@@ -0,0 +1,161 @@
+# 脚本调用示例：
+# gen_sample.py tables.txt --counts data_count.db                      Hive，按哈希取模采样
+# gen_sample.py tables.txt --counts data_count.db --dialect doris
+# gen_sample.py --catalog catalog.db --table 'ods_*' --counts data_count.db --method tablesample
+#
+# 替代chrome插件genSQL.js中的sampleData模板（order by rand() limit 200）：
+# order by rand()需要对整个分区排序，大表要跑几分钟；这里改为按主键哈希取模过滤，
+# 采样比例由分区行数计算，只扫描不排序，同一张表每次取到的样本相同
+#
+# 表清单每行一张表，空白分隔，分区字段和采样键可省略（使用--partition-column/--key-column）：
+#   mart_bikedw.app_spock_fault_link  pt_dt  link_id
+# 分区行数取自 gen_data_count.py load 导入的本地结果库（每张表最新分区）
+
+import argparse
+import math
+import sys
+
+from date_macro import expand, parse_run_date
+from gen_data_count import PARTITION_COLUMN_CANDIDATES, open_result_db
+
+DEFAULT_PARTITION_COLUMN = 'pt_dt'
+DEFAULT_KEY_COLUMN = 'id'
+DEFAULT_SAMPLE_ROWS = 200
+# 哈希不完全均匀，按目标行数的倍数放大采样比例，再按哈希值排序后用limit截断，保证结果可复现
+SAMPLE_HEADROOM = 2.0
+# 没有行数统计时假定的分区行数
+DEFAULT_ASSUMED_ROWS = 10000000
+# 哈希取模的模数，决定采样比例的精度（最小万分之一）
+HASH_MODULUS = 10000
+
+DIALECTS = ('hive', 'doris')
+METHODS = ('hash', 'tablesample')
+
+# 各方言的哈希函数，结果可能为负数，统一取绝对值
+HASH_EXPRESSIONS = {
+    'hive': 'pmod(hash(t.{key}), {modulus})',
+    'doris': 'abs(murmur_hash3_32(t.{key})) % {modulus}',
+}
+
+
+def read_table_list(lines, partition_column, key_column):
+    """读取表清单，返回[(表名, 分区字段, 采样键), ...]"""
+    tables = []
+    for line in lines:
+        stripped = line.strip()
+        if not stripped or stripped.startswith('--') or stripped.startswith('#'):
+            continue
+        parts = stripped.split()
+        tables.append((parts[0],
+                       parts[1] if len(parts) > 1 else partition_column,
+                       parts[2] if len(parts) > 2 else key_column))
+    return tables
+
+
+def load_catalog_tables(db_path, patterns, key_column):
+    """从本地表结构目录读取表，采样键优先用key_column，没有时用第一个非分区字段"""
+    from gen_view import load_catalog_blocks
+    tables = []
+    for table_name, fields in load_catalog_blocks(db_path, patterns):
+        names = [field[0] for field in fields]
+        partition_column = next((c for c in PARTITION_COLUMN_CANDIDATES if c in names), None)
+        if not partition_column:
+            sys.stderr.write('%s: 找不到分区字段，跳过\n' % table_name)
+            continue
+        others = [name for name in names if name != partition_column]
+        if not others:
+            sys.stderr.write('%s: 没有可用的采样键，跳过\n' % table_name)
+            continue
+        tables.append((table_name, partition_column, key_column if key_column in names else others[0]))
+    return tables
+
+
+def latest_row_counts(db_path):
+    """每张表最新分区的行数，返回{表名: 行数}"""
+    conn = open_result_db(db_path)
+    try:
+        rows = conn.execute(
+            'SELECT table_name, row_count FROM data_count d '
+            'WHERE partition_value = (SELECT max(partition_value) FROM data_count WHERE table_name = d.table_name)')
+        return dict(rows.fetchall())
+    finally:
+        conn.close()
+
+
+def sample_ratio(row_count, sample_rows):
+    """采样比例，不超过1"""
+    if row_count <= 0:
+        return 1.0
+    return min(1.0, sample_rows * SAMPLE_HEADROOM / row_count)
+
+
+def gen_sample_sql(table_name, partition_column, key_column, ratio, sample_rows, dialect, method):
+    """生成一张表的采样SQL，返回输出行列表"""
+    lines = ['-- %s - 示例数据（采样比例%.4f%%）' % (table_name, ratio * 100)]
+    lines += ['select', 't.*']
+    if ratio >= 1.0:
+        lines.append('from %s t' % table_name)
+        lines.append('where t.%s=\'$$yesterday\'' % partition_column)
+    elif method == 'tablesample':
+        if dialect == 'hive':
+            # 分桶采样，按采样键哈希，与分区内文件组织无关
+            buckets = max(2, int(1 / ratio))
+            lines.append('from %s tablesample(bucket 1 out of %d on %s) t' % (table_name, buckets, key_column))
+        else:
+            # Doris按tablet抽样，REPEATABLE固定种子保证结果可复现
+            percent = max(1, int(math.ceil(ratio * 100)))
+            lines.append('from %s tablesample(%d percent) repeatable 1 t' % (table_name, percent))
+        lines.append('where t.%s=\'$$yesterday\'' % partition_column)
+    else:
+        threshold = max(1, int(math.ceil(ratio * HASH_MODULUS)))
+        hash_expression = HASH_EXPRESSIONS[dialect].format(key=key_column, modulus=HASH_MODULUS)
+        lines.append('from %s t' % table_name)
+        lines.append('where t.%s=\'$$yesterday\'' % partition_column)
+        lines.append('and %s < %d' % (hash_expression, threshold))
+        lines.append('order by %s, t.%s' % (hash_expression, key_column))
+    lines.append('limit %d;' % sample_rows)
+    return lines
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='批量生成可复现的采样SQL')
+    parser.add_argument('inputs', nargs='*', help='表清单文件，缺省时读标准输入')
+    parser.add_argument('--catalog', help='从本地表结构目录取表')
+    parser.add_argument('--table', action='append', help='配合--catalog使用的表名通配符，可重复')
+    parser.add_argument('--counts', help='gen_data_count.py导入的结果库，用于计算采样比例')
+    parser.add_argument('--dialect', choices=DIALECTS, default='hive')
+    parser.add_argument('--method', choices=METHODS, default='hash', help='hash为哈希取模，tablesample为引擎自带采样')
+    parser.add_argument('--partition-column', default=DEFAULT_PARTITION_COLUMN, help='表清单中未写分区字段时使用')
+    parser.add_argument('--key-column', default=DEFAULT_KEY_COLUMN, help='采样键，表清单中未写时使用')
+    parser.add_argument('--rows', type=int, default=DEFAULT_SAMPLE_ROWS, help='每张表采样行数')
+    parser.add_argument('--run-date', help='指定运行日期时把$$yesterday展开为日期常量')
+    parser.add_argument('--assumed-rows', type=int, default=DEFAULT_ASSUMED_ROWS, help='没有行数统计时假定的分区行数')
+    args = parser.parse_args()
+
+    if args.catalog:
+        tables = load_catalog_tables(args.catalog, args.table or ['*'], args.key_column)
+    elif args.inputs:
+        tables = []
+        for path in args.inputs:
+            with open(path, encoding='utf-8') as f:
+                tables += read_table_list(f, args.partition_column, args.key_column)
+    else:
+        tables = read_table_list(sys.stdin, args.partition_column, args.key_column)
+    row_counts = latest_row_counts(args.counts) if args.counts else {}
+
+    output = []
+    missing = 0
+    for table_name, partition_column, key_column in tables:
+        row_count = row_counts.get(table_name)
+        if row_count is None:
+            missing += 1
+            row_count = args.assumed_rows
+        ratio = sample_ratio(row_count, args.rows)
+        output += gen_sample_sql(table_name, partition_column, key_column, ratio, args.rows,
+                                 args.dialect, args.method)
+        output.append('')
+    if missing:
+        sys.stderr.write('%d张表没有行数统计，按%d行计算采样比例\n' % (missing, args.assumed_rows))
+    if args.run_date:
+        output = [expand(line, parse_run_date(args.run_date)) for line in output]
+    sys.stdout.write('\n'.join(output))
@@ -1,51 +1,306 @@
+# 脚本调用示例：
+# 1. 单表模式：从魔数复制字段列表粘贴到标准输入，空行结束
+#    gen_view.py
+# 2. 批量模式：一次处理多个表
+#    gen_view.py --batch schemas/                   目录下每个文件为一张表，文件名即表名
+#    gen_view.py --batch all_tables.txt -o out/     多个表拼接在一个文件中，每张表输出一个文件
+#    gen_view.py --batch < all_tables.txt > all.sql 从标准输入读取，合并输出为一个脚本
+#    拼接格式：每个表块以单独一行的表名开头，后接字段列表，表块之间用空行分隔
+#    gen_view.py --catalog catalog.db --table 'ods_*'  从本地表结构目录（schema_catalog.py）按表名通配符生成
+# 3. 增量模式：批量模式加 --snapshot，只为字段列表相对上次快照有变化的表生成SQL
+#    gen_view.py --catalog catalog.db --snapshot view_snapshot.json -o out/
+#    新表（包括第一次运行时的所有表）生成DROP + CREATE，字段有变化的表生成ALTER VIEW（保留视图本身，
+#    下游依赖和权限不受影响），未变化的表不输出
+# 4. 类型收窄：批量模式加 --stats，按字段统计（type_advisor.py）CAST为更窄的类型，加 --ctas 输出建表语句
+#    gen_view.py --catalog catalog.db --table 'ods_*' --stats column_stats.tsv --ctas
+
+import argparse
+import hashlib
+import json
+import os
 import sys
 
+from type_advisor import load_column_stats, build_casts
+
+
+def parse_field_line(line):
+    """解析一行字段信息，返回(字段名, 注释, 类型)，表头和需要跳过的字段返回None"""
+    line_splited = line.rstrip('\r\n').split('\t')
+    line_splited += [''] * (3 - len(line_splited))
+    return normalize_field(line_splited[0], line_splited[1], line_splited[2])
+
+
+def normalize_field(l1, l2, l3):
+    """字段名/注释的统一处理，需要跳过的字段返回None"""
+    # 做一点处理
+    if l1 == '字段名' or '_update_timestamp' in l1:
+        return None
+    elif '[P]' in l1:
+        l1 = l1.split(' ')[0]
+    if l1 == 'id' and l2 == '':
+        l2 = '主键'
+    return l1, l2, l3
 
-def print_new_line(sql_type, index, comma):
-    output = '    ' + comma + '`' + field_name[index] + '`'
+
+def format_new_line(sql_type, field_name, comment, max_field_name_length, comma):
+    output = '    ' + comma + '`' + field_name + '`'
     if sql_type == 1:
-        output += ' ' * (max_field_name_length - len(field_name[index]) + 1) + 'COMMENT' + ' \'' + comment[index] + '\''
-    print(output)
+        output += ' ' * (max_field_name_length - len(field_name) + 1) + 'COMMENT' + ' \'' + comment + '\''
+    return output
 
 
-if __name__ == '__main__':
-    field_name = []
-    comment = []
-    field_type = []
-    max_field_name_length = 0
+def format_select_line(field_name, comma, casts):
+    """select中的一列，有推荐类型时CAST，有备注时附在行尾"""
+    target_type, note = casts.get(field_name, (None, ''))
+    if target_type:
+        output = '    ' + comma + 'CAST(`' + field_name + '` AS ' + target_type + ') AS `' + field_name + '`'
+    else:
+        output = format_new_line(2, field_name, '', 0, comma)
+    if note:
+        output += ' -- ' + note
+    return output
+
+
+def gen_ctas_sql(fields, table_name, source_table='', casts=None):
+    """生成CTAS建表SQL，字段按casts中的推荐类型CAST"""
+    lines = ['CREATE TABLE IF NOT EXISTS `%s`' % table_name, 'AS', 'select']
+    for i, (name, _, _) in enumerate(fields):
+        lines.append(format_select_line(name, ' ' if i == 0 else ',', casts or {}))
+    lines.append('from %s;' % source_table)
+    return lines
+
+
+def gen_view_sql(fields, view_name='$target.table', source_table='', drop=True, casts=None, alter=False):
+    """
+    根据字段列表[(字段名, 注释, 类型), ...]生成建视图SQL，返回输出行列表
+    alter为True时生成ALTER VIEW，就地替换已有视图的定义
+    """
+    max_field_name_length = max([len(f[0]) for f in fields] + [0])
+    if alter:
+        lines = ['ALTER VIEW `%s`' % view_name, '(']
+    else:
+        lines = ['DROP VIEW IF EXISTS `%s`;' % view_name] if drop else []
+        lines += ['CREATE VIEW IF NOT EXISTS `%s`' % view_name,
+                  '(']
+    for i, (name, comment, _) in enumerate(fields):
+        lines.append(format_new_line(1, name, comment, max_field_name_length, ' ' if i == 0 else ','))
+    lines.append(')' if alter else ') COMMENT \'\'')
+    lines.append('AS')
+    lines.append('select')
+    for i, (name, comment, _) in enumerate(fields):
+        comma = ' ' if i == 0 else ','
+        if casts:
+            lines.append(format_select_line(name, comma, casts))
+        else:
+            lines.append(format_new_line(2, name, comment, max_field_name_length, comma))
+    lines.append('from %s;' % source_table)
+    return lines
+
+
+def read_schema_blocks(lines, default_table_name=None):
+    """
+    从行序列中读取多个表块，返回[(表名, 字段列表), ...]
+    表块之间用空行分隔；不含制表符的行视为表名，以'--'开头的行为注释
+    """
+    blocks = []
+    table_name = default_table_name
+    fields = []
+    for line in lines:
+        stripped = line.strip()
+        if stripped == '':
+            if fields:
+                blocks.append((table_name or 'table_%d' % (len(blocks) + 1), fields))
+                table_name = None
+                fields = []
+            continue
+        if stripped.startswith('--'):
+            continue
+        if '\t' not in line:
+            table_name = stripped
+            continue
+        field = parse_field_line(line)
+        if field:
+            fields.append(field)
+    if fields:
+        blocks.append((table_name or 'table_%d' % (len(blocks) + 1), fields))
+    return blocks
+
+
+def iter_input_files(paths):
+    """展开输入路径，目录下的文件按文件名排序"""
+    for path in paths:
+        if os.path.isdir(path):
+            for name in sorted(os.listdir(path)):
+                file_path = os.path.join(path, name)
+                if os.path.isfile(file_path) and not name.startswith('.'):
+                    yield file_path
+        else:
+            yield path
+
+
+def load_batch_blocks(paths):
+    """读取所有输入中的表块；目录中的单表文件以文件名作为默认表名"""
+    if not paths:
+        return read_schema_blocks(sys.stdin)
+    blocks = []
+    for file_path in iter_input_files(paths):
+        default_name = os.path.splitext(os.path.basename(file_path))[0]
+        with open(file_path, encoding='utf-8') as f:
+            file_blocks = read_schema_blocks(f)
+        # 单表文件没有写表名时使用文件名
+        if len(file_blocks) == 1 and file_blocks[0][0] == 'table_1':
+            file_blocks = [(default_name, file_blocks[0][1])]
+        blocks.extend(file_blocks)
+    return blocks
+
+
+def load_catalog_blocks(db_path, patterns):
+    """从本地表结构目录中一次查询所有匹配表"""
+    from schema_catalog import open_catalog, load_table_fields
+    catalog = open_catalog(db_path)
+    try:
+        tables = load_table_fields(catalog, patterns)
+    finally:
+        catalog.close()
+    blocks = []
+    for table_name, raw_fields in tables:
+        fields = [field for field in (normalize_field(*raw_field) for raw_field in raw_fields) if field]
+        blocks.append((table_name, fields))
+    return blocks
+
+
+def format_table_template(template, table_name):
+    """{table}为完整表名（可能带库名），{name}为去掉库名后的表名"""
+    return template.format(table=table_name, name=table_name.split('.')[-1])
+
+
+def hash_fields(fields):
+    """字段列表（按原始顺序）的摘要，字段名、注释、类型任一变化都会改变摘要"""
+    text = '\n'.join('\t'.join(field) for field in fields)
+    return hashlib.md5(text.encode('utf-8')).hexdigest()
+
+
+def load_snapshot(snapshot_path):
+    if not os.path.exists(snapshot_path):
+        return {}
+    with open(snapshot_path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_snapshot(snapshot_path, snapshot):
+    """先写临时文件再替换，避免中断时留下不完整的快照"""
+    tmp_path = snapshot_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(snapshot, f, ensure_ascii=False, indent=0, sort_keys=True)
+    os.replace(tmp_path, snapshot_path)
+
+
+def diff_blocks(blocks, snapshot):
+    """
+    对比快照，返回(需要输出的[(表名, 字段列表, 是否ALTER)], 新快照, 统计)
+    快照中没有的表不确定视图是否已存在（可能是旧字段），DROP + CREATE；字段有变化的表ALTER VIEW
+    新快照只包含本次输入的表；上次有、本次没有的表计为已删除（仅提示，不生成SQL）
+    """
+    changed = []
+    new_snapshot = {}
+    stats = {'new': 0, 'changed': 0, 'unchanged': 0, 'removed': 0}
+    for table_name, fields in blocks:
+        digest = hash_fields(fields)
+        new_snapshot[table_name] = digest
+        old_digest = snapshot.get(table_name)
+        if old_digest is None:
+            stats['new'] += 1
+            changed.append((table_name, fields, False))
+        elif old_digest != digest:
+            stats['changed'] += 1
+            changed.append((table_name, fields, True))
+        else:
+            stats['unchanged'] += 1
+    stats['removed'] = len(set(snapshot) - set(new_snapshot))
+    return changed, new_snapshot, stats
+
+
+def run_batch(args):
+    if args.catalog:
+        blocks = load_catalog_blocks(args.catalog, args.table or ['*'])
+    else:
+        blocks = load_batch_blocks(args.inputs)
+    if args.snapshot:
+        snapshot = load_snapshot(args.snapshot)
+        # 未指定全部表时，本次没有涉及的表保留在快照中
+        if args.table or args.inputs:
+            snapshot_scope = {table_name for table_name, _ in blocks}
+            kept = {k: v for k, v in snapshot.items() if k not in snapshot_scope}
+            snapshot = {k: v for k, v in snapshot.items() if k in snapshot_scope}
+        else:
+            kept = {}
+        jobs, new_snapshot, stats = diff_blocks(sorted(blocks), snapshot)
+        new_snapshot.update(kept)
+        sys.stderr.write('新增%(new)d张，变化%(changed)d张，未变化%(unchanged)d张，已删除%(removed)d张\n' % stats)
+    else:
+        jobs = [(table_name, fields, False) for table_name, fields in blocks]
+    stats = {}
+    if args.stats:
+        stats = load_column_stats(args.stats)
+    if args.out_dir:
+        os.makedirs(args.out_dir, exist_ok=True)
+    combined = []
+    for table_name, fields, alter in jobs:
+        casts = None
+        if args.stats:
+            casts = build_casts(table_name, fields, stats)
+        if args.ctas:
+            sql_lines = gen_ctas_sql(fields,
+                                     format_table_template(args.view_name, table_name),
+                                     format_table_template(args.source_table, table_name),
+                                     casts)
+        else:
+            sql_lines = gen_view_sql(fields,
+                                     format_table_template(args.view_name, table_name),
+                                     format_table_template(args.source_table, table_name),
+                                     casts=casts, alter=alter)
+        if args.out_dir:
+            with open(os.path.join(args.out_dir, table_name + '.sql'), 'w', encoding='utf-8') as f:
+                f.write('\n'.join(sql_lines) + '\n')
+        else:
+            combined.append('-- ' + table_name)
+            combined.extend(sql_lines)
+            combined.append('')
+    if args.out_dir:
+        sys.stderr.write('已生成%d个表的SQL至%s\n' % (len(jobs), args.out_dir))
+    else:
+        sys.stdout.write('\n'.join(combined))
+    if args.snapshot:
+        save_snapshot(args.snapshot, new_snapshot)
+
+
+def run_single():
+    fields = []
     for line in sys.stdin:
         if line == '\n':
             print('========== 以下为SQL输出 ==========')
             print()
-            print('DROP VIEW IF EXISTS `$target.table`;')
-            print('CREATE VIEW IF NOT EXISTS `$target.table`')
-            print('(')
-            print_new_line(1, 0, ' ')
-            for i in range(1, len(field_name)):
-                print_new_line(1, i, ',')
-            print(') COMMENT \'\'')
-            print('AS')
-            print('select')
-            print_new_line(2, 0, ' ')
-            for i in range(1, len(field_name)):
-                print_new_line(2, i, ',')
-            print('from ;')
+            print('\n'.join(gen_view_sql(fields)))
             sys.exit(0)
-        line_splited = line.split('\n')[0].split('\t')
-        l1 = line_splited[0]
-        l2 = line_splited[1]
-        l3 = line_splited[2]
-        # 做一点处理
-        if l1 == '字段名' or '_update_timestamp' in l1:
-            continue
-        elif '[P]' in l1:
-            l1 = l1.split(' ')[0]
-        if l1 == 'id' and l2 == '':
-            l2 = '主键'
-        # 记录最大长度
-        if len(l1) > max_field_name_length:
-            max_field_name_length = len(l1)
-        # 写入数组
-        field_name.append(l1)
-        comment.append(l2)
-        field_type.append(l3)
+        field = parse_field_line(line)
+        if field:
+            fields.append(field)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='根据字段列表生成建视图SQL')
+    parser.add_argument('--batch', action='store_true', help='批量模式')
+    parser.add_argument('inputs', nargs='*', help='批量模式的输入文件或目录，缺省时读标准输入')
+    parser.add_argument('-o', '--out-dir', help='每张表输出一个SQL文件到该目录，缺省时合并输出到标准输出')
+    parser.add_argument('--view-name', default='$target.{name}', help='视图名模板，{table}为完整表名，{name}为不带库名的表名')
+    parser.add_argument('--source-table', default='{table}', help='来源表模板，{table}为完整表名，{name}为不带库名的表名')
+    parser.add_argument('--catalog', help='从本地表结构目录生成（隐含批量模式）')
+    parser.add_argument('--table', action='append', help='配合--catalog使用的表名通配符，可重复')
+    parser.add_argument('--snapshot', help='增量模式的字段快照文件，只输出字段有变化的表并更新快照')
+    parser.add_argument('--stats', help='字段统计文件，按统计CAST为更窄的类型')
+    parser.add_argument('--ctas', action='store_true', help='输出CTAS建表语句而不是视图')
+    args = parser.parse_args()
+    if args.batch or args.catalog:
+        run_batch(args)
+    else:
+        run_single()
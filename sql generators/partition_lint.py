@@ -0,0 +1,336 @@
+# 脚本调用示例：
+# partition_lint.py scripts/                                 检查目录下所有.sql/.hql文件，有问题时退出码为1
+# partition_lint.py --catalog catalog.db scripts/            只检查本地表结构目录中有分区字段的表
+# partition_lint.py --fix scripts/etl_order.sql              自动补上 pt_dt='$$yesterday' 并写回文件
+#
+# 找出没有分区条件的表引用（FROM/JOIN，包括子查询中的引用，CTE名称不算表）：
+# 同一个select块的WHERE/ON中出现 别名.pt_dt 或 pt_dt 的比较条件即视为已过滤
+# 不指定--catalog/--table-list时，所有带库名前缀的表（如mart.xxx）都视为分区表
+# --fix时FROM中的表补到WHERE，JOIN的表补到ON（外连接补到WHERE会改变语义）
+
+import argparse
+import bisect
+import os
+import re
+import sys
+
+from date_macro import expand, parse_run_date
+
+DEFAULT_PARTITION_COLUMN = 'pt_dt'
+DEFAULT_PARTITION_VALUE = "'$$yesterday'"
+SQL_EXTENSIONS = ('.sql', '.hql')
+
+TOKEN_PATTERN = re.compile(r'''
+    (?P<space>\s+)
+  | (?P<comment>--[^\n]*|/\*.*?\*/)
+  | (?P<string>'(?:[^'\\]|\\.)*'|"(?:[^"\\]|\\.)*")
+  | (?P<name>(?:`[^`]*`|[A-Za-z_][\w$]*)(?:\.(?:`[^`]*`|[A-Za-z_][\w$]*|\*))*)
+  | (?P<number>\d+(?:\.\d*)?)
+  | (?P<op><=|>=|<>|!=|==|.)
+''', re.VERBOSE | re.DOTALL)
+
+# 这些关键字之后不是别名
+NOT_ALIAS = {
+    'where', 'join', 'left', 'right', 'full', 'inner', 'outer', 'cross', 'semi', 'anti', 'natural', 'on', 'using',
+    'group', 'order', 'limit', 'having', 'union', 'intersect', 'except', 'minus', 'lateral', 'window', 'distribute',
+    'sort', 'cluster', 'select', 'from', 'insert', 'tablesample', 'partition', 'with',
+}
+JOIN_MODIFIERS = {'left', 'right', 'full', 'inner', 'outer', 'cross', 'semi', 'anti', 'natural'}
+# select块中WHERE/ON子句之后的子句
+CLAUSE_END = {'group', 'order', 'limit', 'having', 'window', 'distribute', 'sort', 'cluster', 'union', 'intersect',
+              'except', 'minus', 'lateral'}
+SET_OPERATORS = {'union', 'intersect', 'except', 'minus'}
+COMPARISON = {'=', '==', '<', '>', '<=', '>=', '<>', '!=', 'in', 'between', 'like', 'not'}
+
+
+class Token:
+    __slots__ = ('kind', 'text', 'offset', 'lower', 'depth', 'match')
+
+    def __init__(self, kind, text, offset):
+        self.kind = kind
+        self.text = text
+        self.offset = offset
+        self.lower = text.replace('`', '').lower() if kind == 'name' else text.lower()
+        self.depth = 0
+        self.match = None
+
+
+def tokenize(text):
+    """返回(全部token, 有效token)，有效token不含空白和注释，并计算括号深度和配对位置"""
+    tokens = [Token(m.lastgroup, m.group(), m.start()) for m in TOKEN_PATTERN.finditer(text)]
+    significant = [t for t in tokens if t.kind not in ('space', 'comment')]
+    stack = []
+    for i, token in enumerate(significant):
+        if token.text == '(':
+            token.depth = len(stack)
+            stack.append(i)
+        elif token.text == ')' and stack:
+            start = stack.pop()
+            significant[start].match = i
+            token.match = start
+            token.depth = len(stack)
+        else:
+            token.depth = len(stack)
+    return tokens, significant
+
+
+def collect_cte_names(significant):
+    """WITH name AS (...), name AS (...) 中定义的名称"""
+    names = set()
+    for i, token in enumerate(significant):
+        if token.lower != 'with':
+            continue
+        j = i + 1
+        while j + 2 < len(significant):
+            if (significant[j].kind == 'name' and significant[j + 1].lower == 'as'
+                    and significant[j + 2].text == '(' and significant[j + 2].match is not None):
+                names.add(significant[j].lower)
+                j = significant[j + 2].match + 1
+                if j < len(significant) and significant[j].text == ',':
+                    j += 1
+                    continue
+            break
+    return names
+
+
+def find_block(significant, index):
+    """
+    表引用所在select块的范围[start, end)，不在select/delete中（如extract(day from x)）返回None
+    """
+    depth = significant[index].depth
+    start = None
+    i = index - 1
+    while i >= 0:
+        token = significant[i]
+        if token.depth < depth or token.text == ';':
+            break
+        if token.depth == depth and token.lower in ('select', 'delete'):
+            start = i
+            break
+        i -= 1
+    if start is None:
+        return None
+    end = index + 1
+    while end < len(significant):
+        token = significant[end]
+        if token.depth < depth or token.text == ';' or (token.depth == depth and token.lower in SET_OPERATORS):
+            break
+        end += 1
+    return start, end
+
+
+def find_keyword(significant, keyword, start, end, depth, stops=()):
+    """在[start, end)中找同一深度的关键字，遇到stops中的关键字停止"""
+    for i in range(start, end):
+        token = significant[i]
+        if token.depth != depth:
+            continue
+        if token.lower == keyword:
+            return i
+        if token.lower in stops:
+            return None
+    return None
+
+
+def find_clause_end(significant, start, end, depth, stops):
+    """子句的结束位置：同一深度遇到stops中的关键字或块结束"""
+    for i in range(start, end):
+        token = significant[i]
+        if token.depth == depth and token.lower in stops:
+            return i
+    return end
+
+
+def has_top_level_or(significant, start, end, depth):
+    return any(t.depth == depth and t.lower == 'or' for t in significant[start:end])
+
+
+def compared_columns(significant, start, end):
+    """块内出现在比较条件中的字段引用，跳过嵌套的子查询"""
+    columns = set()
+    i = start
+    while i < end:
+        token = significant[i]
+        if token.text == '(' and token.match is not None and i + 1 < end and significant[i + 1].lower == 'select':
+            i = token.match + 1
+            continue
+        if token.kind == 'name':
+            before = significant[i - 1].lower if i > 0 else ''
+            after = significant[i + 1].lower if i + 1 < len(significant) else ''
+            if before in COMPARISON or after in COMPARISON:
+                columns.add(token.lower)
+        i += 1
+    return columns
+
+
+def iter_table_references(significant):
+    """返回FROM/JOIN后的表引用[(token下标, 别名, 是否JOIN)]，子查询和表达式中的from跳过"""
+    for i, token in enumerate(significant):
+        if token.lower == 'from':
+            is_join = False
+        elif token.lower == 'join':
+            is_join = True
+        else:
+            continue
+        j = i + 1
+        while j < len(significant) and significant[j].kind == 'name' and significant[j].lower not in NOT_ALIAS:
+            table_index = j
+            alias = None
+            j += 1
+            if j < len(significant) and significant[j].lower == 'as':
+                j += 1
+            if (j < len(significant) and significant[j].kind == 'name' and significant[j].lower not in NOT_ALIAS
+                    and '.' not in significant[j].lower):
+                alias = significant[j].lower
+                j += 1
+            yield table_index, alias, is_join
+            # 逗号分隔的多个表
+            if is_join or j >= len(significant) or significant[j].text != ',':
+                break
+            j += 1
+
+
+def load_partitioned_tables(catalog_path, column):
+    """本地表结构目录中以column为分区字段的表"""
+    from schema_catalog import open_catalog
+    catalog = open_catalog(catalog_path)
+    try:
+        rows = catalog.execute('SELECT DISTINCT table_name FROM columns WHERE column_name = ? AND is_partition = 1',
+                               (column,))
+        return {row[0].lower() for row in rows}
+    finally:
+        catalog.close()
+
+
+def is_partitioned(table_name, partitioned_tables):
+    if partitioned_tables is None:
+        return '.' in table_name
+    return table_name in partitioned_tables or table_name.split('.')[-1] in partitioned_tables
+
+
+def lint_sql(text, column=DEFAULT_PARTITION_COLUMN, partitioned_tables=None, value=DEFAULT_PARTITION_VALUE):
+    """
+    检查一段SQL，返回(问题列表, 修复后的SQL)
+    问题为(字符偏移, 表名, 别名)；没有问题时修复后的SQL与原文相同
+    """
+    tokens, significant = tokenize(text)
+    cte_names = collect_cte_names(significant)
+    issues = []
+    # 插入位置(有效token下标) -> [条件, ...]；wraps记录需要给原条件加括号的子句
+    inserts = {}
+    wraps = {}
+    for index, alias, is_join in iter_table_references(significant):
+        table_name = significant[index].lower
+        if table_name in cte_names or not is_partitioned(table_name, partitioned_tables):
+            continue
+        block = find_block(significant, index)
+        if block is None:
+            continue
+        start, end = block
+        # 没有别名时用不带库名的表名限定，Hive不支持 库.表.字段 的写法
+        qualifier = alias or table_name.split('.')[-1]
+        accepted = {column, qualifier + '.' + column, table_name + '.' + column}
+        if accepted & compared_columns(significant, start, end):
+            continue
+        issues.append((significant[index].offset, table_name, alias))
+
+        depth = significant[index].depth
+        predicate = '%s.%s=%s' % (qualifier, column, value)
+        on_index = None
+        if is_join:
+            on_index = find_keyword(significant, 'on', index + 1, end, depth,
+                                    stops=('join', 'where') + tuple(CLAUSE_END))
+        if on_index is not None:
+            clause_end = find_clause_end(significant, on_index + 1, end, depth,
+                                         ('join', 'where') + tuple(JOIN_MODIFIERS) + tuple(CLAUSE_END))
+            anchor = on_index
+        else:
+            anchor = find_keyword(significant, 'where', index + 1, end, depth, stops=CLAUSE_END)
+            if anchor is None:
+                # 没有WHERE时补在FROM子句之后
+                anchor = find_clause_end(significant, index + 1, end, depth, CLAUSE_END) - 1
+                inserts.setdefault(anchor, ['where']).append(predicate)
+                continue
+            clause_end = find_clause_end(significant, anchor + 1, end, depth, CLAUSE_END)
+        inserts.setdefault(anchor, []).append(predicate)
+        if has_top_level_or(significant, anchor + 1, clause_end, depth):
+            wraps[anchor] = clause_end - 1
+
+    if not inserts:
+        return issues, text
+    # 按有效token在全部token中的位置插入
+    position = {id(token): i for i, token in enumerate(tokens)}
+    # 括号先于同一位置补上的where
+    additions = {position[id(significant[wrap_end])]: ')' for wrap_end in wraps.values()}
+    for anchor, predicates in inserts.items():
+        if predicates[0] == 'where':
+            addition = ' where ' + ' and '.join(predicates[1:])
+        elif anchor in wraps:
+            addition = ' ' + ' and '.join(predicates) + ' and ('
+        else:
+            addition = ' ' + ' and '.join(predicates) + ' and'
+        key = position[id(significant[anchor])]
+        additions[key] = additions.get(key, '') + addition
+    output = []
+    for i, token in enumerate(tokens):
+        output.append(token.text)
+        if i in additions:
+            output.append(additions[i])
+    return issues, ''.join(output)
+
+
+def iter_sql_files(paths):
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                for name in sorted(files):
+                    if name.lower().endswith(SQL_EXTENSIONS):
+                        yield os.path.join(root, name)
+        else:
+            yield path
+
+
+def line_number(line_starts, offset):
+    return bisect.bisect_right(line_starts, offset)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='检查SQL中缺少分区条件的表引用')
+    parser.add_argument('inputs', nargs='+', help='SQL文件或目录')
+    parser.add_argument('--column', default=DEFAULT_PARTITION_COLUMN, help='分区字段')
+    parser.add_argument('--value', default=DEFAULT_PARTITION_VALUE, help='--fix时补上的分区值')
+    parser.add_argument('--catalog', help='本地表结构目录，只检查以--column为分区字段的表')
+    parser.add_argument('--table-list', help='分区表清单文件，每行一个表名')
+    parser.add_argument('--fix', action='store_true', help='补上分区条件并写回文件')
+    parser.add_argument('--run-date', help='指定运行日期时补上的分区值中的日期宏展开为日期常量')
+    args = parser.parse_args()
+
+    if args.run_date:
+        args.value = expand(args.value, parse_run_date(args.run_date))
+    partitioned = None
+    if args.catalog:
+        partitioned = load_partitioned_tables(args.catalog, args.column)
+    if args.table_list:
+        with open(args.table_list, encoding='utf-8') as f:
+            partitioned = (partitioned or set()) | {line.strip().lower() for line in f if line.strip()}
+
+    file_count = 0
+    issue_count = 0
+    for file_path in iter_sql_files(args.inputs):
+        file_count += 1
+        with open(file_path, encoding='utf-8') as f:
+            text = f.read()
+        issues, fixed = lint_sql(text, args.column, partitioned, args.value)
+        if not issues:
+            continue
+        issue_count += len(issues)
+        line_starts = [0] + [m.end() for m in re.finditer('\n', text)]
+        for offset, table_name, alias in issues:
+            print('%s:%d: %s%s 缺少分区条件 %s' % (file_path, line_number(line_starts, offset), table_name,
+                                             ' ' + alias if alias else '', args.column))
+        if args.fix:
+            with open(file_path, 'w', encoding='utf-8') as f:
+                f.write(fixed)
+    sys.stderr.write('检查%d个文件，%d处缺少分区条件%s\n' % (file_count, issue_count, '，已修复' if args.fix and issue_count else ''))
+    sys.exit(1 if issue_count and not args.fix else 0)
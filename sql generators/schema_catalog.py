@@ -0,0 +1,303 @@
+# 脚本调用示例：
+# schema_catalog.py import catalog.db dumps/            导入DESCRIBE或SHOW CREATE TABLE导出文件（文件或目录）
+# schema_catalog.py tables catalog.db 'ods_*'           按表名通配符列出表
+# schema_catalog.py find catalog.db --column resource_id 按字段名查找
+# schema_catalog.py find catalog.db --comment 审批       按注释关键字查找
+#
+# 支持的导入格式（可混合在同一文件中，表块之间用空行分隔）：
+# 1. 魔数复制格式：表名一行，之后为 '字段名<TAB>注释<TAB>数据类型' 表头及字段行
+# 2. Hive DESCRIBE格式：表名一行，之后为 'col_name<TAB>data_type<TAB>comment' 表头及字段行
+# 3. SHOW CREATE TABLE语句（Hive/Doris），表名取自语句本身
+
+import argparse
+import os
+import re
+import sqlite3
+
+from gen_view import iter_input_files
+
+CREATE_TABLE_PATTERN = re.compile(
+    r'CREATE\s+(?:EXTERNAL\s+)?TABLE\s+(?:IF\s+NOT\s+EXISTS\s+)?([`\w.]+)\s*\(', re.IGNORECASE)
+# 类型参数可能嵌套（ARRAY<STRUCT<a:DECIMAL(10,2)>>），由type_parameters_end按深度扫描
+COLUMN_PATTERN = re.compile(r'^\s*`?(\w+)`?\s+(\w+)')
+COLUMN_TAIL_PATTERN = re.compile(r'(.*?)(?:COMMENT\s+([\'"])(.*?)\2)?\s*,?\s*$', re.IGNORECASE)
+HIVE_PARTITION_PATTERN = re.compile(r'PARTITIONED\s+BY\s*\(', re.IGNORECASE)
+DORIS_PARTITION_PATTERN = re.compile(r'PARTITION\s+BY\s+\w+\s*\(([^)]*)\)', re.IGNORECASE)
+COLUMN_KEYWORDS = ('PRIMARY', 'KEY', 'INDEX', 'CONSTRAINT', 'UNIQUE')
+
+
+def open_catalog(db_path):
+    conn = sqlite3.connect(db_path)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS columns (
+            table_name TEXT NOT NULL,
+            ordinal INTEGER NOT NULL,
+            column_name TEXT NOT NULL,
+            comment TEXT NOT NULL DEFAULT '',
+            data_type TEXT NOT NULL DEFAULT '',
+            is_partition INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (table_name, ordinal)
+        )
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_columns_column ON columns (column_name)')
+    conn.commit()
+    return conn
+
+
+def strip_table_name(name):
+    """去掉反引号，保留库名前缀"""
+    return name.replace('`', '')
+
+
+def matching_paren(text, start):
+    """text[start]为'('，返回与之匹配的')'的位置，忽略引号内的括号；不完整时返回None"""
+    depth = 0
+    quote = None
+    for i in range(start, len(text)):
+        char = text[i]
+        if quote:
+            if char == '\\':
+                continue
+            if char == quote and text[i - 1] != '\\':
+                quote = None
+        elif char in '\'"`':
+            quote = char
+        elif char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+            if depth == 0:
+                return i
+    return None
+
+
+def type_parameters_end(text, start):
+    """从start起跳过类型参数（括号或尖括号，可嵌套），返回参数之后的位置；没有参数或不完整时返回start"""
+    i = start
+    while i < len(text) and text[i].isspace():
+        i += 1
+    if i >= len(text) or text[i] not in '(<':
+        return start
+    depth = 0
+    quote = None
+    for j in range(i, len(text)):
+        char = text[j]
+        if quote:
+            if char == quote:
+                quote = None
+        elif char in '\'"':
+            quote = char
+        elif char in '(<':
+            depth += 1
+        elif char in ')>':
+            depth -= 1
+            if depth == 0:
+                return j + 1
+    return start
+
+
+def parse_create_table(sql):
+    """解析SHOW CREATE TABLE语句，返回(表名, [(字段名, 注释, 类型, 是否分区字段), ...])"""
+    match = CREATE_TABLE_PATTERN.search(sql)
+    if not match:
+        return None
+    end = matching_paren(sql, match.end() - 1)
+    if end is None:
+        return None
+    table_name = strip_table_name(match.group(1))
+    columns = parse_column_definitions(sql[match.end():end])
+
+    rest = sql[end + 1:]
+    hive_partition = HIVE_PARTITION_PATTERN.search(rest)
+    if hive_partition:
+        partition_end = matching_paren(rest, hive_partition.end() - 1)
+        if partition_end is not None:
+            columns += [(name, comment, data_type, 1) for name, comment, data_type, _ in
+                        parse_column_definitions(rest[hive_partition.end():partition_end])]
+    doris_partition = DORIS_PARTITION_PATTERN.search(rest)
+    if doris_partition:
+        partition_names = {strip_table_name(name).strip() for name in doris_partition.group(1).split(',')}
+        columns = [(name, comment, data_type, 1 if name in partition_names else is_partition)
+                   for name, comment, data_type, is_partition in columns]
+    return table_name, columns
+
+
+def parse_column_definitions(body):
+    """解析括号内的字段定义"""
+    columns = []
+    for line in split_column_definitions(body):
+        if line.strip().split(' ')[0].upper() in COLUMN_KEYWORDS:
+            continue
+        match = COLUMN_PATTERN.match(line)
+        if match:
+            type_end = type_parameters_end(line, match.end())
+            tail = COLUMN_TAIL_PATTERN.match(line, type_end)
+            columns.append((match.group(1), tail.group(3) or '', line[match.start(2):type_end].strip(), 0))
+    return columns
+
+
+def split_column_definitions(body):
+    """按顶层逗号切分字段定义，忽略括号和引号内的逗号"""
+    parts = []
+    depth = 0
+    quote = None
+    current = []
+    for char in body:
+        if quote:
+            if char == quote:
+                quote = None
+        elif char in '\'"':
+            quote = char
+        elif char in '(<':
+            depth += 1
+        elif char in ')>':
+            depth -= 1
+        elif char == ',' and depth == 0:
+            parts.append(''.join(current))
+            current = []
+            continue
+        current.append(char)
+    if ''.join(current).strip():
+        parts.append(''.join(current))
+    return [' '.join(part.split()) for part in parts]
+
+
+def parse_describe_block(table_name, lines):
+    """解析DESCRIBE格式的字段行，根据表头判断列顺序"""
+    name_comment_type = True
+    columns = []
+    in_partition_info = False
+    for line in lines:
+        cells = [cell.strip() for cell in line.rstrip('\r\n').split('\t')]
+        cells += [''] * (3 - len(cells))
+        if cells[0] == '字段名':
+            name_comment_type = True
+            continue
+        if cells[0] in ('col_name', '# col_name'):
+            name_comment_type = False
+            continue
+        if cells[0].startswith('# Partition Information'):
+            in_partition_info = True
+            continue
+        if cells[0] == '' or cells[0].startswith('#'):
+            continue
+        is_partition = 1 if in_partition_info or '[P]' in cells[0] else 0
+        name = cells[0].split(' ')[0]
+        if name_comment_type:
+            comment, data_type = cells[1], cells[2]
+        else:
+            data_type, comment = cells[1], cells[2]
+        if in_partition_info:
+            # Hive DESCRIBE会在分区信息中重复列出分区字段
+            columns = [column for column in columns if column[0] != name]
+        columns.append((name, comment, data_type, is_partition))
+    return table_name, columns
+
+
+def read_dump(text):
+    """读取一个导出文件中的所有表，返回[(表名, 字段列表), ...]"""
+    tables = []
+    for statement in re.split(r';\s*\n', text):
+        if re.search(r'CREATE\s+(?:EXTERNAL\s+)?TABLE', statement, re.IGNORECASE):
+            parsed = parse_create_table(statement)
+            if parsed:
+                tables.append(parsed)
+    if tables:
+        return tables
+
+    table_name = None
+    block = []
+    for line in text.split('\n') + ['']:
+        if line.strip() == '':
+            if block and table_name:
+                tables.append(parse_describe_block(table_name, block))
+            table_name = None if block else table_name
+            block = []
+        elif line.strip().startswith('--'):
+            continue
+        elif '\t' not in line and not block:
+            table_name = line.strip()
+        else:
+            block.append(line)
+    return tables
+
+
+def import_tables(conn, tables):
+    """导入表结构，同名表整体覆盖"""
+    with conn:
+        for table_name, columns in tables:
+            conn.execute('DELETE FROM columns WHERE table_name = ?', (table_name,))
+            conn.executemany(
+                'INSERT INTO columns (table_name, ordinal, column_name, comment, data_type, is_partition) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                [(table_name, i, name, comment, data_type, is_partition)
+                 for i, (name, comment, data_type, is_partition) in enumerate(columns)])
+    return len(tables)
+
+
+def list_tables(conn, pattern='*'):
+    return [row[0] for row in conn.execute(
+        'SELECT DISTINCT table_name FROM columns WHERE table_name GLOB ? ORDER BY table_name', (pattern,))]
+
+
+def load_table_fields(conn, patterns):
+    """
+    按表名通配符一次查询所有匹配表的字段
+    返回[(表名, [(字段名, 注释, 类型), ...]), ...]，字段按原始顺序
+    """
+    where = ' OR '.join(['table_name GLOB ?'] * len(patterns))
+    rows = conn.execute(
+        'SELECT table_name, column_name, comment, data_type FROM columns WHERE %s '
+        'ORDER BY table_name, ordinal' % where, list(patterns))
+    tables = []
+    for table_name, column_name, comment, data_type in rows:
+        if not tables or tables[-1][0] != table_name:
+            tables.append((table_name, []))
+        tables[-1][1].append((column_name, comment, data_type))
+    return tables
+
+
+def find_columns(conn, column=None, comment=None):
+    if column:
+        return conn.execute('SELECT table_name, column_name, comment, data_type FROM columns '
+                            'WHERE column_name = ? ORDER BY table_name', (column,)).fetchall()
+    return conn.execute('SELECT table_name, column_name, comment, data_type FROM columns '
+                        'WHERE comment LIKE ? ORDER BY table_name, ordinal', ('%' + comment + '%',)).fetchall()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='本地表结构目录')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    import_parser = subparsers.add_parser('import', help='导入DESCRIBE或SHOW CREATE TABLE导出文件')
+    import_parser.add_argument('db')
+    import_parser.add_argument('inputs', nargs='+')
+    tables_parser = subparsers.add_parser('tables', help='按表名通配符列出表')
+    tables_parser.add_argument('db')
+    tables_parser.add_argument('pattern', nargs='?', default='*')
+    find_parser = subparsers.add_parser('find', help='按字段名或注释查找')
+    find_parser.add_argument('db')
+    find_group = find_parser.add_mutually_exclusive_group(required=True)
+    find_group.add_argument('--column')
+    find_group.add_argument('--comment')
+    args = parser.parse_args()
+
+    catalog = open_catalog(args.db)
+    if args.command == 'import':
+        count = 0
+        for file_path in iter_input_files(args.inputs):
+            with open(file_path, encoding='utf-8') as f:
+                tables = read_dump(f.read())
+            # 单表DESCRIBE文件没有写表名时使用文件名
+            if not tables:
+                with open(file_path, encoding='utf-8') as f:
+                    lines = [line for line in f if line.strip() and not line.strip().startswith('--')]
+                tables = [parse_describe_block(os.path.splitext(os.path.basename(file_path))[0], lines)]
+            count += import_tables(catalog, tables)
+        print('已导入%d张表' % count)
+    elif args.command == 'tables':
+        print('\n'.join(list_tables(catalog, args.pattern)))
+    else:
+        for row in find_columns(catalog, args.column, args.comment):
+            print('\t'.join(row))
+    catalog.close()
@@ -0,0 +1,314 @@
+# 脚本调用示例：
+# sql_sandbox.py --schema schemas/ out/                       按表结构建表并生成示例数据，逐个执行out/下的SQL
+# sql_sandbox.py --catalog catalog.db --table 'ods_*' out/ --data samples/ --rows 50
+# gen_drop_partition.py t p20210721 p20210725 > drop.sql && sql_sandbox.py --schema schemas/ drop.sql
+#
+# 在本地SQLite内存库中校验生成的SQL（gen_view.py / gen_doris_table.py / gen_drop_partition.py等的输出），
+# 不用再粘贴到网页控制台才发现语法错误：
+# 1. 按表结构输入建表，--data目录中有 <表名>.tsv（带表头）时导入该文件，否则按字段类型生成--rows行示例数据
+# 2. 每个脚本在同一个事务中执行后回滚，互不影响；CREATE VIEW/CTAS/SELECT执行后报告行数
+# 3. 执行前把Hive/Doris语法翻译为SQLite：去掉COMMENT、建表属性、分区定义、TABLESAMPLE，
+#    DROP PARTITION改为按分区字段DELETE，$$yesterday/$$today{-Nd}等日期宏按date_macro.py替换为日期，补充pmod/hash等函数
+
+import argparse
+import csv
+import datetime
+import os
+import re
+import sqlite3
+import sys
+import time
+import zlib
+
+from date_macro import get_expander, parse_run_date
+from gen_view import load_batch_blocks, load_catalog_blocks
+from partition_lint import iter_sql_files, tokenize
+
+DEFAULT_ROWS = 20
+PARTITION_COLUMN_CANDIDATES = ('pt_dt', 'dt')
+# 示例数据的分区值分布在最近几天
+SAMPLE_PARTITION_DAYS = 7
+DATE_FORMAT = '%Y-%m-%d'
+
+INTEGER_TYPES = ('tinyint', 'smallint', 'int', 'integer', 'bigint')
+DECIMAL_TYPES = ('double', 'float', 'decimal')
+# CAST和建表中的类型名，SQLite中string是数值亲和性，需要改成TEXT
+TYPE_REPLACEMENTS = {'string': 'TEXT'}
+
+
+def register_functions(conn):
+    """补充脚本中常用、SQLite没有的Hive/Doris函数"""
+    conn.create_function('pmod', 2, lambda a, b: None if a is None or not b else a % b, deterministic=True)
+    conn.create_function('hash', 1, lambda v: zlib.crc32(str(v).encode('utf-8')) - 2 ** 31, deterministic=True)
+    conn.create_function('murmur_hash3_32', 1, lambda v: zlib.crc32(str(v).encode('utf-8')) - 2 ** 31,
+                         deterministic=True)
+    conn.create_function('nvl', 2, lambda a, b: b if a is None else a, deterministic=True)
+    conn.create_function('concat', -1, lambda *args: None if None in args else ''.join(str(a) for a in args),
+                         deterministic=True)
+    conn.create_function('concat_ws', -1, lambda sep, *args: sep.join(str(a) for a in args if a is not None),
+                         deterministic=True)
+    conn.create_function('rand', 0, lambda: 0.5)
+
+
+def quote_name(name):
+    return '"%s"' % name.replace('"', '""')
+
+
+def sample_value(column, declared_type, i, today):
+    base = declared_type.strip().lower().split('(')[0]
+    if column in PARTITION_COLUMN_CANDIDATES:
+        return (today - datetime.timedelta(days=1 + i % SAMPLE_PARTITION_DAYS)).strftime(DATE_FORMAT)
+    if base in INTEGER_TYPES:
+        return i + 1
+    if base in DECIMAL_TYPES:
+        return (i + 1) * 1.5
+    if base in ('date', 'datetime', 'timestamp'):
+        return (today - datetime.timedelta(days=i)).strftime(DATE_FORMAT)
+    return '%s_%d' % (column, i + 1)
+
+
+def load_sample_rows(data_dir, table_name, columns):
+    """读取 <表名>.tsv，按表头对应字段，表中没有的列丢弃，缺少的列为NULL"""
+    if not data_dir:
+        return None
+    path = os.path.join(data_dir, table_name + '.tsv')
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding='utf-8', newline='') as f:
+        return [tuple(row.get(column) for column in columns) for row in csv.DictReader(f, delimiter='\t')]
+
+
+def build_base_database(blocks, rows, data_dir, today):
+    """按表结构建表并导入示例数据，返回连接"""
+    conn = sqlite3.connect(':memory:', isolation_level=None)
+    register_functions(conn)
+    for table_name, fields in blocks:
+        columns = [name for name, _, _ in fields]
+        conn.execute('CREATE TABLE %s (%s)' % (quote_name(table_name), ', '.join(
+            '%s %s' % (quote_name(name), TYPE_REPLACEMENTS.get(declared_type.lower(), declared_type or 'TEXT'))
+            for name, _, declared_type in fields)))
+        sample = load_sample_rows(data_dir, table_name, columns)
+        if sample is None:
+            sample = [tuple(sample_value(name, declared_type, i, today) for name, _, declared_type in fields)
+                      for i in range(rows)]
+        conn.executemany('INSERT INTO %s VALUES (%s)' % (quote_name(table_name), ', '.join('?' * len(columns))),
+                         sample)
+    return conn
+
+
+def split_statements(tokens):
+    """按顶层分号切分，返回每条语句的token列表（不含分号），跳过只有空白和注释的语句"""
+    statements = []
+    current = []
+    depth = 0
+    for token in tokens:
+        if token.text == '(':
+            depth += 1
+        elif token.text == ')':
+            # Doris分区范围 [('a'), ('b')) 中的括号不成对
+            depth = max(0, depth - 1)
+        if token.text == ';' and depth == 0:
+            statements.append(current)
+            current = []
+        else:
+            current.append(token)
+    statements.append(current)
+    return [s for s in statements if any(t.kind not in ('space', 'comment') for t in s)]
+
+
+def significant_indexes(statement):
+    return [i for i, t in enumerate(statement) if t.kind not in ('space', 'comment')]
+
+
+def matching_paren(statement, start):
+    depth = 0
+    for i in range(start, len(statement)):
+        if statement[i].text == '(':
+            depth += 1
+        elif statement[i].text == ')':
+            depth -= 1
+            if depth == 0:
+                return i
+    return len(statement) - 1
+
+
+def translate_statement(statement, known_tables, today):
+    """
+    把一条Hive/Doris语句翻译为SQLite，返回(语句类型, 对象名, SQLite语句)
+    语句类型为 create_view/alter_view/create_table/select/drop_partition/alter/other，
+    drop_partition时SQLite语句为分区名列表，alter时为None
+    """
+    sig = significant_indexes(statement)
+    words = [statement[i].lower for i in sig]
+    kind = 'other'
+    name = None
+    skip = set()
+    replace = {}
+    if words[:2] == ['alter', 'table'] and len(words) > 2:
+        name = words[2]
+        if 'drop' in words and 'partition' in words:
+            return 'drop_partition', name, partition_names(statement, sig, words)
+        return 'alter', name, None
+    # ALTER VIEW ... AS 翻译为CREATE VIEW，执行前先删除原视图
+    if words[:2] == ['alter', 'view'] and len(words) > 2:
+        kind = 'alter_view'
+        name = words[2]
+        replace[sig[0]] = 'create'
+    elif words and words[0] == 'create' and ('view' in words[:3] or 'table' in words[:4]):
+        kind = 'create_view' if 'view' in words[:3] else 'create_table'
+        position = words.index('view' if kind == 'create_view' else 'table') + 1
+        if words[position:position + 3] == ['if', 'not', 'exists']:
+            position += 3
+        name = words[position]
+    elif words and words[0] in ('select', 'with'):
+        kind = 'select'
+
+    for n, i in enumerate(sig):
+        token = statement[i]
+        word = words[n]
+        if word == 'comment' and n + 1 < len(sig) and statement[sig[n + 1]].kind == 'string':
+            skip.update((i, sig[n + 1]))
+        elif word == 'tablesample' and n + 1 < len(sig) and statement[sig[n + 1]].text == '(':
+            skip.update(range(i, matching_paren(statement, sig[n + 1]) + 1))
+        elif word == 'repeatable' and n + 1 < len(sig):
+            skip.update((i, sig[n + 1]))
+        elif word == 'overwrite' and n > 0 and words[n - 1] == 'insert':
+            replace[i] = 'into'
+            if n + 1 < len(sig) and words[n + 1] == 'table':
+                skip.add(sig[n + 1])
+        elif word == 'partition' and n > 0 and n + 1 < len(sig) and statement[sig[n + 1]].text == '(' \
+                and words[0] == 'insert':
+            skip.update(range(i, matching_paren(statement, sig[n + 1]) + 1))
+        elif token.kind == 'name' and word in TYPE_REPLACEMENTS and n > 0 and words[n - 1] == 'as':
+            replace[i] = TYPE_REPLACEMENTS[word]
+        elif token.kind == 'name' and '.' in word and word in known_tables:
+            replace[i] = quote_name(word)
+        elif token.kind == 'string' and '$$' in token.text:
+            replace[i] = get_expander(today, DATE_FORMAT).expand(token.text)
+
+    # 建表语句只保留字段列表，去掉ENGINE/KEY/PARTITION BY/DISTRIBUTED BY/PROPERTIES
+    if kind == 'create_table' and 'as' not in words[:words.index(name) + 2]:
+        first_paren = next((i for i in sig if statement[i].text == '('), None)
+        if first_paren is not None:
+            skip.update(range(matching_paren(statement, first_paren) + 1, len(statement)))
+            for n, i in enumerate(sig):
+                if first_paren < i and statement[i].kind == 'name' and words[n] in TYPE_REPLACEMENTS:
+                    replace[i] = TYPE_REPLACEMENTS[words[n]]
+    text = ''.join(replace.get(i, t.text) for i, t in enumerate(statement) if i not in skip)
+    return kind, name, text.strip()
+
+
+def table_columns(conn, table_name):
+    return [row[1] for row in conn.execute('PRAGMA table_info(%s)' % quote_name(table_name))]
+
+
+def partition_names(statement, sig, words):
+    """Doris的 drop partition `p20210721` 取分区名，Hive的 partition (pt_dt='2021-07-21') 取分区值"""
+    names = []
+    for n, word in enumerate(words[:-1]):
+        if word != 'partition':
+            continue
+        if words[n + 1] == '(':
+            values = [statement[i].text.strip('\'"') for i in sig[n + 2:n + 6] if statement[i].kind == 'string']
+            if values:
+                names.append(values[0])
+        else:
+            names.append(words[n + 1])
+    return names
+
+
+def drop_partition(conn, table_name, partition):
+    """DROP PARTITION p20210721 改为按分区字段删除该日期的数据，返回删除行数"""
+    columns = table_columns(conn, table_name)
+    if not columns:
+        raise sqlite3.OperationalError('no such table: %s' % table_name)
+    match = re.match(r'p?(\d{8})$', partition.replace('`', '').replace('-', ''))
+    if not match:
+        raise ValueError('无法识别的分区名: %s' % partition)
+    partition_column = next((c for c in PARTITION_COLUMN_CANDIDATES if c in columns), None)
+    if not partition_column:
+        raise ValueError('%s 没有分区字段' % table_name)
+    date = datetime.datetime.strptime(match.group(1), '%Y%m%d')
+    cursor = conn.execute('DELETE FROM %s WHERE %s IN (?, ?)' % (quote_name(table_name), quote_name(partition_column)),
+                          (date.strftime(DATE_FORMAT), date.strftime('%Y%m%d')))
+    return cursor.rowcount
+
+
+def run_script(conn, text, known_tables, today):
+    """
+    在事务中执行一个脚本后回滚，返回(语句数, 结果描述列表, 错误列表)
+    错误为(语句序号, 错误信息, 翻译后的语句)
+    """
+    tokens, _ = tokenize(text)
+    statements = split_statements(tokens)
+    results = []
+    errors = []
+    created = set()
+    conn.execute('BEGIN')
+    try:
+        for number, statement in enumerate(statements, 1):
+            kind, name, sql = translate_statement(statement, known_tables | created, today)
+            try:
+                if kind == 'drop_partition':
+                    deleted = sum(drop_partition(conn, name, partition) for partition in sql)
+                    results.append('%s删除%d个分区%d行' % (name, len(sql), deleted))
+                elif kind == 'alter':
+                    if not table_columns(conn, name):
+                        raise sqlite3.OperationalError('no such table: %s' % name)
+                elif kind == 'select':
+                    results.append('查询%d行' % len(conn.execute(sql).fetchall()))
+                else:
+                    if kind == 'alter_view':
+                        conn.execute('DROP VIEW %s' % quote_name(name))
+                    conn.execute(sql)
+                    if kind in ('create_view', 'alter_view', 'create_table'):
+                        created.add(name)
+                        # 视图在查询时才会发现字段错误
+                        count = conn.execute('SELECT count(*) FROM %s' % quote_name(name)).fetchone()[0]
+                        results.append('%s %d行' % (name, count))
+            except (sqlite3.Error, ValueError) as e:
+                errors.append((number, str(e), sql))
+    finally:
+        conn.execute('ROLLBACK')
+    return len(statements), results, errors
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='在本地SQLite中校验生成的SQL')
+    parser.add_argument('inputs', nargs='+', help='要校验的SQL文件或目录')
+    parser.add_argument('--schema', action='append', help='表结构文件或目录（gen_view.py批量模式格式），可重复')
+    parser.add_argument('--catalog', help='从本地表结构目录读取表结构')
+    parser.add_argument('--table', action='append', help='配合--catalog使用的表名通配符，可重复')
+    parser.add_argument('--data', help='示例数据目录，<表名>.tsv')
+    parser.add_argument('--rows', type=int, default=DEFAULT_ROWS, help='没有示例数据文件时每张表生成的行数')
+    parser.add_argument('--run-date', help='展开$$yesterday等日期宏使用的运行日期，缺省为今天')
+    parser.add_argument('-v', '--verbose', action='store_true', help='通过的脚本也输出结果')
+    args = parser.parse_args()
+
+    started = time.time()
+    today = parse_run_date(args.run_date)
+    blocks = []
+    if args.catalog:
+        blocks += load_catalog_blocks(args.catalog, args.table or ['*'])
+    if args.schema:
+        blocks += load_batch_blocks(args.schema)
+    connection = build_base_database(blocks, args.rows, args.data, today)
+    tables = {table_name.lower() for table_name, _ in blocks}
+
+    script_count = 0
+    failed = 0
+    for file_path in iter_sql_files(args.inputs):
+        script_count += 1
+        with open(file_path, encoding='utf-8') as f:
+            script = f.read()
+        statement_count, script_results, script_errors = run_script(connection, script, tables, today)
+        if script_errors:
+            failed += 1
+            print('%s: 失败，%d条语句，%d条出错' % (file_path, statement_count, len(script_errors)))
+            for number, message, sql in script_errors:
+                print('  第%d条语句: %s' % (number, message))
+                print('    ' + sql.split('\n')[0][:120])
+        elif args.verbose:
+            print('%s: 通过，%d条语句；%s' % (file_path, statement_count, '，'.join(script_results)))
+    sys.stderr.write('校验%d个脚本，%d个失败，耗时%.2f秒\n' % (script_count, failed, time.time() - started))
+    sys.exit(1 if failed else 0)
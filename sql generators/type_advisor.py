@@ -0,0 +1,132 @@
+# 根据字段统计信息推荐更窄的字段类型，供 gen_view.py --stats 使用
+#
+# 统计文件为制表符分隔、带表头的文本，可直接由统计SQL的结果导出，字段：
+#   table_name  column_name  max_length  min_value  max_value  distinct_count  row_count
+# max_length为字符串最大字节长度，min_value/max_value为整数字段的取值范围，
+# distinct_count/row_count用于判断低基数字段；不适用的统计值留空即可
+
+import csv
+import re
+
+# 整数类型按宽度从窄到宽排列：(类型, 最小值, 最大值)
+INTEGER_TYPES = [
+    ('TINYINT', -2 ** 7, 2 ** 7 - 1),
+    ('SMALLINT', -2 ** 15, 2 ** 15 - 1),
+    ('INT', -2 ** 31, 2 ** 31 - 1),
+    ('BIGINT', -2 ** 63, 2 ** 63 - 1),
+]
+INTEGER_RANK = {name: i for i, (name, _, _) in enumerate(INTEGER_TYPES)}
+INTEGER_RANK['INTEGER'] = INTEGER_RANK['INT']
+STRING_TYPES = ('STRING', 'TEXT', 'VARCHAR')
+
+# VARCHAR长度档位，最大长度乘以余量后向上取档，避免数据略有增长就溢出
+VARCHAR_STEPS = [16, 32, 64, 128, 255, 512, 1024, 2048, 4096, 8192, 16384, 65533]
+LENGTH_HEADROOM = 1.5
+
+# 整数取值范围同样乘以余量后再选类型；主键/关联键类字段会持续增长，不收窄到INT以下
+VALUE_HEADROOM = 10
+KEY_COLUMN_PATTERN = re.compile(r'(^|_)(id|key)$', re.IGNORECASE)
+KEY_COLUMN_MIN_TYPE = 'INT'
+
+# 低基数判断：不同值数量不超过该阈值，且不超过行数的1%
+LOW_CARDINALITY_MAX_DISTINCT = 1000
+LOW_CARDINALITY_MAX_RATIO = 0.01
+
+
+def parse_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def load_column_stats(stats_path):
+    """读取统计文件，返回{(表名, 字段名): 统计字典}"""
+    stats = {}
+    with open(stats_path, encoding='utf-8', newline='') as f:
+        for row in csv.DictReader(f, delimiter='\t'):
+            stats[(row['table_name'], row['column_name'])] = {
+                'max_length': parse_int(row.get('max_length')),
+                'min_value': parse_int(row.get('min_value')),
+                'max_value': parse_int(row.get('max_value')),
+                'distinct_count': parse_int(row.get('distinct_count')),
+                'row_count': parse_int(row.get('row_count')),
+            }
+    return stats
+
+
+def split_type(declared_type):
+    """'varchar(64)' -> ('VARCHAR', 64)，'bigint(20)' -> ('BIGINT', 20)"""
+    match = re.match(r'\s*(\w+)\s*(?:\((\d+)[^)]*\))?', declared_type or '')
+    if not match:
+        return '', None
+    return match.group(1).upper(), parse_int(match.group(2))
+
+
+def narrowest_integer_type(min_value, max_value, column_name=None):
+    min_value *= VALUE_HEADROOM
+    max_value *= VALUE_HEADROOM
+    for name, lower, upper in INTEGER_TYPES:
+        if column_name and KEY_COLUMN_PATTERN.search(column_name) \
+                and INTEGER_RANK[name] < INTEGER_RANK[KEY_COLUMN_MIN_TYPE]:
+            continue
+        if lower <= min_value and max_value <= upper:
+            return name
+    return None
+
+
+def varchar_length(max_length):
+    target = max_length * LENGTH_HEADROOM
+    for step in VARCHAR_STEPS:
+        if step >= target:
+            return step
+    return None
+
+
+def is_low_cardinality(stat):
+    distinct_count = stat.get('distinct_count')
+    row_count = stat.get('row_count')
+    if distinct_count is None or not row_count:
+        return False
+    return (distinct_count <= LOW_CARDINALITY_MAX_DISTINCT
+            and distinct_count <= row_count * LOW_CARDINALITY_MAX_RATIO)
+
+
+def recommend_type(declared_type, stat, column_name=None):
+    """
+    根据声明类型和统计信息推荐类型，column_name用于识别主键/关联键字段
+    返回(推荐类型, 是否低基数)，推荐类型不比声明类型更窄时为None
+    """
+    if not stat:
+        return None, False
+    base_type, length = split_type(declared_type)
+    target_type = None
+
+    if base_type in INTEGER_RANK and stat['min_value'] is not None and stat['max_value'] is not None:
+        narrowest = narrowest_integer_type(stat['min_value'], stat['max_value'], column_name)
+        if narrowest and INTEGER_RANK[narrowest] < INTEGER_RANK[base_type]:
+            target_type = narrowest
+    elif base_type in STRING_TYPES and stat['max_length'] is not None:
+        new_length = varchar_length(stat['max_length'])
+        # 已有VARCHAR(n)时只在更短时推荐
+        if new_length and (length is None or new_length < length):
+            target_type = 'VARCHAR(%d)' % new_length
+
+    return target_type, is_low_cardinality(stat)
+
+
+def build_casts(table_name, fields, stats):
+    """
+    为一张表的字段生成类型推荐，返回{字段名: (推荐类型, 备注)}
+    没有推荐类型也不是低基数的字段不出现在结果中
+    """
+    casts = {}
+    for name, _, declared_type in fields:
+        stat = stats.get((table_name, name))
+        target_type, low_cardinality = recommend_type(declared_type, stat, name)
+        note = ''
+        if low_cardinality:
+            note = '低基数(%d个值)，建议字典编码' % stat['distinct_count']
+        if target_type or note:
+            casts[name] = (target_type, note)
+    return casts